@@ -2,10 +2,14 @@ import json
 import os.path
 import sys
 from abc import abstractmethod
-import copy
 import datetime
 
 from volttron_config_gen.utils import strip_comments
+from volttron_config_gen.utils.config_template import CompiledTemplate
+from volttron_config_gen.utils.generation_result import GenerationResult
+from volttron_config_gen.utils.json_serializer import get_json_serializer
+from volttron_config_gen.utils.output_writer import get_output_writer
+from volttron_config_gen.utils.process_pool import map_in_workers
 
 
 class BaseConfigGenerator:
@@ -65,6 +69,10 @@ class BaseConfigGenerator:
             "building": self.building,
             "unit": {}
         }
+        # device and point_mapping are filled in per AHU, rest of the template is shared
+        self.compiled_template = CompiledTemplate(self.config_template, [("device",)])
+        self.json_serializer = get_json_serializer(self.config_dict)
+
         # initialize output dir
         default_prefix = self.building + "_" if self.building else ""
         self.output_dir = self.config_dict.get(
@@ -79,6 +87,13 @@ class BaseConfigGenerator:
         os.makedirs(self.output_configs, exist_ok=True)
         self.output_errors = os.path.join(self.output_dir, "errors")
         os.makedirs(self.output_errors, exist_ok=True)
+        # Optional. number of threads writing generated configs. 0 to write synchronously.
+        # Optional output_manifest. true to skip rewriting files that are unchanged
+        self.output_writer = get_output_writer(self.config_dict, self.json_serializer,
+                                               self.output_dir)
+        # Optional. number of processes generating configs of AHUs in parallel. By default configs
+        # are generated in this process
+        self.workers = self.config_dict.get("workers", 0)
 
         self.agent_vip_prefix = self.config_dict.get("agent_vip_prefix", "airside")
 
@@ -86,6 +101,17 @@ class BaseConfigGenerator:
         self.equip_id_point_map = dict()
         self.equip_id_device_id_map = dict()
 
+    def __getstate__(self):
+        # output writer has threads and open files. generator is pickled to run in worker
+        # processes, which record files for the parent to write (see process_pool)
+        state = self.__dict__.copy()
+        state.pop("output_writer", None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.output_writer = None
+
     @abstractmethod
     def get_ahu_and_vavs(self):
         """
@@ -97,62 +123,91 @@ class BaseConfigGenerator:
         pass
 
     def generate_configs(self):
-        st = datetime.datetime.utcnow()
+        """
+        Generate configs and exit with 0 if configs were generated for all devices, 1 otherwise
+        """
+        result = self.generate()
+        if result.error_file:
+            sys.stderr.write(f"\nUnable to generate configurations for all AHUs and VAVs. "
+                             f"Please see {result.error_file} for details\n")
+        sys.exit(result.exit_code)
+
+    def generate(self):
+        """
+        Generate configs and return GenerationResult. Call only once per instance
+        """
+        result = GenerationResult("airsidercx", os.path.abspath(self.output_dir))
+        st = result.start_time = datetime.datetime.utcnow()
         print(f"Starting generation at {st}")
-        config_metadata = dict()
-        ahu_and_vavs = self.get_ahu_and_vavs()
-        if isinstance(ahu_and_vavs, dict):
-            iterator = ahu_and_vavs.items()
-        else:
-            iterator = ahu_and_vavs
-        for ahu_id, vavs in iterator:
-            if not ahu_id and vavs:
-                # ahu without vavs and vav without ahuref are not applicable for AirsideRCx
-                self.unmapped_device_details["unmapped_vavs"] = {
-                    "type": "vav",
-                    "warning": f"Found vavs without ahu mapping. Ignoring vavs. {vavs}"}
-                continue
-            if ahu_id and not vavs:
-                # ahu without vavs and vav without ahuref are not applicable for AirsideRCx
-                self.unmapped_device_details[ahu_id] = {
-                    "type": "ahu",
-                    "warning": f"AHU without VAVs. Ignoring AHU"}
-                continue
-
-
-            ahu_name, result_dict = self.generate_ahu_configs(ahu_id, vavs)
-            if not result_dict or not ahu_name:
-                # no valid configs or no valid ahu ref. move to the next ahu
-                # we don't care about unmapped vavs as this agent has mandatory
-                # ahu points
-                continue
-            config_file_name = os.path.abspath(f"{self.output_configs}/{ahu_name}.json")
-            with open(config_file_name, 'w') as f:
-                json.dump(result_dict, f, indent=4)
-            config_metadata[f'{self.agent_vip_prefix}.{ahu_name}'] = [{"config": config_file_name}]
-
-        if config_metadata:
-            config_metafile_name = f"{self.output_dir}/config_metadata.json"
-            with open(config_metafile_name, 'w') as f:
-                json.dump(config_metadata, f, indent=4)
-        et = datetime.datetime.utcnow()
+        try:
+            config_metadata = dict()
+            ahu_and_vavs = self.get_ahu_and_vavs()
+            if isinstance(ahu_and_vavs, dict):
+                iterator = ahu_and_vavs.items()
+            else:
+                iterator = ahu_and_vavs
+            # configs of an ahu and its vavs don't depend on other ahus
+            for ahu_result in map_in_workers(self, "write_ahu_configs", iterator, self.workers):
+                if ahu_result:
+                    ahu_name, config_file_name = ahu_result
+                    config_metadata[f'{self.agent_vip_prefix}.{ahu_name}'] = [
+                        {"config": config_file_name}]
+
+            # config_metadata refers to the generated configs. wait for them to be written
+            self.output_writer.flush()
+            if config_metadata:
+                config_metafile_name = f"{self.output_dir}/config_metadata.json"
+                self.output_writer.write_json(config_metadata, config_metafile_name)
+            result.changes = self.output_writer.close()
+        finally:
+            # releases the writer's threads and deletes the incomplete bundle if generation
+            # failed. does nothing if the writer was closed
+            self.output_writer.discard()
+        result.files = self.output_writer.files
+        result.config_metadata = config_metadata
+        et = result.end_time = datetime.datetime.utcnow()
         print(f"Done with config generation. end time is {et} time taken {et-st}")
 
         if self.unmapped_device_details:
             err_file_name = f"{self.output_errors}/unmapped_device_details"
             with open(err_file_name, 'w') as f:
                 json.dump(self.unmapped_device_details, f, indent=4)
+            result.error_file = err_file_name
+        result.unmapped_device_details = self.unmapped_device_details
+        return result
 
-            sys.stderr.write(f"\nUnable to generate configurations for all AHUs and VAVs. "
-                             f"Please see {err_file_name} for details\n")
-            sys.exit(1)
-        else:
-            sys.exit(0)
+    def write_ahu_configs(self, ahu_id, vavs):
+        """
+        Generate and write config of an ahu. Returns ahu name and the name the config is written
+        under (see OutputWriter), None if no config was generated
+        """
+        if not ahu_id and vavs:
+            # ahu without vavs and vav without ahuref are not applicable for AirsideRCx
+            self.unmapped_device_details["unmapped_vavs"] = {
+                "type": "vav",
+                "warning": f"Found vavs without ahu mapping. Ignoring vavs. {vavs}"}
+            return None
+        if ahu_id and not vavs:
+            # ahu without vavs and vav without ahuref are not applicable for AirsideRCx
+            self.unmapped_device_details[ahu_id] = {
+                "type": "ahu",
+                "warning": f"AHU without VAVs. Ignoring AHU"}
+            return None
+
+        ahu_name, result_dict = self.generate_ahu_configs(ahu_id, vavs)
+        if not result_dict or not ahu_name:
+            # no valid configs or no valid ahu ref.
+            # we don't care about unmapped vavs as this agent has mandatory
+            # ahu points
+            return None
+        config_file_name = self.output_writer.write_json(
+            result_dict, os.path.abspath(f"{self.output_configs}/{ahu_name}.json"))
+        return ahu_name, config_file_name
 
     def generate_ahu_configs(self, ahu_id, vavs):
         if not ahu_id:
             return None, None
-        final_config = copy.deepcopy(self.config_template)
+        final_config = self.compiled_template.render()
         ahu = self.get_name_from_id(ahu_id)
         final_config["device"]["unit"] = {}
         final_config["device"]["unit"][ahu] = {}
@@ -229,8 +284,9 @@ class BaseConfigGenerator:
                             self.unmapped_device_details[ahu_id]["topic_name"][vav_id] = \
                                 self.equip_id_point_topic_map[vav_id]
             elif len(point_mapping[volttron_point_type]) > 1:
-                # convert set to list before returning i.e. written to file
-                point_mapping[volttron_point_type] = list(point_mapping[volttron_point_type])
+                # convert set to list before returning i.e. written to file. sorted so that
+                # unchanged configs are written the same way on every run
+                point_mapping[volttron_point_type] = sorted(point_mapping[volttron_point_type])
             else:
                 point_mapping[volttron_point_type] = point_mapping[volttron_point_type].pop()
 
@@ -1,3 +1,5 @@
+import datetime
+import hashlib
 import json
 import os.path
 import sys
@@ -5,6 +7,13 @@ from abc import abstractmethod
 from pathlib import Path
 
 from volttron_config_gen.utils import strip_comments
+from volttron_config_gen.utils.config_template import CompiledTemplate
+from volttron_config_gen.utils.driver_scheduler import (DEFAULT_SCRAPE_WINDOW,
+                                                        get_driver_group_scheduler)
+from volttron_config_gen.utils.generation_result import GenerationResult
+from volttron_config_gen.utils.json_serializer import get_json_serializer
+from volttron_config_gen.utils.output_writer import get_output_writer
+from volttron_config_gen.utils.process_pool import map_in_workers
 
 
 class BaseConfigGenerator:
@@ -14,6 +23,10 @@ class BaseConfigGenerator:
     building electric meter
     """
 
+    # True if device configs of the subclass take their group from get_driver_group, so that
+    # driver_group_schedule can be applied
+    supports_driver_groups = False
+
     def __init__(self, config):
         if isinstance(config, dict):
             self.config_dict = config
@@ -60,6 +73,9 @@ class BaseConfigGenerator:
         self.unmapped_device_details = dict()
 
         self.config_template = self.config_dict.get("config_template")
+        self._compiled_template = None
+
+        self.json_serializer = get_json_serializer(self.config_dict)
 
         # initialize output dir
         default_prefix = self.building + "_" if self.building else ""
@@ -75,7 +91,38 @@ class BaseConfigGenerator:
         os.makedirs(self.output_configs, exist_ok=True)
         self.output_errors = os.path.join(self.output_dir, "errors")
         os.makedirs(self.output_errors, exist_ok=True)
+        # Optional. number of threads writing generated configs. 0 to write synchronously.
+        # Optional output_manifest. true to skip rewriting files that are unchanged
+        self.output_writer = get_output_writer(self.config_dict, self.json_serializer,
+                                               self.output_dir)
+        # Optional. number of processes generating configs of AHUs in parallel. By default configs
+        # are generated in this process
+        self.workers = self.config_dict.get("workers", 0)
         self.driver_vip = self.config_dict.get("driver_vip", "platform.driver")
+        # Optional driver_group_schedule. Plan of driver groups balanced by registry points. See
+        # schedule_driver_groups
+        if self.config_dict.get("driver_group_schedule") and not self.supports_driver_groups:
+            raise ValueError(f"driver_group_schedule is not supported by "
+                             f"{type(self).__module__}.{type(self).__name__}")
+        self.driver_schedule = None
+        # registry data read while planning driver groups, so that it is not read again
+        self._registry_data = dict()
+        # Optional. If true, devices with the same registry config content share one registry
+        # config, named by digest of the content, instead of one registry config per device
+        self.dedup_registry_configs = self.config_dict.get("dedup_registry_configs", False)
+        # file path of shared registry config -> (config name, config type, content)
+        self.shared_registry_configs = dict()
+
+    def __getstate__(self):
+        # output writer has threads and open files. generator is pickled to run in worker
+        # processes, which record files for the parent to write (see process_pool)
+        state = self.__dict__.copy()
+        state.pop("output_writer", None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.output_writer = None
 
     @abstractmethod
     def get_ahu_and_vavs(self):
@@ -106,88 +153,271 @@ class BaseConfigGenerator:
         return None
 
     def generate_configs(self):
-        ahu_and_vavs = self.get_ahu_and_vavs()
-        if isinstance(ahu_and_vavs, dict):
-            iterator = ahu_and_vavs.items()
-        else:
-            iterator = ahu_and_vavs
-        for ahu_id, vavs in iterator:
-            ahu_name, result_dict = self.generate_ahu_configs(ahu_id, vavs)
-            if not result_dict:
-                continue  # no valid configs, move to the next ahu
-            if ahu_name:
-                with open(f"{self.output_configs}/{ahu_name}.json", 'w') as outfile:
-                    json.dump(result_dict, outfile, indent=4)
-            else:
-                with open(f"{self.output_errors}/unmapped_vavs.json", 'w') as outfile:
-                    json.dump(result_dict, outfile, indent=4)
-
-        try:
-            self.power_meter_id = self.get_building_meter()
-            meter_name, result_dict = self.generate_meter_config()
-            with open(f"{self.output_configs}/{meter_name}.json", 'w') as outfile:
-                json.dump(result_dict, outfile, indent=4)
-        except ValueError as e:
-            self.unmapped_device_details["building_power_meter"] = {"error": f"{e}"}
+        """
+        Generate configs and exit with 0 if configs were generated for all devices, 1 otherwise
+        """
+        result = self.generate()
+        if result.driver_schedule:
+            for trunk, details in result.driver_schedule["trunks"].items():
+                print(f"Trunk {trunk}: expected {details['requests_per_second']} requests per "
+                      f"second")
+        if result.error_file:
+            sys.stderr.write(f"\nUnable to generate configurations for all AHUs and VAVs. "
+                             f"Please see {result.error_file} for details\n")
+        sys.exit(result.exit_code)
 
+    def generate(self):
+        """
+        Generate configs and return GenerationResult. Call only once per instance
+        """
+        result = GenerationResult("driver", os.path.abspath(self.output_dir))
+        result.start_time = datetime.datetime.utcnow()
         try:
-            room_lights = self.get_lights_by_room()
-            if isinstance(room_lights, dict):
-                iterator = room_lights.items()
+            ahu_and_vavs = self.get_ahu_and_vavs()
+            if isinstance(ahu_and_vavs, dict):
+                iterator = ahu_and_vavs.items()
             else:
-                iterator = room_lights
-            lights_dict = {self.driver_vip:[]}
-            for room_id, lights in iterator:
-                try:
-                    occ_detector = self.get_occupancy_detector(room_id)
-                except Exception as e:
-                    self.unmapped_device_details[f"{room_id}_occupancy_detector"] = {
-                        "error": f"Unable to get occupancy detector for and room  {room_id}. "
-                                 f"Exception{e}"}
-                    continue
-                try:
-                    room_name, result_dict = self.generate_room_light_configs(room_id,
-                                                                              lights,
-                                                                              occ_detector)
-                except Exception as e:
-                    self.unmapped_device_details[f"{room_id}_lights"] = {
-                        "error": f"Unable to get lights details for room  {room_id}. "
-                                 f"Exception: {e}"}
-                    continue
-                if not result_dict or not result_dict.get(self.driver_vip):
-                    continue  # no valid configs, move to the next room
+                iterator = ahu_and_vavs
+            iterator = list(iterator)
+            room_lights = None
+            if self.config_dict.get("driver_group_schedule"):
+                # groups have to be known before any config is generated
+                room_lights = self.schedule_driver_groups(iterator)
+            # configs of an ahu and its vavs don't depend on other ahus
+            for shared in map_in_workers(self, "write_ahu_configs", iterator, self.workers):
+                # registry configs shared by devices of ahus generated in worker processes
+                self.shared_registry_configs.update(shared)
+
+            try:
+                self.power_meter_id = self.get_building_meter()
+                meter_name, result_dict = self.generate_meter_config()
+                self.output_writer.write_json(result_dict,
+                                              f"{self.output_configs}/{meter_name}.json")
+            except ValueError as e:
+                self.unmapped_device_details["building_power_meter"] = {"error": f"{e}"}
+
+            try:
+                if room_lights is None:
+                    room_lights = self.get_lights_by_room()
+                # configs of each room are written to all_lights.json as they are generated
+                lights_stream = self.output_writer.open_json_array(
+                    f"{self.output_configs}/all_lights.json", key=self.driver_vip)
+                with lights_stream:
+                    for config in self.iter_room_light_configs(room_lights):
+                        lights_stream.append(config)
+                if lights_stream.count:
+                    lights_stream.close()
                 else:
-                    lights_dict[self.driver_vip].extend(result_dict[self.driver_vip])
-
-            if lights_dict[self.driver_vip]:
-                with open(f"{self.output_configs}/all_lights.json", 'w') as outfile:
-                    json.dump(lights_dict, outfile, indent=4)
-
-        except ValueError as e:
-            self.unmapped_device_details["lights"] = {"error": f"Unable to get lights and room {e}"}
-
-        # Generate driver agent config
-        agent_dict = dict()
-        interval = 60/(self.get_max_device_count_in_group()+1)
-        agent_dict[self.driver_vip] = [
-            {"config-name": "config",
-             "config": {"driver_scrape_interval": interval}
-             }
-        ]
-        with open(f"{self.output_configs}/driver-agent-config.json", 'w') as outfile:
-            json.dump(agent_dict, outfile, indent=4)
+                    lights_stream.discard()
+
+            except ValueError as e:
+                self.unmapped_device_details["lights"] = {
+                    "error": f"Unable to get lights and room {e}"}
+
+            if self.shared_registry_configs:
+                self.write_shared_registry_configs()
+
+            # Generate driver agent config
+            agent_dict = dict()
+            if self.driver_schedule:
+                agent_config = self.driver_schedule.agent_config()
+                result.driver_schedule = self.driver_schedule.to_dict()
+                self.output_writer.write_json(result.driver_schedule,
+                                              f"{self.output_dir}/driver_schedule.json")
+            else:
+                interval = 60/(self.get_max_device_count_in_group()+1)
+                agent_config = {"driver_scrape_interval": interval}
+            agent_dict[self.driver_vip] = [
+                {"config-name": "config",
+                 "config": agent_config
+                 }
+            ]
+            self.output_writer.write_json(agent_dict,
+                                          f"{self.output_configs}/driver-agent-config.json")
+            # wait for all configs to be written before reporting errors
+            result.changes = self.output_writer.close()
+        finally:
+            # releases the writer's threads and deletes the incomplete bundle if generation
+            # failed. does nothing if the writer was closed
+            self.output_writer.discard()
+        result.files = self.output_writer.files
 
         # If unmapped devices exists, write additional unmapped_devices.txt that gives more info to user to map manually
         if self.unmapped_device_details:
             err_file = f"{self.output_errors}/unmapped_device_details"
             with open(err_file, 'w') as outfile:
                 json.dump(self.unmapped_device_details, outfile, indent=4)
+            result.error_file = err_file
+        result.unmapped_device_details = self.unmapped_device_details
+        result.end_time = datetime.datetime.utcnow()
+        return result
 
-            sys.stderr.write(f"\nUnable to generate configurations for all AHUs and VAVs. "
-                             f"Please see {err_file} for details\n")
-            sys.exit(1)
+    def schedule_driver_groups(self, ahu_and_vavs):
+        """
+        Plan driver groups of ahus, vavs and rooms with lights based on the optional
+        driver_group_schedule configuration, so that all groups have about the same number of
+        registry points (see utils.driver_scheduler). Groups are looked up using
+        get_driver_group when device configs are generated and the scrape intervals are
+        written to the driver agent config.
+        Returns lights by room, which has to be read for the plan, so that it is not read again
+        """
+        try:
+            # read before the number of groups, as lights may add groups of their own
+            room_lights = self.get_lights_by_room()
+        except ValueError:
+            # error is reported when light configs are generated
+            room_lights = None
+        if room_lights is not None and not isinstance(room_lights, dict):
+            room_lights = list(room_lights)
+
+        driver_config = self.config_template.get("driver_config", dict())
+        scheduler = get_driver_group_scheduler(
+            self.config_dict,
+            default_groups=self.get_driver_group_count(),
+            default_scrape_window=self.config_template.get("interval", DEFAULT_SCRAPE_WINDOW),
+            max_per_request=driver_config.get("max_per_request", 1))
+
+        for ahu_id, vavs in ahu_and_vavs:
+            if ahu_id:
+                scheduler.add_device("ahu", ahu_id, self._read_point_count(ahu_id, "ahu"),
+                                     self.get_device_trunk(ahu_id, "ahu"))
+            for vav_id in vavs:
+                scheduler.add_device("vav", vav_id, self._read_point_count(vav_id, "vav"),
+                                     self.get_device_trunk(vav_id, "vav"))
+
+        if room_lights is not None:
+            iterator = room_lights.items() if isinstance(room_lights, dict) else room_lights
+            for room_id, lights in iterator:
+                point_count = 0
+                try:
+                    for light_id in lights:
+                        point_count += self._read_point_count(light_id, "lighting",
+                                                              room_id=room_id)
+                    occ_detector = self.get_occupancy_detector(room_id)
+                    if occ_detector:
+                        point_count += self._read_point_count(occ_detector, "occupancy_detector",
+                                                              room_id=room_id)
+                except Exception:
+                    # error is reported when light configs are generated
+                    pass
+                scheduler.add_device("lighting", room_id, point_count,
+                                     self.get_device_trunk(room_id, "lighting"))
+
+        self.driver_schedule = scheduler.schedule()
+        return room_lights
+
+    def _read_point_count(self, equip_id, equip_type, **kwargs):
+        if not self.config_template.get("registry_config"):
+            # no registry configs. groups are balanced by number of devices
+            return 0
+        data = self.generate_registry_config_data(equip_id, equip_type, **kwargs)
+        self._registry_data[(equip_id, equip_type, kwargs.get("room_id"))] = data
+        return len(data)
+
+    def get_registry_config_data(self, equip_id, equip_type, **kwargs):
+        """
+        Returns generate_registry_config_data(equip_id, equip_type, **kwargs), from data read
+        while planning driver groups if it was read already
+        """
+        data = self._registry_data.pop((equip_id, equip_type, kwargs.get("room_id")), None)
+        if data is None:
+            data = self.generate_registry_config_data(equip_id, equip_type, **kwargs)
+        return data
+
+    def get_driver_group(self, equip_id, equip_type, default):
+        """
+        Returns planned driver group of the device if driver groups are scheduled, default
+        otherwise
+        """
+        if self.driver_schedule is None:
+            return default
+        return self.driver_schedule.get_group((equip_type, equip_id), default)
+
+    def get_driver_group_count(self):
+        """
+        Number of driver groups to schedule devices into, if not configured
+        """
+        return 1
+
+    def get_device_trunk(self, equip_id, equip_type):
+        """
+        Network the device is on, for reporting expected requests per network when driver groups
+        are scheduled. None if not known
+        """
+        return None
+
+    def write_ahu_configs(self, ahu_id, vavs):
+        """
+        Write configs of an ahu and its vavs. Returns shared registry configs added for them
+        """
+        shared_before = set(self.shared_registry_configs)
+        ahu_name, result_dict = self.generate_ahu_configs(ahu_id, vavs)
+        if result_dict:
+            if ahu_name:
+                self.output_writer.write_json(result_dict,
+                                              f"{self.output_configs}/{ahu_name}.json")
+            else:
+                self.output_writer.write_json(result_dict,
+                                              f"{self.output_errors}/unmapped_vavs.json")
+        return {k: v for k, v in self.shared_registry_configs.items() if k not in shared_before}
+
+    def add_shared_registry_config(self, content, rtype):
+        """
+        Used by generate_registry_config_file if dedup_registry_configs is true. Returns path of
+        the registry config file with the given content (bytes), named by digest of the
+        content, so that it is shared by all devices with the same registry config. The files
+        and config store entries of shared registry configs are written by
+        write_shared_registry_configs once configs of all devices are generated
+        """
+        digest = hashlib.sha256(content).hexdigest()[:16]
+        rfile = os.path.join(self.output_configs, f"registry_{digest}.{rtype}")
+        if rfile not in self.shared_registry_configs:
+            self.shared_registry_configs[rfile] = (f"registry_config/{digest}.{rtype}", rtype,
+                                                   content)
+        return rfile
+
+    def write_shared_registry_configs(self):
+        shared_dict = {self.driver_vip: []}
+        for rfile, (config_name, rtype, content) in sorted(self.shared_registry_configs.items()):
+            # rfile is the key devices share the config by. config store entry refers to the
+            # name the file is stored under, which is a member name if output is bundled
+            name = self.output_writer.write_bytes(content, rfile)
+            shared_dict[self.driver_vip].append({"config-name": config_name,
+                                                 "config": name,
+                                                 "config-type": rtype})
+        self.output_writer.write_json(shared_dict,
+                                      f"{self.output_configs}/shared_registry_configs.json")
+        print(f"Devices share {len(self.shared_registry_configs)} distinct registry configs")
+
+    def iter_room_light_configs(self, room_lights):
+        """
+        Yields driver and registry config entries of the lights and occupancy detector of each
+        room in room_lights, one room at a time
+        """
+        if isinstance(room_lights, dict):
+            iterator = room_lights.items()
         else:
-            sys.exit(0)
+            iterator = room_lights
+        for room_id, lights in iterator:
+            try:
+                occ_detector = self.get_occupancy_detector(room_id)
+            except Exception as e:
+                self.unmapped_device_details[f"{room_id}_occupancy_detector"] = {
+                    "error": f"Unable to get occupancy detector for and room  {room_id}. "
+                             f"Exception{e}"}
+                continue
+            try:
+                room_name, result_dict = self.generate_room_light_configs(room_id,
+                                                                          lights,
+                                                                          occ_detector)
+            except Exception as e:
+                self.unmapped_device_details[f"{room_id}_lights"] = {
+                    "error": f"Unable to get lights details for room  {room_id}. "
+                             f"Exception: {e}"}
+                continue
+            if not result_dict or not result_dict.get(self.driver_vip):
+                continue  # no valid configs, move to the next room
+            yield from result_dict[self.driver_vip]
 
     def generate_meter_config(self):
         final_mapper = dict()
@@ -253,15 +483,15 @@ class BaseConfigGenerator:
         for light_id in lights:
             if driver_config.get("registry_config"):
                 # replace right variables in driver_config_template
-                light_points = self.generate_registry_config_data(light_id, "lighting",
-                                                                  room_id=room_id)
+                light_points = self.get_registry_config_data(light_id, "lighting",
+                                                             room_id=room_id)
                 all_points.extend(light_points)
         if occ_detector:
             if driver_config.get("registry_config"):
                 # replace right variables in driver_config_template
-                occ_detector_points = self.generate_registry_config_data(occ_detector,
-                                                                         "occupancy_detector",
-                                                                         room_id=room_id)
+                occ_detector_points = self.get_registry_config_data(occ_detector,
+                                                                    "occupancy_detector",
+                                                                    room_id=room_id)
                 all_points.extend(occ_detector_points)
         if all_points:
             final_mapper[self.driver_vip].append({"config-name": topic, "config": driver_config})
@@ -280,6 +510,11 @@ class BaseConfigGenerator:
             rfile, rtype = self.generate_registry_config_file(equip_id, equip_type, data)
             if not rfile:
                 return False
+            shared = self.shared_registry_configs.get(rfile)
+            if shared:
+                # config store entry is in shared_registry_configs.json
+                driver_config["registry_config"] = f"config://{shared[0]}"
+                return True
             driver_config["registry_config"] = f"config://registry_config/{equip_id}.{rtype}"
             final_mapper[self.driver_vip].append(
                 {"config-name": f"registry_config/{equip_id}.{rtype}",
@@ -287,6 +522,18 @@ class BaseConfigGenerator:
                  "config-type": rtype})
         return True
 
+    def render_config_template(self):
+        """
+        Returns a new driver config for a device from config_template. Only driver_config and
+        the parts of the template that get device specific values are copied, rest of the
+        template is shared with the returned config
+        """
+        # compile again if a subclass replaced the template
+        if self._compiled_template is None or \
+                self._compiled_template.template is not self.config_template:
+            self._compiled_template = CompiledTemplate(self.config_template, [("driver_config",)])
+        return self._compiled_template.render()
+
     @abstractmethod
     def generate_config_from_template(self, equip_id, equip_type):
         pass
@@ -303,6 +550,8 @@ class BaseConfigGenerator:
         where a registry config file is needed.
         method should return registry config name and config file and config file type
         config name returned will be included in driver config as config://<config_name>
+        config file should be the name returned by the output writer, so that it refers to the
+        bundle member if output is bundled
         """
         raise NotImplementedError
 
@@ -1,45 +1,100 @@
 """Utility  module to load the right config generator class for a given model name and agent name.
-It expects three arguments """
+It expects four arguments - semantic model, data store, agent and configuration file.
+
+Config generators can also be run from python using generate() and generate_batch(), which
+return GenerationResult instead of exiting
+"""
+import copy
+import datetime
 import sys
 import pkgutil
 import importlib
 
-from volttron_config_gen.edo.file.config_airsidercx import ConfigGenerator
+from volttron_config_gen.utils.generation_result import GenerationResult
 
+# Only the generator module of the requested model, data store and agent is imported, so that
+# dependencies of other data stores (pandas, psycopg2, neo4j) are not loaded
 AGENTS = ["driver", "economizer", "airsidercx", "ilc"]
-def main():
-    if len(sys.argv) != 5:
-        print("script requires four argument - "
-              "semantic model name, "
-              "model data store type"
-              "agent name for which configuration is to be generated(driver/economizer/airsidercx/ilc), "
-              "path to configuration file to be passed along to the corresponding config generator")
-        exit(1)
-    semantic_model = sys.argv[1].strip()
-    model_data_store = sys.argv[2].strip()
-    agent_name = sys.argv[3].strip()
-    config_path = sys.argv[4].strip()
 
+
+def get_generator_class(semantic_model, model_data_store, agent_name):
+    """
+    Returns ConfigGenerator class for the given semantic model, data store and agent.
+    Raises ValueError if there is no such config generator
+    """
     config_gen_package = importlib.import_module("volttron_config_gen")
     model_packages = [name for _, name, ispkg in pkgutil.iter_modules(config_gen_package.__path__) if ispkg]
     model_packages.remove("base")
     model_packages.remove("utils")
     if semantic_model not in model_packages:
-        print(f"Currently supported semantic models are {model_packages}")
-        exit(1)
+        raise ValueError(f"Currently supported semantic models are {model_packages}")
     model_package_name = "volttron_config_gen." + semantic_model
     model_package = importlib.import_module(model_package_name)
     model_data_stores =  [name for _, name, ispkg in pkgutil.iter_modules(model_package.__path__) if ispkg]
     if model_data_store not in model_data_stores:
-        print(f"Only the following datastore types are supported for {semantic_model}: {model_data_stores}")
-        exit(1)
+        raise ValueError(f"Only the following datastore types are supported for "
+                         f"{semantic_model}: {model_data_stores}")
     final_package_name = model_package_name + "." + model_data_store
     if agent_name not in AGENTS:
-        print(f"Config generators are currently available only for {AGENTS}")
-        exit(1)
+        raise ValueError(f"Config generators are currently available only for {AGENTS}")
 
     module = importlib.import_module(final_package_name + f".config_{agent_name}")
-    GeneratorClass = getattr(module, "ConfigGenerator")
+    return getattr(module, "ConfigGenerator")
+
+
+def generate(semantic_model, model_data_store, agent_name, config):
+    """
+    Generate configurations and return GenerationResult with the generated files, details of
+    devices for which configs could not be generated and timing.
+    config is the path to a configuration file or a configuration dict. A dict is copied
+    before it is passed to the config generator, so it can be reused
+    """
+    if isinstance(config, dict):
+        config = copy.deepcopy(config)
+    generator_class = get_generator_class(semantic_model, model_data_store, agent_name)
+    return generator_class(config).generate()
+
+
+def generate_batch(jobs):
+    """
+    Generate configurations for multiple sites or agents in this process.
+    jobs is a list of (semantic_model, model_data_store, agent_name, config) tuples.
+    Returns list of GenerationResult in order of jobs. If a job raises an exception, the
+    exception is set as the error of its result and the remaining jobs are run
+    """
+    results = []
+    for semantic_model, model_data_store, agent_name, config in jobs:
+        start_time = datetime.datetime.utcnow()
+        try:
+            result = generate(semantic_model, model_data_store, agent_name, config)
+        except Exception as e:
+            output_dir = config.get("output_dir") if isinstance(config, dict) else None
+            result = GenerationResult(agent_name, output_dir)
+            result.start_time = start_time
+            result.end_time = datetime.datetime.utcnow()
+            result.error = e
+        results.append(result)
+    return results
+
+
+def main():
+    if len(sys.argv) != 5:
+        print("script requires four argument - "
+              "semantic model name, "
+              "model data store type"
+              "agent name for which configuration is to be generated(driver/economizer/airsidercx/ilc), "
+              "path to configuration file to be passed along to the corresponding config generator")
+        exit(1)
+    semantic_model = sys.argv[1].strip()
+    model_data_store = sys.argv[2].strip()
+    agent_name = sys.argv[3].strip()
+    config_path = sys.argv[4].strip()
+
+    try:
+        GeneratorClass = get_generator_class(semantic_model, model_data_store, agent_name)
+    except ValueError as e:
+        print(e)
+        exit(1)
     instance = GeneratorClass(config_path)
     instance.generate_configs()
 
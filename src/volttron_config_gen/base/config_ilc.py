@@ -3,15 +3,34 @@ import json
 import os.path
 import sys
 from abc import abstractmethod
-import copy
-import shutil
 from typing import Tuple
 
 from volttron_config_gen.utils import strip_comments
+from volttron_config_gen.utils.config_template import ANY, CompiledTemplate
+from volttron_config_gen.utils.generation_result import ConfigGenerationError, GenerationResult
+from volttron_config_gen.utils.ilc.expression import (find_closing_parenthesis,
+                                                       parse_aggregate, parse_expression)
+from volttron_config_gen.utils.json_serializer import get_json_serializer
+from volttron_config_gen.utils.output_writer import get_output_writer
 from volttron_config_gen.utils.ilc.validate_pairwise import extract_criteria as pairwise_extract_criteria, \
     validate_input as pairwise_validate_input, calc_column_sums as pairwise_calc_column_sums
 
 
+# Parts of the control and criteria templates that are updated for each device.
+# update_control_config/update_criteria_config reassign values in these containers and
+# substitute_point_names updates args given as dict in place
+CONTROL_TEMPLATE_MUTABLE_PATHS = [
+    ("curtail_settings",),
+    ("curtail_settings", "load"),
+    ("curtail_settings", "load", "equation_args"),
+    ("device_status", "curtail"),
+    ("device_status", "curtail", "device_status_args"),
+    ("release_trigger", "curtail"),
+    ("release_trigger", "curtail", "device_status_args"),
+]
+CRITERIA_TEMPLATE_MUTABLE_PATHS = [(ANY,), (ANY, "operation_args")]
+
+
 class BaseConfigGenerator:
     """
     Base class that parses semantic tags to generate
@@ -27,7 +46,9 @@ class BaseConfigGenerator:
                     self.config_dict = json.loads(strip_comments(f.read()))
             except Exception:
                 raise
-        self.lighting_actuator_config = {}
+        # lighting actuator config is streamed while lighting control and criteria configs are
+        # generated
+        self.lighting_actuator_stream = None
         self.site_id = self.config_dict.get("site_id", "")
         self.building = self.config_dict.get("building", "")
         self.campus = self.config_dict.get("campus", "")
@@ -72,6 +93,8 @@ class BaseConfigGenerator:
         }
         self.ilc_template.update(self.config_template["ilc_config"])
 
+        self.json_serializer = get_json_serializer(self.config_dict)
+
         # initialize output dir
         default_prefix = self.building + "_" if self.building else ""
         self.output_dir = self.config_dict.get(
@@ -87,6 +110,10 @@ class BaseConfigGenerator:
         os.makedirs(self.output_configs, exist_ok=True)
         self.output_errors = os.path.join(self.output_dir, "errors")
         os.makedirs(self.output_errors, exist_ok=True)
+        # Optional. number of threads writing generated configs. 0 to write synchronously.
+        # Optional output_manifest. true to skip rewriting files that are unchanged
+        self.output_writer = get_output_writer(self.config_dict, self.json_serializer,
+                                               self.output_dir)
 
         self.ilc_agent_vip = self.config_dict.get("ilc_agent_vip", "platform.ilc")
 
@@ -98,37 +125,65 @@ class BaseConfigGenerator:
 
     def generate_configs(self):
         """
-        Generated all configuration files for ILC agent for a given site
+        Generate all configuration files for ILC agent for a given site and exit with 0 if
+        configs were generated for all devices, 1 otherwise
         """
-        st = datetime.datetime.utcnow()
-        print(f"Starting generation at {st}")
-        device_types = self.config_template["control_config"].keys()
+        try:
+            result = self.generate()
+        except ConfigGenerationError as e:
+            sys.stderr.write(f"\n{e}\n")
+            sys.exit(1)
+        if result.error_file:
+            sys.stderr.write(f"\nUnable to generate configurations for all devices. "
+                             f"Please see {result.error_file} for details\n")
+        sys.exit(result.exit_code)
 
-        self.generate_control_and_criteria_config(device_types)
+    def generate(self):
+        """
+        Generate all configuration files for ILC agent for a given site and return
+        GenerationResult. Call only once per instance
+        """
+        result = GenerationResult("ilc", os.path.abspath(self.output_dir))
+        st = result.start_time = datetime.datetime.utcnow()
+        print(f"Starting generation at {st}")
+        try:
+            device_types = self.config_template["control_config"].keys()
 
-        self.generate_pairwise_config(device_types)
+            try:
+                self.generate_control_and_criteria_config(device_types)
 
-        self.generate_ilc_config(device_types)
+                self.generate_pairwise_config(device_types)
 
-        if "lighting" in device_types:
-            self.generate_generate_lighting_actuator_config()
+                self.generate_ilc_config(device_types)
+            except BaseException:
+                if self.lighting_actuator_stream is not None:
+                    self.lighting_actuator_stream.discard()
+                raise
 
-        et = datetime.datetime.utcnow()
-        print(f"Done with config generation. end time is {et} time taken {et-st}")
-        if self.config_metadata_dict[self.ilc_agent_vip]:
-            config_metafile_name = f"{self.output_dir}/config_metadata.json"
-            with open(config_metafile_name, 'w') as f:
-                json.dump(self.config_metadata_dict, f, indent=4)
+            if "lighting" in device_types:
+                self.generate_generate_lighting_actuator_config()
+
+            et = result.end_time = datetime.datetime.utcnow()
+            print(f"Done with config generation. end time is {et} time taken {et-st}")
+            # config_metadata refers to the generated configs. wait for them to be written
+            self.output_writer.flush()
+            if self.config_metadata_dict[self.ilc_agent_vip]:
+                config_metafile_name = f"{self.output_dir}/config_metadata.json"
+                self.output_writer.write_json(self.config_metadata_dict, config_metafile_name)
+                result.config_metadata = self.config_metadata_dict
+            result.changes = self.output_writer.close()
+        finally:
+            # releases the writer's threads and deletes the incomplete bundle if generation
+            # failed. does nothing if the writer was closed
+            self.output_writer.discard()
+        result.files = self.output_writer.files
         if self.unmapped_device_details:
             err_file_name = f"{self.output_errors}/unmapped_device_details"
             with open(err_file_name, 'w') as outfile:
                 json.dump(self.unmapped_device_details, outfile, indent=4)
-
-            sys.stderr.write(f"\nUnable to generate configurations for all devices. "
-                             f"Please see {err_file_name} for details\n")
-            sys.exit(1)
-        else:
-            sys.exit(0)
+            result.error_file = err_file_name
+        result.unmapped_device_details = self.unmapped_device_details
+        return result
 
     def generate_pairwise_config(self, device_types):
 
@@ -140,7 +195,7 @@ class BaseConfigGenerator:
                     f"Given device type is {device_type}. But unable to find corresponding "
                     f"pairwise criteria file {pairwise_path}")
 
-            # Validate pairwise criteria if needed. exit if validation fails
+            # Validate pairwise criteria if needed. raise ConfigGenerationError if validation fails
             if self.config_template.get("validate_pairwise_criteria"):
                 try:
                     with open(pairwise_path, "r") as f:
@@ -155,17 +210,17 @@ class BaseConfigGenerator:
 
                 result, ratio = pairwise_validate_input(criteria_array, col_sums)
                 if not result:
-                    sys.stderr.write(f"\nValidation of pairwise criteria file "
-                                     f"{pairwise_path} failed.\n"
-                                     f"Computed criteria array:{criteria_array} "
-                                     f"column sums:{col_sums}\n"
-                                     f"Inconsistency ratio is: {ratio}\n")
-                    sys.exit(1)
+                    raise ConfigGenerationError(f"Validation of pairwise criteria file "
+                                                f"{pairwise_path} failed.\n"
+                                                f"Computed criteria array:{criteria_array} "
+                                                f"column sums:{col_sums}\n"
+                                                f"Inconsistency ratio is: {ratio}")
 
             # write pairwise criteria file
             file_name = f"{device_type}_criteria_matrix.json"
             file_path = os.path.abspath(os.path.join(self.output_configs, file_name))
-            shutil.copy(pairwise_path, file_path)
+            with open(pairwise_path, "rb") as f:
+                file_path = self.output_writer.write_bytes(f.read(), file_path)
             self.config_metadata_dict[self.ilc_agent_vip].append({"config-name": file_name,
                                                                   "config": file_path})
 
@@ -233,8 +288,7 @@ class BaseConfigGenerator:
         self.ilc_template["power_meter"]["device_topic"] = self.topic_prefix + self.power_meter_name
         self.ilc_template["power_meter"]["point"] = self.building_power_point
         file_path = os.path.abspath(os.path.join(self.output_configs, "ilc.config"))
-        with open(file_path, 'w') as outfile:
-            json.dump(self.ilc_template, outfile, indent=4)
+        file_path = self.output_writer.write_json(self.ilc_template, file_path)
 
         self.config_metadata_dict[self.ilc_agent_vip].append({"config-name": "config",
                                                               "config": file_path})
@@ -253,124 +307,179 @@ class BaseConfigGenerator:
                 raise ValueError(f"No criteria config template provided for device type {device_type}")
             criteria_template = {"device_topic": ""}
             criteria_template.update(_criteria_template)
+            # analyze templates once per device type instead of deepcopy per device
+            control_template = CompiledTemplate(control_template, CONTROL_TEMPLATE_MUTABLE_PATHS)
+            criteria_template = CompiledTemplate(criteria_template,
+                                                 CRITERIA_TEMPLATE_MUTABLE_PATHS)
             mappers = self.config_template.get('mapper_config', {})
             volttron_point_types = [x for x in self.point_meta_map[device_type]]
             volttron_point_types.sort(key=len)
-            control_config = dict()
-            criteria_config = dict()
             if device_type == "vav":
-                vav_details = self.get_vav_ahu_map()
-                if isinstance(vav_details, dict):
-                    iterator = vav_details.items()
-                else:
-                    iterator = vav_details
-
-                for vav_id, ahu_id in iterator:
-                    config = copy.deepcopy(control_template)
-                    curtail_config = {"device_topic": ""}
-                    curtail_config.update(copy.deepcopy(criteria_template))
-                    vav = self.get_name_from_id(vav_id)
-                    if ahu_id:
-                        vav_topic = self.get_name_from_id(ahu_id) + "/" + vav
-                    else:
-                        vav_topic = vav
-                    config["device_topic"] = self.topic_prefix + vav_topic
-                    curtail_config["device_topic"] = self.topic_prefix + vav_topic
-                    point_mapping, missing_vav_points = self.get_point_mapping(device_type, vav_id,
-                                                                               volttron_point_types)
-
-                    if missing_vav_points:
-                        # some points are missing, details in umapped_device_details skip vav and move to next
-                        self.unmapped_device_details[vav_id] = {"type": device_type,
-                            "error": f"Unable to find point(s) using using metadata field "
-                                     f"{self.point_meta_field}. Missing "
-                                     f"points and their configured mapping: {missing_vav_points}"}
-                        continue
-
-                    # If all necessary points are found go ahead and add it to control config
-                    control_config[vav_topic] = {vav: self.update_control_config(config,
-                                                                                 point_mapping)}
-                    criteria_config[vav_topic] = {vav: self.update_criteria_config(curtail_config,
-                                                                                   point_mapping)
-                                                  }
+                device_configs = self.iter_vav_configs(control_template, criteria_template,
+                                                       volttron_point_types)
             elif device_type == "lighting":
-                room_lights = self.get_lights_by_room()
-                if isinstance(room_lights, dict):
-                    iterator = room_lights.items()
-                else:
-                    iterator = room_lights
-
-                for room_id, lights in iterator:
-                    config = copy.deepcopy(control_template)
-                    curtail_config = {"device_topic": ""}
-                    curtail_config.update(copy.deepcopy(criteria_template))
-                    room_name = self.get_name_from_id(room_id)
-                    room_light_topic = room_name + "_lights"
-                    config["device_topic"] = self.topic_prefix + room_light_topic
-                    curtail_config["device_topic"] = self.topic_prefix + room_light_topic
-                    # TODO: is it enough if I get point mapping based on just 1 light
-                    #  if point is ActivePowerSensor then would ilc automatically apply
-                    #  same rule for all points that ends with _ActivePowerSensor in that room?
-                    point_mapping, missing_points = self.get_point_mapping(device_type, lights[0],
-                                                                           volttron_point_types,
-                                                                           room_id=room_id)
-                    # add occupancy detector points if available
-                    occ_points = [x for x in self.point_meta_map.get("occupancy_detector", [])]
-                    occ_detector = None
-                    occ_mapping = None
-                    if occ_points:
-                        # if we care about occupancy detector points i.e. if it is in ilc config
-                        # template
-                        # find the occupancy detector and its points
-                        occ_detector = self.get_occ_detector(room_id)
-                        occ_mapping, occ_missing_points = self.get_point_mapping("occupancy_detector",
-                                                                                 occ_detector,
-                                                                                 occ_points,
-                                                                                 room_id=room_id)
-                        #volttron_point_types.extend(occ_points)
-                        point_mapping.update(occ_mapping)
-                        missing_points.extend(occ_missing_points)
-
-                    if missing_points:
-                        # some points are missing, details in umapped_device_details skip vav and move to next
-                        self.unmapped_device_details[room_light_topic] = {"type": "lighting",
-                            "error": f"Unable to find point(s) using using metadata field "
-                                     f"{self.point_meta_field}. Missing "
-                                     f"points and their configured mapping: {missing_points}"}
-                        continue
-
-                    # If all necessary points are found go ahead and add it to configs
-                    self.lighting_actuator_config[self.topic_prefix + room_light_topic] = (
-                        self.get_lighting_points(room_id,
-                                                 lights,
-                                                 point_mapping['DimmingLevelOutput']))
-                    control_config[room_light_topic] = {
-                        room_light_topic: self.update_control_config(config, point_mapping,
-                                                                     room_id, lights,
-                                                                     occ_detector, occ_mapping)}
-
-                    criteria_config[room_light_topic] = {
-                        room_light_topic: self.update_criteria_config(curtail_config,
-                                                                      point_mapping,
-                                                                      room_id, lights)}
-
-
-            if criteria_config:
-                criteria_config['mappers'] = mappers
-                file_name = f"{device_type}_criteria.config"
-                file_path = os.path.abspath(os.path.join(self.output_configs, file_name))
-                with open(file_path, 'w') as outfile:
-                    json.dump(criteria_config, outfile, indent=4)
-                self.config_metadata_dict[self.ilc_agent_vip].append({"config-name": file_name,
-                                                                      "config": file_path})
-
-            if control_config:
-                file_name = f"{device_type}_control.config"
-                file_path = os.path.abspath(os.path.join(self.output_configs, file_name))
-                with open(file_path, 'w') as outfile2:
-                    json.dump(control_config, outfile2, indent=4)
+                self.lighting_actuator_stream = self.output_writer.open_json_object(
+                    os.path.abspath(os.path.join(self.output_configs, "lighting_actuator.config")))
+                device_configs = self.iter_room_light_configs(control_template, criteria_template,
+                                                              volttron_point_types)
+            else:
+                device_configs = []
+
+            # control and criteria config of each device is written as it is generated
+            criteria_file_name = f"{device_type}_criteria.config"
+            control_file_name = f"{device_type}_control.config"
+            criteria_stream = self.output_writer.open_json_object(
+                os.path.abspath(os.path.join(self.output_configs, criteria_file_name)))
+            control_stream = self.output_writer.open_json_object(
+                os.path.abspath(os.path.join(self.output_configs, control_file_name)))
+            with criteria_stream, control_stream:
+                for topic, control_config, criteria_config in device_configs:
+                    control_stream.add(topic, control_config)
+                    criteria_stream.add(topic, criteria_config)
+
+            if criteria_stream.count:
+                criteria_stream.add('mappers', mappers)
+                file_path = criteria_stream.close()
+                self.config_metadata_dict[self.ilc_agent_vip].append(
+                    {"config-name": criteria_file_name, "config": file_path})
+            else:
+                criteria_stream.discard()
+
+            if control_stream.count:
+                file_path = control_stream.close()
                 self.config_metadata_dict[self.ilc_agent_vip].append(
-                    {"config-name": file_name, "config": file_path})
+                    {"config-name": control_file_name, "config": file_path})
+            else:
+                control_stream.discard()
+
+    def iter_vav_configs(self, control_template, criteria_template, volttron_point_types):
+        """
+        Yields (topic, control config, criteria config) of each vav, one vav at a time
+        """
+        device_type = "vav"
+        vav_details = self.get_vav_ahu_map()
+        if isinstance(vav_details, dict):
+            iterator = vav_details.items()
+        else:
+            iterator = vav_details
+
+        # topic -> id of the vav whose configs were generated for it
+        seen = dict()
+        for vav_id, ahu_id in iterator:
+            config = control_template.render()
+            curtail_config = criteria_template.render()
+            vav = self.get_name_from_id(vav_id)
+            if ahu_id:
+                vav_topic = self.get_name_from_id(ahu_id) + "/" + vav
+            else:
+                vav_topic = vav
+            if seen.get(vav_topic) == vav_id:
+                # same vav and ahu listed again
+                continue
+            if vav_topic in seen or vav_topic == "mappers":
+                # configs are written as they are generated and can't be replaced. mappers is
+                # the key of mapper_config in the criteria config
+                self.unmapped_device_details[vav_id] = {"type": device_type,
+                    "error": self.duplicate_topic_error(vav_topic, seen.get(vav_topic))}
+                continue
+            config["device_topic"] = self.topic_prefix + vav_topic
+            curtail_config["device_topic"] = self.topic_prefix + vav_topic
+            point_mapping, missing_vav_points = self.get_point_mapping(device_type, vav_id,
+                                                                       volttron_point_types)
+
+            if missing_vav_points:
+                # some points are missing, details in umapped_device_details skip vav and move to next
+                self.unmapped_device_details[vav_id] = {"type": device_type,
+                    "error": f"Unable to find point(s) using using metadata field "
+                             f"{self.point_meta_field}. Missing "
+                             f"points and their configured mapping: {missing_vav_points}"}
+                continue
+
+            # If all necessary points are found go ahead and add it to control config
+            seen[vav_topic] = vav_id
+            yield (vav_topic,
+                   {vav: self.update_control_config(config, point_mapping)},
+                   {vav: self.update_criteria_config(curtail_config, point_mapping)})
+
+    def iter_room_light_configs(self, control_template, criteria_template, volttron_point_types):
+        """
+        Yields (topic, control config, criteria config) of the lights of each room, one room at
+        a time. Lighting actuator config of the room is written to lighting_actuator_stream
+        """
+        device_type = "lighting"
+        room_lights = self.get_lights_by_room()
+        if isinstance(room_lights, dict):
+            iterator = room_lights.items()
+        else:
+            iterator = room_lights
+
+        # topic -> id of the room whose configs were generated for it
+        seen = dict()
+        for room_id, lights in iterator:
+            config = control_template.render()
+            curtail_config = criteria_template.render()
+            room_name = self.get_name_from_id(room_id)
+            room_light_topic = room_name + "_lights"
+            config["device_topic"] = self.topic_prefix + room_light_topic
+            curtail_config["device_topic"] = self.topic_prefix + room_light_topic
+            # TODO: is it enough if I get point mapping based on just 1 light
+            #  if point is ActivePowerSensor then would ilc automatically apply
+            #  same rule for all points that ends with _ActivePowerSensor in that room?
+            point_mapping, missing_points = self.get_point_mapping(device_type, lights[0],
+                                                                   volttron_point_types,
+                                                                   room_id=room_id)
+            # add occupancy detector points if available
+            occ_points = [x for x in self.point_meta_map.get("occupancy_detector", [])]
+            occ_detector = None
+            occ_mapping = None
+            if occ_points:
+                # if we care about occupancy detector points i.e. if it is in ilc config
+                # template
+                # find the occupancy detector and its points
+                occ_detector = self.get_occ_detector(room_id)
+                occ_mapping, occ_missing_points = self.get_point_mapping("occupancy_detector",
+                                                                         occ_detector,
+                                                                         occ_points,
+                                                                         room_id=room_id)
+                #volttron_point_types.extend(occ_points)
+                point_mapping.update(occ_mapping)
+                missing_points.extend(occ_missing_points)
+
+            if missing_points:
+                # some points are missing, details in umapped_device_details skip vav and move to next
+                self.unmapped_device_details[room_light_topic] = {"type": "lighting",
+                    "error": f"Unable to find point(s) using using metadata field "
+                             f"{self.point_meta_field}. Missing "
+                             f"points and their configured mapping: {missing_points}"}
+                continue
+
+            if room_light_topic in seen:
+                # rooms with the same name. configs are written as they are generated and can't
+                # be replaced
+                self.unmapped_device_details[room_id] = {"type": "lighting",
+                    "error": self.duplicate_topic_error(room_light_topic,
+                                                        seen[room_light_topic])}
+                continue
+
+            # If all necessary points are found go ahead and add it to configs
+            seen[room_light_topic] = room_id
+            self.lighting_actuator_stream.add(
+                self.topic_prefix + room_light_topic,
+                self.get_lighting_points(room_id, lights, point_mapping['DimmingLevelOutput']))
+            yield (room_light_topic,
+                   {room_light_topic: self.update_control_config(config, point_mapping,
+                                                                 room_id, lights,
+                                                                 occ_detector, occ_mapping)},
+                   {room_light_topic: self.update_criteria_config(curtail_config,
+                                                                  point_mapping,
+                                                                  room_id, lights)})
+
+    @staticmethod
+    def duplicate_topic_error(topic, device_id):
+        if device_id is None:
+            return f"Device topic {topic} is reserved for the criteria config mappers"
+        return (f"Device topic {topic} is the same as the topic of {device_id}. Only the "
+                f"configs of {device_id} are generated for it")
 
     def get_point_mapping(self, device_type, device_id, volttron_point_types, **kwargs) -> Tuple[
         dict,list]:
@@ -452,7 +561,6 @@ class BaseConfigGenerator:
                                devices=None):
         expand_point_names = False
         volttron_point_list =[]
-        point_list = []
         if devices:
             # must be light or occ detector
             expand_point_names = True
@@ -480,7 +588,6 @@ class BaseConfigGenerator:
             for v_point in vpoint_list:
                 v_point = v_point.strip()
                 volttron_point_list.append(v_point)
-                point_list.append(point_mapping[v_point])
                 if expand_point_names:
                     args_dict[k].extend(self.get_lighting_points(room_id, devices,
                                                                  point_mapping[v_point]))
@@ -490,60 +597,28 @@ class BaseConfigGenerator:
         # Step2 - replace points in conditions, expand points for lighting if it is an aggregate
         # operation - currently supported - SUM(condition) or AVG(condition)
 
-        # sort the list of point before doing find and replace of volttron point name with actual point names
-        # so that we avoid matching substrings. For example find and replace ZoneAirFlowSetpoint before ZoneAirFlow
-        volttron_point_list.sort(key=len)
+        # conditions are tokenized once per template string, so only whole point names are
+        # replaced. For example ZoneAirFlow is not replaced within ZoneAirFlowSetpoint
+        mapping = {point: point_mapping[point] for point in volttron_point_list}
         updated_conditions = []
         if isinstance(v_conditions, str):
             v_conditions = [v_conditions]
 
         for condition in v_conditions:
-            for point in volttron_point_list:
-                point = point.strip()
-                try:
-                    condition = condition.replace(point, point_mapping[point])
-                except Exception as e:
-                    raise Exception(f"Exception replacing point names in curtail conditions {e}")
-            updated_conditions.append(condition)
-
-        if expand_point_names:
-            # args and conditions should be expanded to multiple points  # args will always be a list
-            expanded_conditions = []
-            for c in updated_conditions:
-                if c.startswith('AVG(') or c.startswith('SUM('):
-                    c_list = []
-                    index_open = 3  # index of open paranthesis
-                    index_close = BaseConfigGenerator.find_closing_parenthesis(c, index_open)
-                    for light in devices:
-                        # will start with SUM or AVG - only supported methods
-
-                        c1 = c[4:index_close].strip()
-                        if c1.find(' ') > 0:
-                            # may be not a single point name but an expression. enclose in ()
-                            c1 = f"({c1})"
-                        for p in point_list:
-                            c1 = c1.replace(p, self.get_volttron_point_name(light, point_name=p,
-                                                                            equip_type="lighting"))
-                        c_list.append(c1)  # condition specific to 1 light
-                    if c.startswith("SUM"):
-                        expanded_sum = "(" + " + ".join(c_list) + ")"
-                        expanded_condition = c.replace(c[0: index_close+1], expanded_sum)
-                        expanded_conditions.append(expanded_condition)
-                    else:
-                        expanded_avg = "((" + " + ".join(c_list)+ f")/{len(devices)})"
-                        expanded_condition = c.replace(c[0: index_close+1], expanded_avg)
-                        expanded_conditions.append(expanded_condition)
-                else:
-                    # if there is no LIST OR SUM then we are not expanding multiple device point
-                    # into 1 so devices should contain just 1 device
-                    # for now equip type lighting and occ detector behave the same for point name
-                    # parsing
-                    for p in point_list:
-                        expanded_conditions.append(
-                            c.replace(p, self.get_volttron_point_name(devices[0],
-                                                                      point_name=p,
-                                                                      equip_type="lighting")))
-            updated_conditions = expanded_conditions
+            if not expand_point_names:
+                updated_conditions.append(parse_expression(condition).substitute(mapping))
+            elif parse_aggregate(condition):
+                # args and conditions should be expanded to multiple points
+                # will start with SUM or AVG - only supported methods
+                device_mappings = [self.get_device_point_mapping(light, mapping)
+                                   for light in devices]
+                updated_conditions.append(parse_aggregate(condition).expand(mapping,
+                                                                            device_mappings))
+            else:
+                # if there is no LIST OR SUM then we are not expanding multiple device point
+                # into 1 so devices should contain just 1 device
+                updated_conditions.append(parse_expression(condition).substitute(
+                    self.get_device_point_mapping(devices[0], mapping)))
 
         if isinstance(v_args, dict):
             return args_dict, updated_conditions
@@ -552,16 +627,26 @@ class BaseConfigGenerator:
 
 
 
+    def get_device_point_mapping(self, device, mapping):
+        """
+        Returns mapping of volttron point names to the point names of one light or occupancy
+        detector, given mapping of volttron point names to the points of the room
+        """
+        # for now equip type lighting and occ detector behave the same for point name parsing
+        return {v_point: self.get_volttron_point_name(device, point_name=point,
+                                                      equip_type="lighting")
+                for v_point, point in mapping.items()}
+
     def generate_generate_lighting_actuator_config(self):
 
-        if self.lighting_actuator_config:
+        if self.lighting_actuator_stream is not None and self.lighting_actuator_stream.count:
             file_name = "lighting_actuator.config"
-            file_path = os.path.abspath(os.path.join(self.output_configs, file_name))
-            with open(file_path, 'w') as outfile:
-                json.dump(self.lighting_actuator_config, outfile, indent=4)
+            file_path = self.lighting_actuator_stream.close()
             self.config_metadata_dict[self.ilc_agent_vip].append(
                 {"config-name": file_name, "config": file_path})
         else:
+            if self.lighting_actuator_stream is not None:
+                self.lighting_actuator_stream.discard()
             self.unmapped_device_details["lighting_actuator"] = {
                 "type": "lighting",
                 "error": f"No lighting actuator config was generated."
@@ -570,27 +655,7 @@ class BaseConfigGenerator:
 
     @staticmethod
     def find_closing_parenthesis(s, open_pos):
-        # Ensure the given position is an opening parenthesis
-        if s[open_pos] != '(':
-            raise ValueError(
-                "The character at the given position is not an opening parenthesis.")
-
-        # Initialize a counter for open parentheses
-        open_count = 1
-
-        # Iterate through the string starting from the next character
-        for i in range(open_pos + 1, len(s)):
-            if s[i] == '(':
-                open_count += 1
-            elif s[i] == ')':
-                open_count -= 1
-
-            # When open_count reaches zero, we found the matching closing parenthesis
-            if open_count == 0:
-                return i
-
-        # If no matching closing parenthesis is found
-        raise ValueError("No matching closing parenthesis found.")
+        return find_closing_parenthesis(s, open_pos)
 
     @abstractmethod
     def get_building_power_meter(self):
@@ -1,4 +1,3 @@
-import math
 import sys
 
 from volttron_config_gen.utils.edo_utils import *
@@ -14,48 +13,42 @@ class ConfigGenerator(BaseConfigGenerator):
     def __init__(self, config):
         super().__init__(config)
         metadata = self.config_dict.get("metadata")
-        self.df = create_edo_dataframe(metadata.get("points_csv"))
+        # only read rows of the equipment types used by the generator if metadata has filter options
+        row_filter = get_row_filter(metadata)
+        self.df = create_edo_dataframe(metadata.get("points_csv"),
+                                       metadata.get("points_cache", True), row_filter)
         self.ahus = None
         self.vavs = None
         self.ahu_points = None
+        # (EquipmentID, point class) -> first point. see edo_utils.first_point_names
+        self.ahu_point_names = dict()
         self.vav_points = None
+        self.vav_point_names = dict()
         self.equip_id_name_map = dict()
 
     def get_ahu_and_vavs(self):
         # Get devices we are interested in
         self.ahus, self.ahu_points = get_ahus_and_points(self.df)
+        self.ahu_point_names = first_point_names(self.ahu_points, self.point_meta_field)
         self.vavs, self.vav_points = get_vavs_and_points(self.df)
+        self.vav_point_names = first_point_names(self.vav_points, self.point_meta_field)
 
-        ahu_vav_mapping = dict()
-        for index, ahu in self.ahus.iterrows():
-            ahu_vav_mapping[ahu['EquipmentID']] = []
-            self.equip_id_name_map[ahu['EquipmentID']] = ahu['EquipName']
-
-        for index, vav in self.vavs.iterrows():
-            self.equip_id_name_map[vav['EquipmentID']] = vav['EquipName']
-            parent_ahu_id = vav.get('ParentEquipID', "")
-            # vav without ahuref are not applicable for AirsideRCx
-            if not math.isnan(parent_ahu_id):
-                # if parent id is not empty and corresponds to a valid equipment
-                # add vav to the parent equip dict, else assign it to empty key
-                ahu_vav_mapping[parent_ahu_id].append(vav['EquipmentID'])
+        self.equip_id_name_map.update(get_equip_id_name_map(self.ahus))
+        self.equip_id_name_map.update(get_equip_id_name_map(self.vavs))
+        ahu_vav_mapping = get_ahu_vav_mapping(self.ahus, self.vavs)
+        # vav without ahuref are not applicable for AirsideRCx
+        ahu_vav_mapping.pop("")
         return ahu_vav_mapping
 
     def get_point_name(self, equip_id, equip_type, point_key):
         if equip_type == "ahu":
-            df = self.ahu_points
+            point_names = self.ahu_point_names
         elif equip_type == "vav":
-            df = self.vav_points
+            point_names = self.vav_point_names
         else:
             raise ValueError(f"Unknown equip type {equip_type}")
 
-        pd_series = df.query(
-            f'EquipmentID== {equip_id} and {self.point_meta_field} == {self.point_meta_map[point_key]}').PointName
-
-        if not pd_series.empty:
-            return pd_series.iat[0]
-        else:
-            return ""
+        return lookup_point_name(point_names, equip_id, self.point_meta_map[point_key])
 
     def get_name_from_id(self, equip_id):
         return f"{equip_id}_{self.equip_id_name_map[equip_id]}"
@@ -1,5 +1,3 @@
-import copy
-import math
 import sys
 from volttron_config_gen.utils.edo_utils import *
 from volttron_config_gen.base.config_driver import BaseConfigGenerator
@@ -40,38 +38,38 @@ class ConfigGenerator(BaseConfigGenerator):
     def __init__(self, config):
         super().__init__(config)
         metadata = self.config_dict.get("metadata")
-        self.df = create_edo_dataframe(metadata.get("points_csv"))
+        # only read rows of the equipment types used by the generator if metadata has filter options
+        row_filter = get_row_filter(metadata, equip_ids=[self.configured_power_meter_id])
+        self.df = create_edo_dataframe(metadata.get("points_csv"),
+                                       metadata.get("points_cache", True), row_filter)
+        # (EquipClassID, PointClassID) -> row positions. used to find building power meter
+        self.class_index = get_class_index(self.df)
         self.ahus = None
         self.vavs = None
         self.power_meter = None
+        # equip type -> EquipmentID -> device id. see edo_utils.get_device_ids
+        self.equip_device_ids = dict()
         self._map = dict()
 
     def get_ahu_and_vavs(self):
         # Get devices we are interested in
         self.ahus, _ = get_ahus_and_points(self.df)
         self.vavs, _ = get_vavs_and_points(self.df)
+        self.equip_device_ids["ahu"] = get_device_ids(self.ahus)
+        self.equip_device_ids["vav"] = get_device_ids(self.vavs)
 
-        ahu_vav_mapping = dict()
-        for index, ahu in self.ahus.iterrows():
-            ahu_vav_mapping[ahu['EquipmentID']] = []
-            self._map[ahu['EquipmentID']] = ahu['EquipName']
-        ahu_vav_mapping[""] = []
-
-        for index, vav in self.vavs.iterrows():
-            self._map[vav['EquipmentID']] = vav['EquipName']
-            parent_ahu_id = vav.get('ParentEquipID', "")
-            if math.isnan(parent_ahu_id):
-                parent_ahu_id = ""
-            # if parent id is not empty and corresponds to a valid equipment
-            # add vav to the parent equip dict, else assign it to empty key
-            ahu_vav_mapping[parent_ahu_id].append(vav['EquipmentID'])
+        self._map.update(get_equip_id_name_map(self.ahus))
+        self._map.update(get_equip_id_name_map(self.vavs))
+        # vavs without a valid parent ahu are assigned to empty key
+        ahu_vav_mapping = get_ahu_vav_mapping(self.ahus, self.vavs)
 
         return ahu_vav_mapping
 
     def get_building_meter(self):
         # to do query and return building meter id/name
         if self.configured_power_meter_id:
-            elec_meter_point = self.df.query(f'EquipmentID == {self.configured_power_meter_id}')
+            elec_meter_point = self.df[
+                self.df['EquipmentID'].isin([int(self.configured_power_meter_id)])]
             if len(elec_meter_point.index) > 1:
                 # ideally shouldn't reach here. don't expect more than 1 entry per configured power meter equipment id
                 raise ValueError("More than one equipment found with configured power meter id"
@@ -80,8 +78,8 @@ class ConfigGenerator(BaseConfigGenerator):
                                  "value as the equipment id of whole building power meter")
 
         else:
-            elec_meter_point = self.df.query(
-                 f'EquipClassID == {ELEC_METER_ID} and PointClassID == {ELEC_MTR_POWER_POINT_ID}')
+            elec_meter_point = self.df.iloc[
+                self.class_index.get((ELEC_METER_ID, ELEC_MTR_POWER_POINT_ID), [])]
 
             if len(elec_meter_point.index) > 1:
                 raise ValueError(f"More than one equipment found with the Equip Class ID {ELEC_METER_ID} "
@@ -100,31 +98,19 @@ class ConfigGenerator(BaseConfigGenerator):
                                  "value as the equipment id of whole building power meter")
 
         self.power_meter = elec_meter_point
+        self.equip_device_ids["meter"] = get_device_ids(elec_meter_point)
         s = elec_meter_point.iloc[0]
         self._map[s['EquipmentID']] = s['EquipName']
         return s['EquipmentID']
 
     def generate_config_from_template(self, equip_id, equip_type):
-        if equip_type == "ahu":
-            df = self.ahus
-        elif equip_type == "vav":
-            df = self.vavs
-        elif equip_type == "meter":
-            df = self.power_meter
-        else:
+        if equip_type not in ["ahu", "vav", "meter"]:
             raise ValueError(f"Unknown equip type {equip_type}")
 
-        pd_series = df.query(f'EquipmentID== {equip_id}').PointName
-        device_id = None
-        p = None
-        for p in pd_series:
-            tokens = p.split(':')
-            if len(tokens) == 3:
-                device_id = tokens[0]
-                break
+        device_id = self.equip_device_ids[equip_type].get(equip_id)
         # Using only device id in template
         device_name = None
-        driver = copy.deepcopy(self.config_template)
+        driver = self.render_config_template()
         structured_query = driver["driver_config"]["structured_query"]
         if not process_structured_query(structured_query, device_id):
             if not self.unmapped_device_details.get(equip_id):
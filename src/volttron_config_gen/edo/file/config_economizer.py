@@ -11,32 +11,29 @@ class ConfigGenerator(BaseConfigGenerator):
     def __init__(self, config):
         super().__init__(config)
         metadata = self.config_dict.get("metadata")
-        self.df = create_edo_dataframe(metadata.get("points_csv"))
+        # only read rows of the equipment types used by the generator if metadata has filter options
+        row_filter = get_row_filter(metadata)
+        self.df = create_edo_dataframe(metadata.get("points_csv"),
+                                       metadata.get("points_cache", True), row_filter)
         self.ahus = None
         self.ahu_points = None
+        # (EquipmentID, point class) -> first point. see edo_utils.first_point_names
+        self.ahu_point_names = dict()
         self.equip_id_name_map = dict()
 
     def get_ahus(self):
         self.ahus, self.ahu_points = get_ahus_and_points(self.df)
-        ahu_ids = []
-        for index, ahu in self.ahus.iterrows():
-            self.equip_id_name_map[ahu['EquipmentID']] = ahu['EquipName']
-            ahu_ids.append(ahu['EquipmentID'])
-        return ahu_ids
+        self.ahu_point_names = first_point_names(self.ahu_points, self.point_meta_field)
+        self.equip_id_name_map.update(get_equip_id_name_map(self.ahus))
+        return self.ahus['EquipmentID'].tolist()
 
     def get_point_name(self, equip_id, equip_type, point_key):
         if equip_type == "ahu":
-            df = self.ahu_points
+            point_names = self.ahu_point_names
         else:
             raise ValueError(f"Unknown equip type {equip_type}")
 
-        pd_series = df.query(
-            f'EquipmentID== {equip_id} and {self.point_meta_field} == {self.point_meta_map[point_key]}').PointName
-
-        if not pd_series.empty:
-            return pd_series.iat[0]
-        else:
-            return ""
+        return lookup_point_name(point_names, equip_id, self.point_meta_map[point_key])
 
     def get_name_from_id(self, equip_id):
         return f"{equip_id}_{self.equip_id_name_map[equip_id]}"
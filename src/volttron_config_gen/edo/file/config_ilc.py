@@ -1,4 +1,3 @@
-import math
 import sys
 
 from volttron_config_gen.base.config_ilc import BaseConfigGenerator
@@ -14,19 +13,27 @@ class ConfigGenerator(BaseConfigGenerator):
     def __init__(self, config):
         super().__init__(config)
         metadata = self.config_dict.get("metadata")
-        self.df = create_edo_dataframe(metadata.get("points_csv"))
+        # only read rows of the equipment types used by the generator if metadata has filter options
+        row_filter = get_row_filter(metadata, equip_class_ids=[self.configured_power_meter_id])
+        self.df = create_edo_dataframe(metadata.get("points_csv"),
+                                       metadata.get("points_cache", True), row_filter)
+        # (EquipClassID, PointClassID) -> row positions. used to find building power meter
+        self.class_index = get_class_index(self.df)
         self.ahus = None
         self.vavs = None
         self.ahu_points = None
+        # (EquipmentID, point class) -> first point. see edo_utils.first_point_names
+        self.ahu_point_names = dict()
         self.vav_points = None
+        self.vav_point_names = dict()
         self.power_meter_point_row = None
         self.equip_id_name_map = dict()
         self.vavs_and_ahuref = list()
 
     def get_building_power_meter(self):
 
-        row = get_power_meter_point(self.df, self.configured_power_meter_id)
-        if not row.empty:
+        row = get_power_meter_point(self.df, self.configured_power_meter_id, self.class_index)
+        if row is not None:
             self.power_meter_point_row = row
             self.equip_id_name_map[row["EquipmentID"]] = row["EquipName"]
             return row["EquipmentID"]
@@ -59,39 +66,25 @@ class ConfigGenerator(BaseConfigGenerator):
 
     def get_vav_ahu_map(self):
         self.ahus, self.ahu_points = get_ahus_and_points(self.df)
+        self.ahu_point_names = first_point_names(self.ahu_points, self.point_meta_field)
         self.vavs, self.vav_points = get_vavs_and_points(self.df)
+        self.vav_point_names = first_point_names(self.vav_points, self.point_meta_field)
 
-        vav_ahu_mapping = dict()
-        for index, ahu in self.ahus.iterrows():
-            self.equip_id_name_map[ahu['EquipmentID']] = ahu['EquipName']
-
-        for index, vav in self.vavs.iterrows():
-            self.equip_id_name_map[vav['EquipmentID']] = vav['EquipName']
-            parent_ahu_id = vav.get('ParentEquipID', "")
-            # vav without ahuref are not applicable for AirsideRCx
-            if not math.isnan(parent_ahu_id):
-                # if parent id is not empty and corresponds to a valid equipment
-                # add vav to the parent equip dict, else assign it to empty key
-                vav_ahu_mapping[vav['EquipmentID']] = parent_ahu_id
-            else:
-                vav_ahu_mapping[vav['EquipmentID']] = ""
-        return vav_ahu_mapping
+        self.equip_id_name_map.update(get_equip_id_name_map(self.ahus))
+        self.equip_id_name_map.update(get_equip_id_name_map(self.vavs))
+        # vavs without a valid parent ahu are mapped to empty string
+        parent_ids = get_vav_parent_ids(self.ahus, self.vavs).astype(object).fillna("")
+        return dict(zip(self.vavs['EquipmentID'].tolist(), parent_ids.tolist()))
 
     def get_point_name(self, equip_id, equip_type, point_key, **kwargs):
         if equip_type == "ahu":
-            df = self.ahu_points
+            point_names = self.ahu_point_names
         elif equip_type == "vav":
-            df = self.vav_points
+            point_names = self.vav_point_names
         else:
             raise ValueError(f"Unknown equip type {equip_type}")
 
-        pd_series = df.query(
-            f'EquipmentID== {equip_id} and {self.point_meta_field} == {self.point_meta_map[point_key]}').PointName
-
-        if not pd_series.empty:
-            return pd_series.iat[0]
-        else:
-            return ""
+        return lookup_point_name(point_names, equip_id, self.point_meta_map[equip_type][point_key])
 
     def get_name_from_id(self, equip_id):
         return f"{equip_id}_{self.equip_id_name_map[equip_id]}"
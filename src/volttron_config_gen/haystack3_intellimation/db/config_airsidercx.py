@@ -1,5 +1,4 @@
 import sys
-import psycopg2
 
 from volttron_config_gen.base.config_airsidercx import BaseConfigGenerator
 
@@ -21,6 +20,8 @@ class ConfigGenerator(BaseConfigGenerator):
             del connect_params["timescale_dialect"]
         else:
             self.timescale_dialect = False
+        # imported here so that psycopg2 is needed only for this data store
+        import psycopg2
         self.connection = psycopg2.connect(**connect_params)
         self.connection.autocommit = True
         self.equip_table = metadata.get("equip_table")
@@ -44,6 +45,19 @@ class ConfigGenerator(BaseConfigGenerator):
                            "sa_temp", "sat_stpt", "fan_speedcmd"]
         self.volttron_point_types_vav = ["zone_reheat", "zone_damper"]
 
+    def __getstate__(self):
+        # psycopg2 connection can't be pickled. Generator is pickled to run in worker
+        # processes, which open their own connection
+        state = super().__getstate__()
+        state.pop("connection", None)
+        return state
+
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        import psycopg2
+        self.connection = psycopg2.connect(**self.config_dict["metadata"]["connection_params"])
+        self.connection.autocommit = True
+
     def get_ahu_and_vavs(self):
         query = f"SELECT tags #>>'{{ahuRef}}', json_agg(topic_name) \
         FROM {self.equip_table} \
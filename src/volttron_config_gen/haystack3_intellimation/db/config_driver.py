@@ -1,8 +1,6 @@
-import copy
 import sys
 import re
 
-import psycopg2
 from volttron_config_gen.base.config_driver import BaseConfigGenerator
 
 
@@ -23,6 +21,8 @@ class ConfigGenerator(BaseConfigGenerator):
             del connect_params["timescale_dialect"]
         else:
             self.timescale_dialect = False
+        # imported here so that psycopg2 is needed only for this data store
+        import psycopg2
         self.connection = psycopg2.connect(**connect_params)
         self.connection.autocommit = True
         self.equip_table = metadata.get("equip_table")
@@ -30,6 +30,19 @@ class ConfigGenerator(BaseConfigGenerator):
         self.ahu_name_pattern = re.compile(r"\[\d+\]")
         self.equip_id_topic_name_map = dict()
 
+    def __getstate__(self):
+        # psycopg2 connection can't be pickled. Generator is pickled to run in worker
+        # processes, which open their own connection
+        state = super().__getstate__()
+        state.pop("connection", None)
+        return state
+
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        import psycopg2
+        self.connection = psycopg2.connect(**self.config_dict["metadata"]["connection_params"])
+        self.connection.autocommit = True
+
     def get_ahu_and_vavs(self):
 
         # 1. Query for vavs that are mapped to ahu
@@ -160,7 +173,7 @@ class ConfigGenerator(BaseConfigGenerator):
 
     def generate_config_from_template(self, equip_id, equip_type):
         topic_name, device_id, device_name = self.query_device_id_name(equip_id, equip_type)
-        driver = copy.deepcopy(self.config_template)
+        driver = self.render_config_template()
         nf_query_format = driver["driver_config"]["query"]
         if "{device_id}" in nf_query_format and device_id is None or \
            "{obj_name}" in nf_query_format and device_name is None:
@@ -1,5 +1,4 @@
 import sys
-import psycopg2
 
 from volttron_config_gen.base.config_ilc import BaseConfigGenerator
 
@@ -22,6 +21,8 @@ class ConfigGenerator(BaseConfigGenerator):
             del connect_params["timescale_dialect"]
         else:
             self.timescale_dialect = False
+        # imported here so that psycopg2 is needed only for this data store
+        import psycopg2
         self.connection = psycopg2.connect(**connect_params)
         self.connection.autocommit = True
         self.equip_table = metadata.get("equip_table")
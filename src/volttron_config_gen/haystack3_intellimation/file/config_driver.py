@@ -1,4 +1,3 @@
-import copy
 import json
 import re
 from collections import defaultdict
@@ -152,7 +151,7 @@ class ConfigGenerator(BaseConfigGenerator):
     def generate_config_from_template(self, equip_id, equip_type):
         device_id, device_name = self.get_nf_device_id_and_name(equip_id,
                                                                 equip_type)
-        driver = copy.deepcopy(self.config_template)
+        driver = self.render_config_template()
         nf_query_format = driver["driver_config"]["query"]
         if "{device_id}" in nf_query_format and device_id is None or \
             "{obj_name}" in nf_query_format and device_name is None:
@@ -0,0 +1,279 @@
+import json
+from collections import defaultdict
+from urllib.parse import unquote
+
+equip_type_db_label_map = {
+    "ahu": "AHU",
+    "vav": "VAV",
+    "power_meter": "Building_Electrical_Meter",
+    "lighting": "Luminaire",
+    "occupancy_detector": "OccupancyDetector"
+}
+
+CONTROLLER_LABEL = "Bacnet Controller"
+
+# relationships used by the generators. Inverse brick relationships are stored as the forward
+# relationship with subject and object swapped
+TTL_RELATIONSHIPS = {"feeds", "controls", "isPointOf", "hasLocation"}
+TTL_INVERSE_RELATIONSHIPS = {
+    "isFedBy": "feeds",
+    "isControlledBy": "controls",
+    "hasPoint": "isPointOf",
+    "isLocationOf": "hasLocation"
+}
+
+
+class BrickGraph:
+    """
+    In memory adjacency index of the BRICK graph used by the ucsd_brick config generators.
+    Answers the same questions as the cypher queries of the ucsd_brick neo4j data store
+    using hash lookups. Rows returned have the same shape as the corresponding neo4j query
+    results
+    """
+
+    def __init__(self):
+        self.labels = dict()
+        self.properties = dict()
+        # label -> node ids
+        self.label_index = defaultdict(list)
+        # (label, name) -> node ids
+        self.name_index = defaultdict(list)
+        # (node id, relationship type) -> node ids
+        self.out_index = defaultdict(list)
+        self.in_index = defaultdict(list)
+
+    @classmethod
+    def load(cls, file_path):
+        with open(file_path, "r") as f:
+            snapshot = json.load(f)
+        if snapshot.get("format") != "ucsd_brick_snapshot":
+            raise ValueError(f"{file_path} is not a ucsd_brick snapshot file")
+        graph = cls()
+        for node in snapshot["nodes"]:
+            graph.add_node(node["id"], node["labels"], node["properties"])
+        for src, rel_type, dst in snapshot["relationships"]:
+            graph.add_relationship(src, rel_type, dst)
+        return graph
+
+    @classmethod
+    def load_ttl(cls, file_path, label_map=None):
+        """
+        Parse a BRICK turtle file into the same graph as the json snapshot. Mapping follows what
+        neo4j's rdf import does - rdf:type local names become labels, literal values become
+        properties named by the predicate's local name and the relationships in
+        TTL_RELATIONSHIPS (and their inverses) become edges. Nodes without a name property are
+        named by the local name of their uri. Subjects of isPointOf get the label Point in front
+        of their other labels so that labels[1] is the point class, as in the neo4j model.
+        label_map optionally renames rdf types (for example {"Occupancy_Sensor": "OccupancyDetector"})
+        """
+        # rdflib is only needed for turtle files
+        from rdflib import Literal, URIRef
+        from rdflib import Graph as RDFGraph
+        from rdflib.namespace import RDF, RDFS
+
+        label_map = label_map or dict()
+        rdf_graph = RDFGraph()
+        rdf_graph.parse(file_path, format="turtle")
+
+        node_ids = dict()
+        labels = defaultdict(list)
+        properties = defaultdict(dict)
+        relationships = []
+        # sorted so that node order, and hence the order of generated configs, does not depend
+        # on rdflib's store iteration order
+        for s, p, o in sorted(rdf_graph):
+            if not isinstance(s, URIRef):
+                continue
+            node = node_ids.setdefault(s, len(node_ids))
+            if p == RDF.type:
+                label = label_map.get(_local_name(o), _local_name(o))
+                if label not in labels[node]:
+                    labels[node].append(label)
+            elif isinstance(o, Literal):
+                key = "name" if p == RDFS.label else _local_name(p)
+                # explicit name property takes precedence over rdfs:label
+                if key == "name" and p == RDFS.label and "name" in properties[node]:
+                    continue
+                properties[node][key] = o.toPython()
+            elif isinstance(o, URIRef):
+                rel_type = _local_name(p)
+                if rel_type in TTL_RELATIONSHIPS:
+                    relationships.append((node, rel_type, node_ids.setdefault(o, len(node_ids))))
+                elif rel_type in TTL_INVERSE_RELATIONSHIPS:
+                    relationships.append((node_ids.setdefault(o, len(node_ids)),
+                                          TTL_INVERSE_RELATIONSHIPS[rel_type], node))
+        for src, rel_type, _ in relationships:
+            if rel_type == "isPointOf" and labels[src][:1] != ["Point"]:
+                if "Point" in labels[src]:
+                    labels[src].remove("Point")
+                labels[src].insert(0, "Point")
+
+        graph = cls()
+        for uri, node in node_ids.items():
+            props = properties[node]
+            props.setdefault("name", _local_name(uri))
+            graph.add_node(node, labels[node], props)
+        for src, rel_type, dst in relationships:
+            graph.add_relationship(src, rel_type, dst)
+        return graph
+
+    def add_node(self, node_id, labels, properties):
+        self.labels[node_id] = labels
+        self.properties[node_id] = properties
+        for label in labels:
+            self.label_index[label].append(node_id)
+            if properties.get("name") is not None:
+                self.name_index[(label, properties["name"])].append(node_id)
+
+    def add_relationship(self, src, rel_type, dst):
+        self.out_index[(src, rel_type)].append(dst)
+        self.in_index[(dst, rel_type)].append(src)
+
+    def name(self, node_id):
+        return self.properties[node_id].get("name")
+
+    def _sources(self, node_id, rel_type, label):
+        return [n for n in self.in_index.get((node_id, rel_type), []) if label in self.labels[n]]
+
+    def _located_equipment(self, equip_prefix, db_type, room_id):
+        # equivalent of (e:{db_type})-[:hasLocation]->(r:Room)
+        #               WHERE e.name STARTS WITH $equip_id AND r.name=$room_id
+        result = []
+        for room in self.name_index.get(("Room", room_id), []):
+            for e in self._sources(room, "hasLocation", db_type):
+                if (self.name(e) or "").startswith(equip_prefix):
+                    result.append(e)
+        return result
+
+    def _equipment(self, equip_id, equip_type, room_id=None):
+        db_type = equip_type_db_label_map[equip_type]
+        if equip_type in ["lighting", "occupancy_detector"]:
+            if not room_id:
+                raise ValueError(f"No room_id provided for equip_type {equip_type}")
+            return self._located_equipment(equip_id, db_type, room_id)
+        return self.name_index.get((db_type, equip_id), [])
+
+    def ahu_vav_topology(self):
+        """
+        Same rows as neo4j_utils.query_ahu_vav_topology
+        """
+        rows = []
+        for equip_type, label in [("ahu", "AHU"), ("vav", "VAV")]:
+            for e in self.label_index.get(label, []):
+                controllers = self._sources(e, "controls", CONTROLLER_LABEL) or [None]
+                ahus = self._sources(e, "feeds", "AHU") if equip_type == "vav" else []
+                for c in controllers:
+                    c_props = self.properties[c] if c is not None else {}
+                    for a in ahus or [None]:
+                        rows.append({"equip_type": equip_type,
+                                     "name": self.name(e),
+                                     "trunk_id": self.properties[e].get("trunkId"),
+                                     "device_address": c_props.get("IP Address"),
+                                     "device_id": c_props.get("Device Object Identifier"),
+                                     "ahu": self.name(a) if a is not None else None})
+        return rows
+
+    def ahus(self):
+        return [self.name(a) for a in self.label_index.get("AHU", [])]
+
+    def lights_by_room(self):
+        """
+        Same rows as neo4j_utils.query_lights_from_room
+        """
+        rows = []
+        for light in self.label_index.get("Luminaire", []):
+            props = self.properties[light]
+            if props.get("controllerId") is None or props.get("controller") is None:
+                continue
+            for room in self.out_index.get((light, "hasLocation"), []):
+                if "Room" in self.labels[room]:
+                    rows.append((self.name(room), props.get("name"), props["controller"],
+                                 props["controllerId"]))
+        return rows
+
+    def occupancy_detector(self, room_id):
+        """
+        Same result as neo4j_utils.query_occupancy_detector
+        """
+        for room in self.name_index.get(("Room", room_id), []):
+            for o in self._sources(room, "hasLocation", "OccupancyDetector"):
+                props = self.properties[o]
+                if props.get("controllerId") is not None and props.get("controller") is not None:
+                    return props.get("name"), props["controller"], props["controllerId"]
+        return None, None, None
+
+    def _points(self, equipment):
+        for e in equipment:
+            for p in self.in_index.get((e, "isPointOf"), []):
+                if "Point" in self.labels[p]:
+                    yield p
+
+    def point_names(self, equip_id, equip_type, point_labels, **kwargs):
+        """
+        Same rows as neo4j_utils.query_point_names - (labels(p)[1], p.name)
+        """
+        point_labels = set(point_labels)
+        rows = []
+        for p in self._points(self._equipment(equip_id, equip_type, kwargs.get("room_id"))):
+            labels = self.labels[p]
+            if point_labels.intersection(labels):
+                rows.append((labels[1] if len(labels) > 1 else None, self.name(p)))
+        return rows or None
+
+    def points_for_equip(self, equip_id, equip_type, interested_point_types, point_meta_map,
+                         **kwargs):
+        """
+        Same result as neo4j_utils.query_points_for_equip
+        """
+        result_dict = {}
+        point_labels = []
+        for key in interested_point_types:
+            if isinstance(point_meta_map[key], str):
+                point_labels.append(point_meta_map[key])
+            else:
+                point_labels.extend(point_meta_map[key])
+        label_name_map = dict()
+        for label, name in self.point_names(equip_id, equip_type, point_labels, **kwargs) or []:
+            label_name_map[label] = name
+        for key in interested_point_types:
+            if isinstance(point_meta_map[key], str):
+                result_dict[key] = label_name_map.get(point_meta_map[key])
+            else:
+                for l in point_meta_map[key]:
+                    if label_name_map.get(l):
+                        result_dict[key] = label_name_map[l]
+                        break
+        return result_dict
+
+    def registry_points(self, equip_id, equip_type, **kwargs):
+        """
+        Rows used for bacnet registry config - (BACnet Object Name, name, units, type,
+        BACnet Object Identifier)
+        """
+        rows = []
+        for p in self._points(self._equipment(equip_id, equip_type, kwargs.get("room_id"))):
+            props = self.properties[p]
+            rows.append((props.get("BACnet Object Name"), props.get("name"), props.get("units"),
+                         props.get("type"), props.get("BACnet Object Identifier")))
+        return rows
+
+
+def _local_name(uri):
+    uri = str(uri)
+    for sep in ("#", "/", ":"):
+        if sep in uri:
+            uri = uri.rsplit(sep, 1)[1]
+            break
+    return unquote(uri)
+
+
+def load_graph(metadata):
+    """
+    Load the BRICK graph from the data store metadata - either a turtle file (brick_ttl) or a json
+    snapshot of the neo4j graph (snapshot_json)
+    """
+    if metadata.get("brick_ttl"):
+        return BrickGraph.load_ttl(metadata["brick_ttl"], metadata.get("ttl_label_map"))
+    if metadata.get("snapshot_json"):
+        return BrickGraph.load(metadata["snapshot_json"])
+    raise ValueError("metadata should contain either brick_ttl or snapshot_json")
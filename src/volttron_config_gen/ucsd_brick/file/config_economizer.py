@@ -0,0 +1,30 @@
+import sys
+
+from volttron_config_gen.ucsd_brick.file.brick_graph import load_graph
+from volttron_config_gen.ucsd_brick.neo4j.config_economizer import (
+    ConfigGenerator as Neo4jConfigGenerator)
+
+
+class ConfigGenerator(Neo4jConfigGenerator):
+    """
+    class that parses BRICK like tags from a snapshot or turtle file of the BRICK graph to
+    generate AirsideEconomizer agent configuration. Same as the neo4j config generator except
+    for where the graph is read from
+    """
+
+    def load_graph(self, metadata):
+        # load BRICK graph from snapshot or turtle file
+        return load_graph(metadata)
+
+
+def main():
+    if len(sys.argv) != 2:
+        print("script requires one argument - path to configuration file")
+        exit()
+    config_path = sys.argv[1]
+    d = ConfigGenerator(config_path)
+    d.generate_configs()
+
+
+if __name__ == '__main__':
+    main()
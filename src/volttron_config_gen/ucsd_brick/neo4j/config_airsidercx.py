@@ -2,7 +2,7 @@ import sys
 from collections import defaultdict
 
 from volttron_config_gen.base.config_airsidercx import BaseConfigGenerator
-from volttron_config_gen.ucsd_brick.neo4j.neo4j_utils import Neo4jConnection, query_points_for_equip
+from volttron_config_gen.ucsd_brick.neo4j.neo4j_utils import load_graph
 
 
 class ConfigGenerator(BaseConfigGenerator):
@@ -15,10 +15,7 @@ class ConfigGenerator(BaseConfigGenerator):
 
         # get details on metadata neo4jdb
         metadata = self.config_dict.get("metadata")
-        connect_params = metadata.get("connection_params")
-
-        self.connection = Neo4jConnection(connect_params["uri"], connect_params["user"],
-                                          connect_params["password"], connect_params["database"])
+        self.graph = self.load_graph(metadata)
 
         self.point_meta_map = self.config_dict.get("point_meta_map")
         # Use label always
@@ -26,17 +23,22 @@ class ConfigGenerator(BaseConfigGenerator):
         self.equip_point_label_name_map = dict()
 
 
+    def load_graph(self, metadata):
+        """
+        Returns the BRICK graph to generate configurations from. The file data store overrides
+        this to load the graph from a snapshot or turtle file instead of neo4j
+        """
+        return load_graph(metadata)
+
     def get_ahu_and_vavs(self):
         ahu_dict = defaultdict(list)
-        # TODO: ADD relationship to configured building name once model is updated
-        #  current model is missing relationship between building and room/equipment
-        query = ("MATCH (a:AHU)-[:feeds]->(v:VAV) "
-                 "RETURN a.name, v.name;")
-        result = self.connection.query(query)
-        if result:
-            for r in result:
-                ahu_dict[r[0]].append(r[1])
-        # ahu without vavs and vav without ahuref are not applicable for AirsideRCx
+        seen = set()
+        result = self.graph.ahu_vav_topology()
+        for r in result:
+            # ahu without vavs and vav without ahuref are not applicable for AirsideRCx
+            if r["equip_type"] == "vav" and r["ahu"] and (r["ahu"], r["name"]) not in seen:
+                seen.add((r["ahu"], r["name"]))
+                ahu_dict[r["ahu"]].append(r["name"])
         return ahu_dict
 
 
@@ -55,12 +57,10 @@ class ConfigGenerator(BaseConfigGenerator):
         # instead of querying single point at a time, get all interested points at a time.
         # querying single point at a time seems to take long with neo4j. may be because the
         # example db doesn't have any indexes?
-        #return query_point_name(equip_id, equip_type.upper(), point_labels, self.connection)
+        #return query_point_name(equip_id, equip_type.upper(), point_labels, self.graph.connection)
         if not self.equip_point_label_name_map or not self.equip_point_label_name_map.get(equip_id):
-            self.equip_point_label_name_map[equip_id] = query_points_for_equip(equip_id, equip_type,
-                                                                               interested_point_types,
-                                                                               self.point_meta_map,
-                                                                               self.connection)
+            self.equip_point_label_name_map[equip_id] = self.graph.points_for_equip(
+                equip_id, equip_type, interested_point_types, self.point_meta_map)
         # Done finding interested points for a given equip id
         return self.equip_point_label_name_map[equip_id].get(point_key)
 
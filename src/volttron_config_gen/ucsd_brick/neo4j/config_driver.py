@@ -1,14 +1,11 @@
-import copy
-import csv
 import os
 import sys
 import re
 from collections import defaultdict
 
 from volttron_config_gen.base.config_driver import BaseConfigGenerator
-from volttron_config_gen.ucsd_brick.neo4j.neo4j_utils import (Neo4jConnection,
-                                                              query_lights_from_room,
-                                                              query_occupancy_detector)
+from volttron_config_gen.ucsd_brick.neo4j.neo4j_utils import load_graph
+from volttron_config_gen.utils.output_writer import csv_bytes
 
 
 class ConfigGenerator(BaseConfigGenerator):
@@ -16,17 +13,14 @@ class ConfigGenerator(BaseConfigGenerator):
     class that parses BRICK like tags from a neo4j db to generate
     platform driver configuration for driver
     """
+    supports_driver_groups = True
+
     def __init__(self, config):
         super().__init__(config)
 
         # get details on neo4j metadata db
         metadata = self.config_dict.get("metadata")
-        connect_params = metadata.get("connection_params")
-
-        self.connection = Neo4jConnection(connect_params["uri"],
-                                          connect_params["user"],
-                                          connect_params["password"],
-                                          connect_params["database"])
+        self.graph = self.load_graph(metadata)
         self.device_details = {"ahu": defaultdict(dict),
                                "vav": defaultdict(dict),
                                "electric_meter": defaultdict(dict),
@@ -35,58 +29,43 @@ class ConfigGenerator(BaseConfigGenerator):
         self.max_group_vav = 0
         self.group_device_count = {}
 
+    def load_graph(self, metadata):
+        """
+        Returns the BRICK graph to generate configurations from. The file data store overrides
+        this to load the graph from a snapshot or turtle file instead of neo4j
+        """
+        return load_graph(metadata)
+
     def get_ahu_and_vavs(self):
         ahu_dict = defaultdict(list)
-        # 1. Query for vavs that are mapped to ahu
-        # query = ("MATCH (a:AHU)-[:feeds]->(v:VAV) "
-        #          "RETURN a.name, a.`Remote Station IP`, a.`BACnet Device Object Identifier`, "
-        #          "v.name, v.`Remote Station IP`, v.`BACnet Device Object Identifier`;")
-        query = (
-            "MATCH "
-            "(c1:`Bacnet Controller`)-[:controls]->(a:AHU)-[:feeds]->(v:VAV)<-[:controls]-(c2:`Bacnet Controller`)  "
-            "RETURN a.name, c1.`IP Address`, c1.`Device Object Identifier`, "
-            "v.name, v.trunkId, c2.`IP Address`, c2.`Device Object Identifier`;"
-        )
-        result = self.connection.query(query)
-        if result:
-            for r in result:
-                ahu_dict[r[0]].append(r[3])
-                grpnum = int(r[4][-1:])
-                self.device_details["ahu"][r[0]]["device_address"]= r[1]
-                self.device_details["ahu"][r[0]]["device_id"] = r[2]
-                self.device_details["vav"][r[3]]["group"] = grpnum
-                if self.group_device_count.get(grpnum):
-                    self.group_device_count[grpnum] = self.group_device_count[grpnum] + 1
-                else:
-                    self.group_device_count[grpnum] = 1
-                self.max_group_vav = self.max_group_vav if (self.max_group_vav >
-                                                            grpnum) else grpnum
-                self.device_details["vav"][r[3]]["device_address"]= r[5]
-                self.device_details["vav"][r[3]]["device_id"] = r[6]
+        # Single query for all ahus and vavs. vavs that are fed by an ahu come with the ahu name,
+        # ahus without vavs and vavs without ahu come with ahu name None
+        result = self.graph.ahu_vav_topology()
+        seen = set()
+        for r in result:
+            equip_type, name = r["equip_type"], r["name"]
+            if (equip_type, name, r["ahu"]) in seen:
+                # equipment with more than one controller or feeding ahu
+                continue
+            seen.add((equip_type, name, r["ahu"]))
+            self.device_details[equip_type][name]["device_address"] = r["device_address"]
+            self.device_details[equip_type][name]["device_id"] = r["device_id"]
+            self.device_details[equip_type][name]["trunk_id"] = r["trunk_id"]
+            if equip_type == "ahu":
+                if name not in ahu_dict:
+                    ahu_dict[name] = []
+                continue
 
-        # 2. Query for ahus without vavs
-        # append to result
-        query = ("MATCH "
-                 "(c1:`Bacnet Controller`)-[:controls]->(a:AHU) WHERE not ((a)-[:feeds]->(:VAV)) "
-                 "RETURN a.name, c1.`IP Address`, c1.`Device Object Identifier`;")
-        result = self.connection.query(query)
-        if result:
-            for r in result:
-                ahu_dict[r[0]] = []
-                self.device_details["ahu"][r[0]]["device_address"]= r[1]
-                self.device_details["ahu"][r[0]]["device_id"] = r[2]
-
-        # 3. query for vavs without
-        # if exists add to self.unmapped_device_details
-        query = ("MATCH (v:VAV)<-[:controls]-(c2:`Bacnet Controller`)  WHERE not ((:AHU)-[:feeds]->(v)) "
-                 "RETURN v.name, c2.`IP Address`, c2.`Device Object Identifier`;")
-        result = self.connection.query(query)
-        if result:
-            for r in result:
-                ahu_dict[""].append(r[0])
-                self.device_details["vav"][r[0]]["device_address"]= r[1]
-                self.device_details["vav"][r[0]]["device_id"] = r[2]
-                self.unmapped_device_details[r[0]] = {"type": "vav",
+            if r["trunk_id"]:
+                grpnum = int(r["trunk_id"][-1:])
+                self.device_details["vav"][name]["group"] = grpnum
+                self.group_device_count[grpnum] = self.group_device_count.get(grpnum, 0) + 1
+                self.max_group_vav = max(self.max_group_vav, grpnum)
+            if r["ahu"]:
+                ahu_dict[r["ahu"]].append(name)
+            else:
+                ahu_dict[""].append(name)
+                self.unmapped_device_details[name] = {"type": "vav",
                                                       "error": "Unable to find AHU that feeds vav"}
         return ahu_dict
 
@@ -94,7 +73,7 @@ class ConfigGenerator(BaseConfigGenerator):
         room_dict = defaultdict(list)
         # Only get lights where there is valid controller ip and controller id\
         # TODO- update query once controller is broken into a separate node similar to VAVs
-        result = query_lights_from_room(self.connection)
+        result = self.graph.lights_by_room()
         if result:
             for r in result:
                 room_dict[r[0]].append(r[1])
@@ -113,7 +92,7 @@ class ConfigGenerator(BaseConfigGenerator):
         return room_dict
 
     def get_occupancy_detector(self, room_id):
-        occ_id, device_addr, device_id = query_occupancy_detector(room_id, self.connection)
+        occ_id, device_addr, device_id = self.graph.occupancy_detector(room_id)
         if occ_id:
             if not self.device_details["lighting"].get(room_id):
                 self.device_details["lighting"][room_id]["device_address"] = device_addr
@@ -158,15 +137,16 @@ class ConfigGenerator(BaseConfigGenerator):
         device_address = _equip.get("device_address")
         device_id = _equip.get("device_id")
 
-        driver = copy.deepcopy(self.config_template)
+        driver = self.render_config_template()
 
         if device_id and device_address:
             driver["driver_config"]["device_address"] = device_address
             driver["driver_config"]["device_id"] = device_id
             if equip_type =="ahu" or equip_type == "meter":
-                driver["group"] = 0
+                group = 0
             else:
-                driver["group"] = _equip.get("group")
+                group = _equip.get("group")
+            driver["group"] = self.get_driver_group(equip_id, equip_type, group)
         else:
             if not self.unmapped_device_details.get(equip_id):
                 self.unmapped_device_details[equip_id] = dict()
@@ -188,65 +168,28 @@ class ConfigGenerator(BaseConfigGenerator):
         header = ["Reference Point Name", "Volttron Point Name", "Units", "BACnet Object Type",
                   "Property", "Writable", "Index", "Notes"]
         if not data:
-            data = self.generate_registry_config_data(equip_id, equip_type)
+            data = self.get_registry_config_data(equip_id, equip_type)
         if data:
+            if self.dedup_registry_configs:
+                return self.add_shared_registry_config(csv_bytes(data, header), "csv"), "csv"
             filename = os.path.join(self.output_configs,f"registry_{equip_id}.csv")
-            with open(filename, "w") as csvfile:
-                writer = csv.writer(csvfile, lineterminator='\n')
-                writer.writerow(header)
-                writer.writerows(data)
-            return filename, "csv"
+            return self.output_writer.write_csv(data, filename, header), "csv"
         return None, None
 
     def generate_registry_config_data(self, equip_id, equip_type, **kwargs):
         # TODO update for building electring meter once model is updated
         _notes = "auto generated"
         _property = "presentValue"
-        query = None
-        query_parameters = None
-        if equip_type in ["ahu", "vav"]:
-            db_type = equip_type.upper()
-        elif equip_type == "electric_meter":
-            db_type = None  # TODO
-        elif equip_type == "lighting":
-            # TODO- is equip id unique globally- i.e. across rooms and controllers? If so
-            #  we could get rid of the special query with additional room match
-            db_type = "Luminaire"
-            room_id = kwargs.get("room_id")
-            if not room_id:
-                raise ValueError("No room_id provided for equip_type lighting")
-                # TODO: Use may be controllerid_ballastid_ as the unique prefix?
-            if equip_id.split("_")[0] == "B5B3":
-                print("Skipping lights with balast id B5B3. As this id is not unique")
-                return []
-            query = (f"MATCH (p:Point)-[isPointOf]->(e:{db_type})-[:hasLocation]->(r:Room) "
-                     f"WHERE e.name STARTS WITH $equip_id AND r.name=$room_id "
-                     "RETURN p.`BACnet Object Name`, p.name, p.units, p.type, p.`BACnet Object "
-                     "Identifier`;")
-            query_parameters = {'equip_id': equip_id, 'room_id': room_id}
-        elif equip_type == "occupancy_detector":
-            # TODO- is equip id unique globally- i.e. across rooms and controllers? If so
-            #  we could get rid of the special query with additional room match
-            db_type = "OccupancyDetector"
-            room_id = kwargs.get("room_id")
-            if not room_id:
-                raise ValueError("No room_id provided for equip_type occupancy_detector")
-            query = (f"MATCH (p:Point)-[isPointOf]->(e:{db_type})-[:hasLocation]->(r:Room) "
-                     f"WHERE e.name STARTS WITH $equip_id AND r.name=$room_id "
-                     "RETURN p.`BACnet Object Name`, p.name, p.units, p.type, p.`BACnet Object "
-                     "Identifier`;")
-            query_parameters = {'equip_id': equip_id, 'room_id': room_id}
-        else:
+        if equip_type == "electric_meter":
+            return []  # TODO
+        elif equip_type not in ["ahu", "vav", "lighting", "occupancy_detector"]:
             raise ValueError(f"Unknown equipment type {equip_type}")
-
-        if query is None:
-            # default query only based on equip type label and equip id
-            query = (f"MATCH(p:Point)-[isPointOf]->(e:{db_type}) "
-                     f"WHERE e.name = $equip_id "
-                     "RETURN p.`BACnet Object Name`, p.name, p.units, p.type, p.`BACnet Object "
-                     "Identifier`;")
-            query_parameters = {'equip_id': equip_id}
-        result = self.connection.query(query, query_parameters)
+        # TODO: Use may be controllerid_ballastid_ as the unique prefix?
+        if equip_type == "lighting" and equip_id.split("_")[0] == "B5B3":
+            print("Skipping lights with balast id B5B3. As this id is not unique")
+            return []
+        # lighting and occupancy_detector are looked up using equip_id as name prefix and room_id
+        result = self.graph.registry_points(equip_id, equip_type, **kwargs)
         missing = []
         data = []
         if result:
@@ -293,6 +236,14 @@ class ConfigGenerator(BaseConfigGenerator):
     def get_max_device_count_in_group(self):
         return max(self.group_device_count.values())
 
+    def get_driver_group_count(self):
+        # as many groups as there are trunks
+        return max(len(self.group_device_count), 1)
+
+    def get_device_trunk(self, equip_id, equip_type):
+        # trunkId of ahus and vavs. not known for lights
+        return self.device_details.get(equip_type, dict()).get(equip_id, dict()).get("trunk_id")
+
 def main():
     if len(sys.argv) != 2:
         print("script requires one argument - path to configuration file")
@@ -303,15 +254,3 @@ def main():
 
 if __name__ == '__main__':
     main()
-    # connection = Neo4jConnection("neo4j://localhost:7687", "neo4j", "volttron")
-    # test_result = connection.query("MATCH (a:AHU) WHERE not ((a)-[:feeds]->(:VAV)) RETURN a.name;")
-    # print(test_result)
-    # test_result = connection.query("MATCH (v:VAV) WHERE not ((:AHU)-[:feeds]->(v)) RETURN v.name;")
-    # print(test_result)
-    # test_result = connection.query("MATCH (a:AHU)-[:feeds]->(v:VAV) RETURN a.name, v.name;")
-    # print(test_result)
-
-
-    
-    main()
-
@@ -1,7 +1,7 @@
 import sys
 
 from volttron_config_gen.base.config_economizer import BaseConfigGenerator
-from volttron_config_gen.ucsd_brick.neo4j.neo4j_utils import Neo4jConnection, query_points_for_equip
+from volttron_config_gen.ucsd_brick.neo4j.neo4j_utils import load_graph
 
 
 class ConfigGenerator(BaseConfigGenerator):
@@ -15,33 +15,28 @@ class ConfigGenerator(BaseConfigGenerator):
 
         # get details on metadata neo4jdb
         metadata = self.config_dict.get("metadata")
-        connect_params = metadata.get("connection_params")
-
-        self.connection = Neo4jConnection(connect_params["uri"], connect_params["user"],
-                                          connect_params["password"],
-                                          connect_params["database"])
+        self.graph = self.load_graph(metadata)
         self.equip_point_label_name_map = dict()
 
+    def load_graph(self, metadata):
+        """
+        Returns the BRICK graph to generate configurations from. The file data store overrides
+        this to load the graph from a snapshot or turtle file instead of neo4j
+        """
+        return load_graph(metadata)
+
     def get_ahus(self):
-        ahus = []
         # TODO: Update query with building name after model is updated.
         #  current model is missing relationship between building and room/equipment
-        query = "MATCH (a:AHU) RETURN a.name;"
-        result = self.connection.query(query)
-        if result:
-            for r in result:
-                ahus.append(r[0])
-        return ahus
+        return self.graph.ahus()
 
     def get_point_name(self, equip_id, equip_type, point_key):
         if not equip_type or equip_type.upper() != "AHU":
             raise ValueError(f"Unknown equipment type {equip_type}")
 
         if not self.equip_point_label_name_map or not self.equip_point_label_name_map.get(equip_id):
-            self.equip_point_label_name_map[equip_id] = query_points_for_equip(equip_id, equip_type,
-                                                                               self.point_meta_map.keys(),
-                                                                               self.point_meta_map,
-                                                                               self.connection)
+            self.equip_point_label_name_map[equip_id] = self.graph.points_for_equip(
+                equip_id, equip_type, self.point_meta_map.keys(), self.point_meta_map)
 
         # Done finding interested points for a given equip id
         return self.equip_point_label_name_map[equip_id].get(point_key)
@@ -2,10 +2,7 @@ import sys
 from collections import defaultdict
 
 from volttron_config_gen.base.config_ilc import BaseConfigGenerator
-from volttron_config_gen.ucsd_brick.neo4j.neo4j_utils import (Neo4jConnection,
-                                                              query_points_for_equip,
-                                                              query_lights_from_room,
-                                                              query_occupancy_detector)
+from volttron_config_gen.ucsd_brick.neo4j.neo4j_utils import load_graph
 
 
 class ConfigGenerator(BaseConfigGenerator):
@@ -19,13 +16,17 @@ class ConfigGenerator(BaseConfigGenerator):
 
         # get details on metadata neo4jdb
         metadata = self.config_dict.get("metadata")
-        connect_params = metadata.get("connection_params")
-
-        self.connection = Neo4jConnection(connect_params["uri"], connect_params["user"],
-                                          connect_params["password"], connect_params["database"])
+        self.graph = self.load_graph(metadata)
         self.vav_ahu_list = list()
         self.equip_point_label_name_map = dict()
 
+    def load_graph(self, metadata):
+        """
+        Returns the BRICK graph to generate configurations from. The file data store overrides
+        this to load the graph from a snapshot or turtle file instead of neo4j
+        """
+        return load_graph(metadata)
+
     def get_building_power_meter(self):
         # TODO current model doesn't have building power meter. Update after model is updated
         # Example query based on  example from https://docs.brickschema.org/modeling/meters.html
@@ -43,7 +44,7 @@ class ConfigGenerator(BaseConfigGenerator):
         # q = ("MATCH (e:Building_Electrical_Meter)-[:hasLocation]-(b:Building) "
         #      "WHERE b.name = $building"
         #      "RETURN e.name;")
-        # result = self.connection.query(q, parameters={'building':self.building})
+        # result = self.graph.connection.query(q, parameters={'building':self.building})
         # if result:
         #     return result[0][0]
         return ""
@@ -60,13 +61,13 @@ class ConfigGenerator(BaseConfigGenerator):
             return point_name
 
     def get_vav_ahu_map(self):
-        # TODO: Update query with building name configured (self.building)
-        #  current model is missing relationship between building and room/equipment
         if not self.vav_ahu_list:
-            q = "MATCH (a:AHU)-[:feeds]->(v:VAV) RETURN v.name, a.name;"
-            result = self.connection.query(q)
-            if result:
-                self.vav_ahu_list = result
+            seen = set()
+            result = self.graph.ahu_vav_topology()
+            for r in result:
+                if r["equip_type"] == "vav" and r["ahu"] and (r["name"], r["ahu"]) not in seen:
+                    seen.add((r["name"], r["ahu"]))
+                    self.vav_ahu_list.append((r["name"], r["ahu"]))
         return self.vav_ahu_list
 
 
@@ -77,9 +78,9 @@ class ConfigGenerator(BaseConfigGenerator):
         if not equip_id:
             return None
         if not self.equip_point_label_name_map or not self.equip_point_label_name_map.get(equip_id):
-            self.equip_point_label_name_map[equip_id] = query_points_for_equip(
+            self.equip_point_label_name_map[equip_id] = self.graph.points_for_equip(
                 equip_id, equip_type, self.point_meta_map[equip_type].keys(),
-                self.point_meta_map[equip_type], self.connection, **kwargs)
+                self.point_meta_map[equip_type], **kwargs)
 
         # Done finding interested points for a given equip id
         return self.equip_point_label_name_map[equip_id].get(point_key)
@@ -92,14 +93,14 @@ class ConfigGenerator(BaseConfigGenerator):
         room_dict = defaultdict(list)
         # Only get lights where there is valid controller ip and controller id\
         # TODO- update query once controller is broken into a separate node similar to VAVs
-        result = query_lights_from_room(self.connection)
+        result = self.graph.lights_by_room()
         if result:
             for r in result:
                 room_dict[r[0]].append(r[1])
         return room_dict
 
     def get_occ_detector(self, room_id):
-        occ_id, device_addr, device_id = query_occupancy_detector(room_id, self.connection)
+        occ_id, device_addr, device_id = self.graph.occupancy_detector(room_id)
         return occ_id
 
     def get_volttron_point_name(self, reference_point_name, **kwargs):
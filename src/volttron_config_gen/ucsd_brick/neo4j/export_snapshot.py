@@ -0,0 +1,85 @@
+"""Export the part of the UCSD BRICK neo4j graph that the config generators use into a json
+snapshot file. The snapshot can then be used with the ucsd_brick file data store to generate
+configurations offline, without a neo4j server.
+
+Usage: python -m volttron_config_gen.ucsd_brick.neo4j.export_snapshot <config file> <snapshot file>
+where config file is any ucsd_brick neo4j config generator configuration
+"""
+import json
+import sys
+
+from volttron_config_gen.ucsd_brick.neo4j.neo4j_utils import Neo4jConnection
+from volttron_config_gen.utils import strip_comments
+
+SNAPSHOT_FORMAT = "ucsd_brick_snapshot"
+SNAPSHOT_VERSION = 1
+
+# Equipment, locations and controllers read by the generators. Building_Electrical_Meter is
+# the power_meter equipment type of ILC
+NODES_QUERY = ("MATCH (n) "
+               "WHERE n:AHU OR n:VAV OR n:Luminaire OR n:OccupancyDetector OR n:Room "
+               "OR n:Building_Electrical_Meter OR n:`Bacnet Controller` "
+               "RETURN id(n), labels(n), properties(n);")
+
+# Only points of the equipment types above
+POINTS_QUERY = ("MATCH (p:Point)-[:isPointOf]->(e) "
+                "WHERE e:AHU OR e:VAV OR e:Luminaire OR e:OccupancyDetector "
+                "OR e:Building_Electrical_Meter "
+                "RETURN DISTINCT id(p), labels(p), properties(p);")
+
+RELATIONSHIP_QUERIES = [
+    "MATCH (a:AHU)-[:feeds]->(v:VAV) RETURN id(a), 'feeds', id(v);",
+    ("MATCH (c:`Bacnet Controller`)-[:controls]->(e) WHERE e:AHU OR e:VAV "
+     "RETURN id(c), 'controls', id(e);"),
+    ("MATCH (p:Point)-[:isPointOf]->(e) "
+     "WHERE e:AHU OR e:VAV OR e:Luminaire OR e:OccupancyDetector "
+     "OR e:Building_Electrical_Meter "
+     "RETURN id(p), 'isPointOf', id(e);"),
+    ("MATCH (e)-[:hasLocation]->(r:Room) WHERE e:Luminaire OR e:OccupancyDetector "
+     "RETURN id(e), 'hasLocation', id(r);")
+]
+
+
+def export_snapshot(connection, snapshot_path):
+    """
+    Write nodes and relationships used by the ucsd_brick config generators to snapshot_path.
+    Returns the number of nodes and relationships written
+    """
+    nodes = []
+    for query in [NODES_QUERY, POINTS_QUERY]:
+        for r in connection.query(query):
+            nodes.append({"id": r[0], "labels": list(r[1]), "properties": dict(r[2])})
+    relationships = []
+    for query in RELATIONSHIP_QUERIES:
+        for r in connection.query(query):
+            relationships.append([r[0], r[1], r[2]])
+
+    snapshot = {"format": SNAPSHOT_FORMAT,
+                "version": SNAPSHOT_VERSION,
+                "nodes": nodes,
+                "relationships": relationships}
+    with open(snapshot_path, "w") as f:
+        # default=str for neo4j temporal/spatial property values
+        json.dump(snapshot, f, default=str)
+    return len(nodes), len(relationships)
+
+
+def main():
+    if len(sys.argv) != 3:
+        print("script requires two arguments - path to configuration file that contains neo4j "
+              "connection details and path to the output snapshot file")
+        exit(1)
+    with open(sys.argv[1], "r") as f:
+        config_dict = json.loads(strip_comments(f.read()))
+    connect_params = config_dict.get("metadata", {}).get("connection_params")
+    if not connect_params:
+        print(f"No metadata.connection_params in configuration {sys.argv[1]}")
+        exit(1)
+    connection = Neo4jConnection(connect_params["uri"], connect_params["user"],
+                                 connect_params["password"], connect_params.get("database"))
+    node_count, rel_count = export_snapshot(connection, sys.argv[2])
+    print(f"Exported {node_count} nodes and {rel_count} relationships to {sys.argv[2]}")
+
+
+if __name__ == '__main__':
+    main()
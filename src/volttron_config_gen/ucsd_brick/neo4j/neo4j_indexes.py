@@ -0,0 +1,139 @@
+"""Create the neo4j indexes that the ucsd_brick neo4j config generator queries rely on and
+report the db hits of each query shape used by the generators, before and after the indexes
+are created.
+
+Usage: python -m volttron_config_gen.ucsd_brick.neo4j.neo4j_indexes <config file> [--profile-only]
+where config file is any ucsd_brick neo4j config generator configuration. If the configuration
+has a point_meta_map, its point labels are used when profiling the point queries.
+With --profile-only, queries are profiled but no index is created
+"""
+import json
+import sys
+
+from volttron_config_gen.ucsd_brick.neo4j.neo4j_utils import (
+    AHU_VAV_TOPOLOGY_QUERY, AHUS_QUERY, LIGHTS_FROM_ROOM_QUERY, OCCUPANCY_DETECTOR_QUERY,
+    Neo4jConnection, point_names_query, registry_points_query)
+from volttron_config_gen.utils import strip_comments
+
+# (label, property) looked up by name in the generator queries. Names are not guaranteed to be
+# unique in the model (for example luminaire names are only unique within a room), so these are
+# plain range indexes and not uniqueness constraints
+INDEXES = [
+    ("AHU", "name"),
+    ("VAV", "name"),
+    ("Room", "name"),
+    ("Luminaire", "name"),
+    ("OccupancyDetector", "name"),
+    ("Building_Electrical_Meter", "name"),
+    ("Point", "name"),
+]
+
+# Sample values used to fill in the parameters of the query shapes that are profiled
+SAMPLE_QUERIES = {
+    "ahu": "MATCH (e:AHU) RETURN e.name LIMIT 1;",
+    "vav": "MATCH (e:VAV) RETURN e.name LIMIT 1;",
+    "lighting": ("MATCH (e:Luminaire)-[:hasLocation]->(r:Room) "
+                 "RETURN e.name, r.name LIMIT 1;"),
+    "occupancy_detector": ("MATCH (e:OccupancyDetector)-[:hasLocation]->(r:Room) "
+                           "RETURN e.name, r.name LIMIT 1;")
+}
+
+
+def index_name(label, prop):
+    return f"{label.lower()}_{prop}"
+
+
+def create_indexes(connection):
+    """
+    Create the indexes in INDEXES if they don't already exist and wait for them to come online.
+    Returns the list of index names
+    """
+    names = []
+    for label, prop in INDEXES:
+        name = index_name(label, prop)
+        connection.query(f"CREATE INDEX {name} IF NOT EXISTS FOR (n:`{label}`) ON (n.{prop})")
+        names.append(name)
+    connection.query("CALL db.awaitIndexes()")
+    return names
+
+
+def _point_labels(point_meta_map):
+    # point_meta_map values are a label or list of labels. ilc configurations have one
+    # map per equipment type
+    labels = []
+    for value in point_meta_map.values():
+        if isinstance(value, str):
+            labels.append(value)
+        elif isinstance(value, dict):
+            labels.extend(_point_labels(value))
+        else:
+            labels.extend(value)
+    return labels
+
+
+def query_shapes(connection, point_labels):
+    """
+    Returns list of (description, query, parameters) for each query shape used by the generators.
+    Parameters are filled in with sample equipment from the database. Shapes for which there is
+    no sample equipment in the database are left out
+    """
+    shapes = [("ahu/vav topology", AHU_VAV_TOPOLOGY_QUERY, None),
+              ("ahus", AHUS_QUERY, None),
+              ("lights by room", LIGHTS_FROM_ROOM_QUERY, None)]
+    for equip_type, sample_query in SAMPLE_QUERIES.items():
+        result = connection.query(sample_query)
+        if not result:
+            continue
+        kwargs = {"room_id": result[0][1]} if len(result[0]) > 1 else {}
+        equip_id = result[0][0]
+        if equip_type == "occupancy_detector":
+            shapes.append(("occupancy detector of room", OCCUPANCY_DETECTOR_QUERY,
+                           {"room_name": kwargs["room_id"]}))
+        _query, params = point_names_query(equip_id, equip_type, point_labels, **kwargs)
+        shapes.append((f"{equip_type} point names", _query, params))
+        _query, params = registry_points_query(equip_id, equip_type, **kwargs)
+        shapes.append((f"{equip_type} registry points", _query, params))
+    return shapes
+
+
+def profile_queries(connection, shapes):
+    """
+    Returns dict of description -> total db hits
+    """
+    return {description: connection.profile(_query, params)[0]
+            for description, _query, params in shapes}
+
+
+def main():
+    if len(sys.argv) not in (2, 3) or (len(sys.argv) == 3 and sys.argv[2] != "--profile-only"):
+        print("script requires path to configuration file that contains neo4j connection details "
+              "and an optional --profile-only argument")
+        exit(1)
+    profile_only = len(sys.argv) == 3
+    with open(sys.argv[1], "r") as f:
+        config_dict = json.loads(strip_comments(f.read()))
+    connect_params = config_dict.get("metadata", {}).get("connection_params")
+    if not connect_params:
+        print(f"No metadata.connection_params in configuration {sys.argv[1]}")
+        exit(1)
+    connection = Neo4jConnection(connect_params["uri"], connect_params["user"],
+                                 connect_params["password"], connect_params.get("database"))
+    point_labels = _point_labels(config_dict.get("point_meta_map", {}))
+    shapes = query_shapes(connection, point_labels)
+
+    before = profile_queries(connection, shapes)
+    if profile_only:
+        for description, hits in before.items():
+            print(f"{description:<35} {hits:>12} db hits")
+        return
+
+    names = create_indexes(connection)
+    print(f"Created (if not already present) indexes: {', '.join(names)}")
+    after = profile_queries(connection, shapes)
+    print(f"{'query':<35} {'before':>12} {'after':>12}")
+    for description, hits in before.items():
+        print(f"{description:<35} {hits:>12} {after[description]:>12}")
+
+
+if __name__ == '__main__':
+    main()
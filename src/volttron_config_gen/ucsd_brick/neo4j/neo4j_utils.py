@@ -1,26 +1,149 @@
-from neo4j import GraphDatabase
-
 equip_type_db_label_map = {
     "ahu": "AHU",
     "vav": "VAV",
-    "power_meter": "Building_Electrical_Meter", #?
+    "power_meter": "Building_Electrical_Meter",
     "lighting": "Luminaire",
     "occupancy_detector": "OccupancyDetector"
 }
 
 class Neo4jConnection:
     def __init__(self, uri, user, password, database=None):
+        # imported here so that the neo4j package is needed only when connecting to neo4j
+        from neo4j import GraphDatabase
+        self._connect_args = (uri, user, password, database)
         self._driver = GraphDatabase.driver(uri, auth=(user, password))
         self.database = database
 
+    def __getstate__(self):
+        # neo4j driver can't be pickled. Config generators are pickled to run in worker
+        # processes, where a new connection is opened
+        return self._connect_args
+
+    def __setstate__(self, state):
+        self.__init__(*state)
+
     def __del__(self):
-        self._driver.close()
+        # _driver is not set if neo4j could not be imported or connection failed
+        if getattr(self, "_driver", None):
+            self._driver.close()
 
     def query(self, query, parameters=None):
         with self._driver.session(database=self.database) as session:
             r = session.run(query, parameters)
             return [record for record in r]
 
+    def profile(self, query, parameters=None):
+        """
+        Run query with PROFILE and return total db hits and number of rows returned
+        """
+        with self._driver.session(database=self.database) as session:
+            r = session.run("PROFILE " + query, parameters)
+            rows = len([record for record in r])
+            return _total_db_hits(r.consume().profile), rows
+
+
+def _total_db_hits(plan):
+    if not plan:
+        return 0
+    return plan.get("dbHits", 0) + sum(_total_db_hits(c) for c in plan.get("children", []))
+
+
+# Query shapes used by the ucsd_brick neo4j config generators. Kept together here so that they
+# can be profiled (see neo4j_indexes.py)
+
+# TODO: ADD relationship to configured building name once model is updated
+#  current model is missing relationship between building and room/equipment
+AHU_VAV_TOPOLOGY_QUERY = (
+    # label scans of AHU and VAV nodes instead of a scan of all nodes
+    "CALL { MATCH (e:AHU) RETURN e UNION MATCH (e:VAV) RETURN e } "
+    "OPTIONAL MATCH (c:`Bacnet Controller`)-[:controls]->(e) "
+    "OPTIONAL MATCH (a:AHU)-[:feeds]->(e:VAV) "
+    "RETURN CASE WHEN e:AHU THEN 'ahu' ELSE 'vav' END AS equip_type, "
+    "e.name AS name, e.trunkId AS trunk_id, "
+    "c.`IP Address` AS device_address, c.`Device Object Identifier` AS device_id, "
+    "a.name AS ahu;")
+
+AHUS_QUERY = "MATCH (a:AHU) RETURN a.name;"
+
+# Only get lights where there is valid controller ip and controller id
+# TODO- update query once controller is broken into a separate node similar to VAVs
+LIGHTS_FROM_ROOM_QUERY = (
+    "MATCH (l:Luminaire)-[:hasLocation]->(r:Room) "
+    "WHERE l.controllerId IS NOT NULL AND l.controller IS NOT NULL "
+    "RETURN r.name, l.name, l.controller, l.controllerId")
+
+OCCUPANCY_DETECTOR_QUERY = (
+    "MATCH (o:OccupancyDetector)-[:hasLocation]->(r:Room) "
+    "WHERE o.controllerId IS NOT NULL AND o.controller IS NOT NULL "
+    "AND r.name = $room_name "
+    "RETURN o.name, o.controller, o.controllerId")
+
+
+def point_names_query(equip_id, equip_type, point_labels, **kwargs):
+    """
+    Returns query and parameters to get (point label, point name) of points of an equipment
+    that have one of the given point labels
+    """
+    # possible sql injection issue but no way to send parameterized query for labels ?!
+    ## TODO: validate point_label, equip_id for valid characters length?
+    db_type = equip_type_db_label_map[equip_type]
+    if equip_type in ["lighting", "occupancy_detector"]:
+        # TODO- is equip id unique globally- i.e. across rooms and controllers? If so
+        #  we could get rid of the special query with additional room match
+        room_id = kwargs.get("room_id")
+        if not room_id:
+            raise ValueError(f"No room_id provided for equip_type {equip_type}")
+        _query = (f"MATCH (p:Point)-[:isPointOf]->(e:{db_type})-[:hasLocation]->(r:Room) "
+                  f"WHERE e.name STARTS WITH $equip_id AND r.name=$room_id "
+                  f"AND any(label in labels(p) WHERE label IN $point_labels) "
+                  "RETURN labels(p)[1],  p.name;")
+        return _query, {'equip_id': equip_id, 'room_id': room_id, 'point_labels': point_labels}
+    _query = (f"MATCH (p:Point)-[:isPointOf]->(e:{db_type}"
+              "{name: $equip_id}) "
+              "WHERE any(label in labels(p) WHERE label IN $point_labels) "
+              "RETURN labels(p)[1],  p.name;")
+    return _query, {'equip_id': equip_id, 'point_labels': point_labels}
+
+
+def registry_points_query(equip_id, equip_type, **kwargs):
+    """
+    Returns query and parameters to get the point details needed for a bacnet registry config -
+    BACnet Object Name, name, units, type, BACnet Object Identifier
+    """
+    db_type = equip_type_db_label_map[equip_type]
+    if equip_type in ["lighting", "occupancy_detector"]:
+        # TODO- is equip id unique globally- i.e. across rooms and controllers? If so
+        #  we could get rid of the special query with additional room match
+        room_id = kwargs.get("room_id")
+        if not room_id:
+            raise ValueError(f"No room_id provided for equip_type {equip_type}")
+        _query = (f"MATCH (p:Point)-[:isPointOf]->(e:{db_type})-[:hasLocation]->(r:Room) "
+                  f"WHERE e.name STARTS WITH $equip_id AND r.name=$room_id "
+                  "RETURN p.`BACnet Object Name`, p.name, p.units, p.type, p.`BACnet Object "
+                  "Identifier`;")
+        return _query, {'equip_id': equip_id, 'room_id': room_id}
+    # default query only based on equip type label and equip id
+    _query = (f"MATCH (p:Point)-[:isPointOf]->(e:{db_type}) "
+              f"WHERE e.name = $equip_id "
+              "RETURN p.`BACnet Object Name`, p.name, p.units, p.type, p.`BACnet Object "
+              "Identifier`;")
+    return _query, {'equip_id': equip_id}
+
+
+def query_ahu_vav_topology(connection):
+    """
+    Query all AHUs and VAVs in a single pass. Returns one row per equipment (and controller)
+    with the keys equip_type ('ahu' or 'vav'), name, trunk_id, device_address, device_id and
+    ahu. ahu is the name of the AHU that feeds the VAV and is None for AHUs and for VAVs that
+    are not fed by any AHU. device_address and device_id are None if the equipment is not
+    controlled by a Bacnet Controller
+    """
+    return connection.query(AHU_VAV_TOPOLOGY_QUERY)
+
+def query_ahus(connection):
+    result = connection.query(AHUS_QUERY)
+    return [r[0] for r in result]
+
 def query_point_name(equip_id, equip_type, point_labels, connection):
     if isinstance(point_labels, str):
         point_labels = [point_labels]
@@ -41,62 +164,28 @@ def query_point_name(equip_id, equip_type, point_labels, connection):
     return None
 
 def query_lights_from_room(connection):
-    # Only get lights where there is valid controller ip and controller id\
-    # TODO- update query once controller is broken into a separate node similar to VAVs
-    query = ("MATCH (l:Luminaire)-[:hasLocation]->(r:Room) "
-             "WHERE l.controllerId IS NOT NULL AND l.controller IS NOT NULL "
-             "RETURN r.name, l.name, l.controller, l.controllerId")
-    return connection.query(query)
+    return connection.query(LIGHTS_FROM_ROOM_QUERY)
 
 def query_occupancy_detector(room_id, connection):
-    query = ("MATCH (o:OccupancyDetector)-[:hasLocation]->(r:Room) "
-             "WHERE o.controllerId IS NOT NULL AND o.controller IS NOT NULL "
-             "AND r.name = $room_name "
-             "RETURN o.name, o.controller, o.controllerId")
-    result =connection.query(query, parameters={"room_name": room_id})
+    result =connection.query(OCCUPANCY_DETECTOR_QUERY, parameters={"room_name": room_id})
     if result:
         return result[0][0], result[0][1], result[0][2]
     return None, None, None
 
 
 def query_point_names(equip_id, equip_type, point_labels, connection, **kwargs):
-    # possible sql injection issue but no way to send parameterized query for labels ?!
-    ## TODO: validate point_label, equip_id for valid characters length?
-    db_type = equip_type_db_label_map[equip_type]
-    _query = (f"MATCH (p:Point)-[:isPointOf]->(e:{db_type}"
-              "{name: $equip_id}) "
-              "WHERE any(label in labels(p) WHERE label IN $point_labels) "
-              "RETURN labels(p)[1],  p.name;")
-    query_parameters = {'equip_id':equip_id, 'point_labels':point_labels}
-    if equip_type == "lighting":
-        # TODO- is equip id unique globally- i.e. across rooms and controllers? If so
-        #  we could get rid of the special query with additional room match
-        room_id = kwargs.get("room_id")
-        if not room_id:
-            raise ValueError("No room_id provided for equip_type lighting")
-        _query = (f"MATCH (p:Point)-[isPointOf]->(e:{db_type})-[:hasLocation]->(r:Room) "
-                  f"WHERE e.name STARTS WITH $equip_id AND r.name=$room_id "
-                  f"AND any(label in labels(p) WHERE label IN $point_labels) "
-                  "RETURN labels(p)[1],  p.name;")
-        query_parameters = {'equip_id': equip_id, 'room_id': room_id, 'point_labels':point_labels}
-    elif equip_type == "occupancy_detector":
-        # TODO- is equip id unique globally- i.e. across rooms and controllers? If so
-        #  we could get rid of the special query with additional room match
-        room_id = kwargs.get("room_id")
-        if not room_id:
-            raise ValueError("No room_id provided for equip_type occupancy_detector")
-        _query = (f"MATCH (p:Point)-[isPointOf]->(e:{db_type})-[:hasLocation]->(r:Room) "
-                  f"WHERE e.name STARTS WITH $equip_id AND r.name=$room_id "
-                  f"AND any(label in labels(p) WHERE label IN $point_labels) "
-                  "RETURN labels(p)[1],  p.name;")
-        query_parameters = {'equip_id': equip_id, 'room_id': room_id, 'point_labels':point_labels}
-
+    _query, query_parameters = point_names_query(equip_id, equip_type, point_labels, **kwargs)
     result = connection.query(_query, parameters=query_parameters)
     if result:
         return result
     return None
 
 
+def query_registry_points(equip_id, equip_type, connection, **kwargs):
+    _query, query_parameters = registry_points_query(equip_id, equip_type, **kwargs)
+    return connection.query(_query, query_parameters)
+
+
 def query_points_for_equip(equip_id, equip_type, interested_point_types, point_meta_map,
                            connection, **kwargs):
     result_dict = {}
@@ -119,4 +208,46 @@ def query_points_for_equip(equip_id, equip_type, interested_point_types, point_m
                 if label_name_map.get(l):
                     result_dict[key] = label_name_map[l]
                     break
-    return result_dict
\ No newline at end of file
+    return result_dict
+
+class Neo4jGraph:
+    """
+    BRICK graph in a neo4j db. Has the same methods as file.brick_graph.BrickGraph so that the
+    ucsd_brick config generators run the same code against either data store
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def ahu_vav_topology(self):
+        return query_ahu_vav_topology(self.connection)
+
+    def ahus(self):
+        return query_ahus(self.connection)
+
+    def lights_by_room(self):
+        return query_lights_from_room(self.connection)
+
+    def occupancy_detector(self, room_id):
+        return query_occupancy_detector(room_id, self.connection)
+
+    def point_names(self, equip_id, equip_type, point_labels, **kwargs):
+        return query_point_names(equip_id, equip_type, point_labels, self.connection, **kwargs)
+
+    def points_for_equip(self, equip_id, equip_type, interested_point_types, point_meta_map,
+                         **kwargs):
+        return query_points_for_equip(equip_id, equip_type, interested_point_types,
+                                      point_meta_map, self.connection, **kwargs)
+
+    def registry_points(self, equip_id, equip_type, **kwargs):
+        return query_registry_points(equip_id, equip_type, self.connection, **kwargs)
+
+
+def load_graph(metadata):
+    """
+    Connect to the neo4j db in the data store metadata (connection_params)
+    """
+    connect_params = metadata.get("connection_params")
+    connection = Neo4jConnection(connect_params["uri"], connect_params["user"],
+                                 connect_params["password"], connect_params["database"])
+    return Neo4jGraph(connection)
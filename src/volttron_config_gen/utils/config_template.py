@@ -0,0 +1,79 @@
+import re
+
+_placeholder_re = re.compile(r'\{[A-Za-z_]\w*\}')
+
+# matches any key of a dict or index of a list in a mutable path
+ANY = "*"
+
+
+class CompiledTemplate:
+    """
+    Config template analyzed once so that rendering the config of a device copies only the
+    parts of the template that are updated for each device, instead of a deepcopy of the whole
+    template. Everything else is shared between the rendered configs and the template, so
+    callers should only update rendered configs along the mutable paths.
+
+    A mutable path is a sequence of dict keys/list indices (or ANY) from the root of the
+    template to a container whose items are updated per device. Every container on the path is
+    copied (shallow) on render. The root is always copied. In addition to the given
+    mutable_paths, the following are detected from the template:
+        1. containers of string values with format placeholders such as {device_id} and {obj_name}
+        2. "field" dicts of structured queries whose property is device_id
+        3. "point_mapping" dicts
+    """
+
+    def __init__(self, template, mutable_paths=None):
+        self.template = template
+        self.mutable_paths = [tuple(p) for p in mutable_paths or []]
+        self.mutable_paths.extend(find_mutable_paths(template))
+        # merge paths into a tree of keys so that each container is copied once
+        self._copy_tree = dict()
+        for path in self.mutable_paths:
+            node = self._copy_tree
+            for key in path:
+                node = node.setdefault(key, dict())
+
+    def render(self):
+        """
+        Returns a new config for a device
+        """
+        return _copy_along(self.template, self._copy_tree)
+
+
+def find_mutable_paths(template, path=()):
+    paths = []
+    if isinstance(template, dict):
+        items = template.items()
+        field = template.get("field")
+        if isinstance(field, dict) and field.get("property") == "device_id":
+            paths.append(path + ("field",))
+    elif isinstance(template, list):
+        items = enumerate(template)
+    else:
+        return paths
+    for key, value in items:
+        if key == "point_mapping" and isinstance(value, dict):
+            paths.append(path + (key,))
+        elif isinstance(value, str) and _placeholder_re.search(value):
+            paths.append(path)
+        else:
+            paths.extend(find_mutable_paths(value, path + (key,)))
+    return paths
+
+
+def _copy_along(value, copy_tree):
+    if isinstance(value, dict):
+        result = dict(value)
+        keys = result.keys()
+    elif isinstance(value, list):
+        result = list(value)
+        keys = range(len(result))
+    else:
+        return value
+    for key, subtree in copy_tree.items():
+        if key == ANY:
+            for k in keys:
+                result[k] = _copy_along(result[k], subtree)
+        elif key in keys:
+            result[key] = _copy_along(result[key], subtree)
+    return result
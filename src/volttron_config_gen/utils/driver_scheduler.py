@@ -0,0 +1,158 @@
+import heapq
+import math
+
+DEFAULT_SCRAPE_WINDOW = 60
+
+
+class DriverSchedule:
+    """
+    Driver group of each device and the platform driver scrape settings planned by
+    DriverGroupScheduler
+    """
+
+    def __init__(self, scrape_window, device_groups, group_points, group_devices, trunk_points,
+                 trunk_requests, driver_scrape_interval, group_offset_interval):
+        self.scrape_window = scrape_window
+        self.device_groups = device_groups
+        self.group_points = group_points
+        self.group_devices = group_devices
+        self.trunk_points = trunk_points
+        self.trunk_requests = trunk_requests
+        self.driver_scrape_interval = driver_scrape_interval
+        self.group_offset_interval = group_offset_interval
+
+    def get_group(self, device, default=None):
+        return self.device_groups.get(device, default)
+
+    def agent_config(self):
+        """
+        Returns scrape settings for the platform driver agent config
+        """
+        return {"driver_scrape_interval": self.driver_scrape_interval,
+                "group_offset_interval": self.group_offset_interval}
+
+    def requests_per_second_by_trunk(self):
+        """
+        Returns expected BACnet read requests per second on each trunk, if the devices on the
+        trunk are scraped once every scrape window
+        """
+        return {trunk: round(requests / self.scrape_window, 3)
+                for trunk, requests in self.trunk_requests.items()}
+
+    def to_dict(self):
+        requests_per_second = self.requests_per_second_by_trunk()
+        return {
+            "scrape_window": self.scrape_window,
+            "driver_scrape_interval": self.driver_scrape_interval,
+            "group_offset_interval": self.group_offset_interval,
+            "groups": {str(group): {"devices": self.group_devices[group],
+                                    "points": self.group_points[group]}
+                       for group in range(len(self.group_points))},
+            "trunks": {str(trunk): {"points": self.trunk_points[trunk],
+                                    "requests": self.trunk_requests[trunk],
+                                    "requests_per_second": requests_per_second[trunk]}
+                       for trunk in self.trunk_points},
+            "device_groups": {f"{equip_type}/{equip_id}": group
+                              for (equip_type, equip_id), group in self.device_groups.items()}
+        }
+
+
+class DriverGroupScheduler:
+    """
+    Assigns platform driver groups so that every group has about the same number of registry
+    points to read in a scrape window.
+
+    The platform driver scrapes the groups in parallel, group n starting
+    n * group_offset_interval seconds after group 0, and the devices within a group one after
+    the other, driver_scrape_interval seconds apart. Devices are assigned largest first to the
+    group with the fewest points so far (then the fewest devices). driver_scrape_interval spreads
+    the devices of the largest group across the scrape window and group_offset_interval, unless
+    given, staggers the start of the groups evenly within one driver_scrape_interval so that
+    scrapes of different groups don't start at the same time.
+
+    Devices are identified by (equip_type, equip_id). trunk is the network (for example BACnet
+    MS/TP trunk) the device is on and is only used to report the expected load on each trunk.
+    max_per_request is the number of points the driver reads in one request, so a device with
+    n points takes ceil(n/max_per_request) requests to scrape.
+    """
+
+    def __init__(self, groups, scrape_window=DEFAULT_SCRAPE_WINDOW, group_offset_interval=None,
+                 max_per_request=1):
+        if not isinstance(groups, int) or groups < 1:
+            raise ValueError(f"Invalid number of driver groups {groups}. Should be an integer "
+                             f"greater than 0")
+        if not isinstance(scrape_window, (int, float)) or scrape_window <= 0:
+            raise ValueError(f"Invalid scrape_window {scrape_window}. Should be number of "
+                             f"seconds greater than 0")
+        if group_offset_interval is not None and (
+                not isinstance(group_offset_interval, (int, float)) or group_offset_interval < 0):
+            raise ValueError(f"Invalid group_offset_interval {group_offset_interval}. Should be "
+                             f"number of seconds")
+        self.groups = groups
+        self.scrape_window = scrape_window
+        self.group_offset_interval = group_offset_interval
+        self.max_per_request = max(1, max_per_request or 1)
+        self.devices = dict()
+
+    def add_device(self, equip_type, equip_id, point_count, trunk=None):
+        self.devices[(equip_type, equip_id)] = (point_count, trunk)
+
+    def schedule(self):
+        """
+        Returns DriverSchedule for the devices added
+        """
+        group_points = [0] * self.groups
+        group_devices = [0] * self.groups
+        # heap of (points, devices, group) so that ties go to the lowest group number
+        heap = [(0, 0, group) for group in range(self.groups)]
+        device_groups = dict()
+        trunk_points = dict()
+        trunk_requests = dict()
+        # largest first. device id breaks ties so that the plan does not depend on the order
+        # devices were added in
+        for device, (points, trunk) in sorted(self.devices.items(),
+                                              key=lambda x: (-x[1][0], x[0])):
+            _, _, group = heapq.heappop(heap)
+            device_groups[device] = group
+            group_points[group] += points
+            group_devices[group] += 1
+            heapq.heappush(heap, (group_points[group], group_devices[group], group))
+            trunk_points[trunk] = trunk_points.get(trunk, 0) + points
+            trunk_requests[trunk] = (trunk_requests.get(trunk, 0) +
+                                     math.ceil(points / self.max_per_request))
+
+        driver_scrape_interval = round(self.scrape_window / (max(group_devices) + 1), 3)
+        group_offset_interval = self.group_offset_interval
+        if group_offset_interval is None:
+            group_offset_interval = round(driver_scrape_interval / self.groups, 3)
+        # device_groups in the order devices were added, so that the report is easier to read
+        device_groups = {device: device_groups[device] for device in self.devices}
+        trunk_points = dict(sorted(trunk_points.items(), key=lambda x: str(x[0])))
+        trunk_requests = {trunk: trunk_requests[trunk] for trunk in trunk_points}
+        return DriverSchedule(self.scrape_window, device_groups, group_points, group_devices,
+                              trunk_points, trunk_requests, driver_scrape_interval,
+                              group_offset_interval)
+
+
+def get_driver_group_scheduler(config_dict, default_groups,
+                               default_scrape_window=DEFAULT_SCRAPE_WINDOW, max_per_request=1):
+    """
+    Returns DriverGroupScheduler for the optional driver_group_schedule configuration of a driver
+    config generator, None if it is not configured. driver_group_schedule is either true or an
+    object with optional groups, scrape_window and group_offset_interval. Defaults are used for
+    the ones that are not configured
+    """
+    schedule_config = config_dict.get("driver_group_schedule")
+    if not schedule_config:
+        return None
+    if schedule_config is True:
+        schedule_config = dict()
+    elif not isinstance(schedule_config, dict):
+        raise ValueError(f"Invalid driver_group_schedule {schedule_config}. Should be true or "
+                         f"a json object with optional groups, scrape_window and "
+                         f"group_offset_interval")
+    return DriverGroupScheduler(schedule_config.get("groups", default_groups),
+                                scrape_window=schedule_config.get("scrape_window",
+                                                                  default_scrape_window),
+                                group_offset_interval=schedule_config.get("group_offset_interval"),
+                                max_per_request=max_per_request)
@@ -1,3 +1,7 @@
+import hashlib
+import json
+import os
+
 import pandas
 
 # Air Handler EquipmentClassID
@@ -16,14 +20,214 @@ ELEC_METER_ID = 32
 
 ELEC_MTR_POWER_POINT_ID = 235
 
+# EquipClassIDs used by the config generators
+EDO_EQUIP_CLASS_IDS = [AHU_ID, DOAS_ID, RTU_ID, VAV_ID, VAV_REHEAT_ID, ELEC_METER_ID]
+
+# Number of csv rows parsed at a time when filtering on read
+EDO_CHUNK_SIZE = 200000
+
+# Columns used by the config generators and their types. Ids are nullable integers so that
+# missing parent ids don't turn the id columns into float64. Equipment names repeat for every
+# point of the equipment, so they are stored as categories
+EDO_COLUMN_TYPES = {
+    'EquipClassID': 'Int64',
+    'EquipmentID': 'Int64',
+    'EquipName': 'category',
+    'ParentEquipID': 'Int64',
+    'PointName': 'object',
+    'PointClassID': 'Int64'
+}
+
+# The C parser is several times slower when it creates nullable integer columns. It parses
+# ids as float64 and columns are converted to EDO_COLUMN_TYPES afterwards
+_C_PARSER_COLUMN_TYPES = {column: "float64" if column_type == "Int64" else "object"
+                          for column, column_type in EDO_COLUMN_TYPES.items()}
+
+
+def create_edo_dataframe(csv_file_path: str, use_cache: bool = True,
+                         row_filter: dict = None) -> pandas.DataFrame:
+    """
+    Read the columns in EDO_COLUMN_TYPES from the EDO points csv export. If row_filter is
+    provided (see get_row_filter), the csv is read in chunks and only the matching rows are
+    kept. If use_cache is True, the parsed dataframe is cached in feather format next to the csv
+    file, one file per row_filter, and later calls with the same row_filter read the cache
+    instead of parsing the csv again, as long as the csv file has not changed. Caching is
+    skipped if pyarrow is not installed or the cache can't be written
+    """
+    cache_key = None
+    if use_cache:
+        df = read_edo_cache(csv_file_path, row_filter)
+        if df is not None:
+            return df
+        # key of the csv as it is before parsing, so that a csv that changes while it is parsed
+        # is not cached under the key of its new content
+        cache_key = _cache_key(csv_file_path, row_filter)
+    if row_filter:
+        df = read_edo_csv_filtered(csv_file_path, row_filter)
+    else:
+        df = read_edo_csv(csv_file_path)
+    if use_cache:
+        write_edo_cache(csv_file_path, df, row_filter, cache_key)
+    return df
 
-def create_edo_dataframe(csv_file_path: str) -> pandas.DataFrame:
+
+def read_edo_csv(csv_file_path: str) -> pandas.DataFrame:
+    """
+    Parse the EDO points csv. Uses the multithreaded pyarrow csv parser when pyarrow is
+    installed and falls back to pandas' default C parser otherwise
+    """
     try:
-        return pandas.read_csv(
-            csv_file_path,
-            usecols=['EquipClassID', 'EquipmentID', 'EquipName', 'ParentEquipID', 'PointName', 'PointClassID'])
-    except Exception:
-        raise
+        return pandas.read_csv(csv_file_path, engine="pyarrow", usecols=list(EDO_COLUMN_TYPES),
+                               dtype=EDO_COLUMN_TYPES)
+    except ImportError:
+        df = pandas.read_csv(csv_file_path, usecols=list(EDO_COLUMN_TYPES),
+                             dtype=_C_PARSER_COLUMN_TYPES)
+        return df.astype(EDO_COLUMN_TYPES)
+
+
+def get_row_filter(metadata: dict, equip_class_ids: list = None, equip_ids: list = None):
+    """
+    Returns the row filter for create_edo_dataframe based on the data store metadata or None if
+    metadata does not ask for filtering. Filtering is enabled by "filter_on_read": true and/or
+    "site_column" and "site". Rows are kept if their EquipClassID is in EDO_EQUIP_CLASS_IDS or
+    equip_class_ids, or their EquipmentID is in equip_ids, and, if site_column is configured,
+    the value of site_column is site
+    """
+    site_column = metadata.get("site_column")
+    if not metadata.get("filter_on_read") and not site_column:
+        return None
+    if site_column and metadata.get("site") is None:
+        raise ValueError("metadata.site_column is configured without metadata.site")
+    class_ids = set(EDO_EQUIP_CLASS_IDS)
+    class_ids.update(int(x) for x in equip_class_ids or [] if x)
+    return {"equip_class_ids": sorted(class_ids),
+            "equip_ids": sorted(int(x) for x in equip_ids or [] if x),
+            "site_column": site_column,
+            "site": str(metadata["site"]) if site_column else None}
+
+
+def read_edo_csv_filtered(csv_file_path: str, row_filter: dict,
+                          chunksize: int = EDO_CHUNK_SIZE) -> pandas.DataFrame:
+    """
+    Parse the EDO points csv EDO_CHUNK_SIZE rows at a time and keep only the rows that match
+    row_filter, so that memory used depends only on the number of relevant rows
+    """
+    usecols = list(EDO_COLUMN_TYPES)
+    # categories are created once after all the chunks are read
+    dtype = dict(_C_PARSER_COLUMN_TYPES)
+    site_column = row_filter.get("site_column")
+    if site_column:
+        usecols.append(site_column)
+        dtype[site_column] = "str"
+    chunks = []
+    with pandas.read_csv(csv_file_path, usecols=usecols, dtype=dtype,
+                         chunksize=chunksize) as reader:
+        for chunk in reader:
+            mask = chunk['EquipClassID'].isin(row_filter["equip_class_ids"])
+            if row_filter.get("equip_ids"):
+                mask |= chunk['EquipmentID'].isin(row_filter["equip_ids"])
+            if site_column:
+                mask &= chunk[site_column] == row_filter["site"]
+            chunks.append(chunk[mask])
+    if chunks:
+        df = pandas.concat(chunks, ignore_index=True)
+    else:
+        df = pandas.DataFrame({c: pandas.Series(dtype=t) for c, t in dtype.items()})
+    if site_column:
+        df = df.drop(columns=site_column)
+    return df.astype(EDO_COLUMN_TYPES)
+
+
+# schema metadata key of the feather cache that holds the key of the csv it was created from
+_CACHE_KEY_METADATA = b"edo_cache_key"
+
+
+def _cache_path(csv_file_path, row_filter):
+    # one cache file per row_filter, so that generators that filter rows differently don't
+    # replace each other's cache of the same csv
+    if not row_filter:
+        return csv_file_path + ".feather"
+    digest = hashlib.sha256(json.dumps(row_filter, sort_keys=True).encode()).hexdigest()[:16]
+    return f"{csv_file_path}.{digest}.feather"
+
+
+def _file_sha256(file_path):
+    sha = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def _cache_key(csv_file_path, row_filter, sha256=None):
+    stat = os.stat(csv_file_path)
+    return {"size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": sha256 if sha256 else _file_sha256(csv_file_path),
+            "column_types": EDO_COLUMN_TYPES,
+            "row_filter": row_filter}
+
+
+def read_edo_cache(csv_file_path: str, row_filter: dict = None):
+    """
+    Returns the cached dataframe of csv_file_path or None if there is no valid cache. Cache is
+    valid if it was created with the same row_filter and the csv file has the same size and
+    modification time as when the cache was written. If only the modification time differs
+    (for example the file was copied or touched), the file's sha256 is compared
+    """
+    cache_path = _cache_path(csv_file_path, row_filter)
+    try:
+        # pyarrow is needed for feather files
+        from pyarrow import feather
+        # the key is in the schema metadata of the same file as the data, so the two are
+        # always read from the same version of the cache
+        table = feather.read_table(cache_path)
+        key = json.loads((table.schema.metadata or {})[_CACHE_KEY_METADATA])
+        stat = os.stat(csv_file_path)
+    except (ImportError, OSError, KeyError, ValueError):
+        return None
+    if (key.get("column_types") != EDO_COLUMN_TYPES or key.get("row_filter") != row_filter
+            or key.get("size") != stat.st_size):
+        return None
+    if key.get("mtime_ns") != stat.st_mtime_ns:
+        if key.get("sha256") != _file_sha256(csv_file_path):
+            return None
+        try:
+            # same content. update modification time so that the next check doesn't need sha256
+            _write_cache_table(cache_path, table,
+                               _cache_key(csv_file_path, row_filter, key["sha256"]))
+        except OSError:
+            pass
+    return table.to_pandas()
+
+
+def write_edo_cache(csv_file_path: str, df: pandas.DataFrame, row_filter: dict = None,
+                    cache_key: dict = None):
+    """
+    Cache df, parsed from csv_file_path. cache_key should be taken before the csv was read. If
+    it is not given, the key of the csv file as it is now is used
+    """
+    cache_path = _cache_path(csv_file_path, row_filter)
+    try:
+        import pyarrow
+        _write_cache_table(cache_path, pyarrow.Table.from_pandas(df),
+                           cache_key or _cache_key(csv_file_path, row_filter))
+    except (ImportError, OSError, ValueError) as e:
+        print(f"Unable to cache {csv_file_path} in {cache_path}. {e}")
+
+
+def _write_cache_table(cache_path, table, key):
+    from pyarrow import feather
+    metadata = dict(table.schema.metadata or {})
+    metadata[_CACHE_KEY_METADATA] = json.dumps(key).encode()
+    # write to a temporary file and rename so that concurrent readers never see a partial file
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        feather.write_feather(table.replace_schema_metadata(metadata), tmp_path)
+        os.replace(tmp_path, cache_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
 
 
 def get_ahus_and_points(df: pandas.DataFrame):
@@ -36,7 +240,85 @@ def get_vavs_and_points(df: pandas.DataFrame):
     return vav_points.groupby('EquipmentID').nth(0), vav_points
 
 
-def get_power_meter_point(df: pandas.DataFrame, equip_class_id=None):
+def get_vav_parent_ids(ahus: pandas.DataFrame, vavs: pandas.DataFrame) -> pandas.Series:
+    """
+    Returns ParentEquipID of each vav as nullable Int64. Value is NA if the vav has no
+    ParentEquipID or if its ParentEquipID is not one of the ahus
+    """
+    parent_ids = vavs['ParentEquipID'].astype('Int64')
+    return parent_ids.where(parent_ids.isin(ahus['EquipmentID']))
+
+
+def get_ahu_vav_mapping(ahus: pandas.DataFrame, vavs: pandas.DataFrame) -> dict:
+    """
+    Returns dict of AHU EquipmentID -> list of EquipmentIDs of the VAVs whose ParentEquipID is
+    that AHU, in the order of rows in ahus and vavs. VAVs without a valid ParentEquipID are
+    listed under the key ""
+    """
+    parent_ids = get_vav_parent_ids(ahus, vavs)
+    fed = parent_ids.notna().to_numpy()
+    ahu_vav_mapping = {ahu_id: [] for ahu_id in ahus['EquipmentID'].tolist()}
+    for ahu_id, vav_ids in vavs['EquipmentID'][fed].groupby(parent_ids[fed], sort=False):
+        ahu_vav_mapping[ahu_id] = vav_ids.tolist()
+    ahu_vav_mapping[""] = vavs['EquipmentID'][~fed].tolist()
+    return ahu_vav_mapping
+
+
+def get_equip_id_name_map(df: pandas.DataFrame) -> dict:
+    """
+    Returns dict of EquipmentID -> EquipName for the rows in df
+    """
+    return dict(zip(df['EquipmentID'].tolist(), df['EquipName'].tolist()))
+
+
+def get_device_ids(df: pandas.DataFrame) -> dict:
+    """
+    Returns dict of EquipmentID -> device id. Device id is the first token of the first PointName
+    of the equipment that has the format <device id>:<object>:<name>. Equipment without such a
+    point are not included
+    """
+    point_names = df['PointName']
+    has_device_id = (point_names.str.count(':') == 2).fillna(False).astype(bool)
+    device_ids = point_names[has_device_id].str.split(':', n=1).str[0]
+    return device_ids.groupby(df['EquipmentID'][has_device_id], sort=False).first().to_dict()
+
+
+def first_point_names(points: pandas.DataFrame, point_meta_field: str = 'PointClassID') -> dict:
+    """
+    Index of the first point of each (EquipmentID, point_meta_field value) pair. Returns dict of
+    (EquipmentID, point class) -> (row position, PointName). Row position is kept so that
+    lookup_point_name can pick the first matching row when more than one point class is
+    configured, same as a df.query on all the point classes
+    """
+    points = points.reset_index(drop=True)
+    first = points.drop_duplicates(['EquipmentID', point_meta_field])
+    return {(equip_id, point_class): (position, point_name)
+            for position, equip_id, point_class, point_name in zip(
+                first.index, first['EquipmentID'], first[point_meta_field], first['PointName'])}
+
+
+def lookup_point_name(point_names: dict, equip_id, point_classes) -> str:
+    """
+    Returns the name of the first point of equip_id that has one of the point_classes or
+    empty string if there is no such point. point_names is the index built by first_point_names
+    """
+    if not isinstance(point_classes, list):
+        point_classes = [point_classes]
+    matches = [point_names[(equip_id, c)] for c in point_classes if (equip_id, c) in point_names]
+    if matches:
+        return min(matches)[1]
+    return ""
+
+
+def get_class_index(df: pandas.DataFrame) -> dict:
+    """
+    Returns dict of (EquipClassID, PointClassID) -> numpy array of the positions of rows in df
+    with those class ids, in row order
+    """
+    return df.groupby(['EquipClassID', 'PointClassID'], sort=False).indices
+
+
+def get_power_meter_point(df: pandas.DataFrame, equip_class_id=None, class_index: dict = None):
     # Based on current assumption.
     # Waiting on clarification from Easan
     # Question sent:
@@ -46,13 +328,12 @@ def get_power_meter_point(df: pandas.DataFrame, equip_class_id=None):
     # Out of all the electric meters and sub meters could I assume that the equipment with a point that has
     # point class id=235, point class name=Mtr Power, is the one that represents the whole building power meter.
     # This narrows it down to single equipment for morris_ctr and catalysts_points.
+    # Returns the first such point's row or None
     if not equip_class_id:
         equip_class_id = ELEC_METER_ID
-    power_meter_points = df.query(f'EquipClassID == {equip_class_id}')
-    for index, row in power_meter_points.iterrows():
-        if row['PointClassID'] == ELEC_MTR_POWER_POINT_ID:
-            return row
-    return None
-
-
-
+    if class_index is None:
+        class_index = get_class_index(df)
+    positions = class_index.get((int(equip_class_id), ELEC_MTR_POWER_POINT_ID))
+    if positions is None or len(positions) == 0:
+        return None
+    return df.iloc[positions[0]]
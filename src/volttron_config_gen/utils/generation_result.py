@@ -0,0 +1,65 @@
+class ConfigGenerationError(ValueError):
+    """
+    Raised when configurations can't be generated at all, for example when the ILC pairwise
+    criteria fail validation
+    """
+    pass
+
+
+class GenerationResult:
+    """
+    Result of a config generator run, returned by generate() of the config generators.
+
+    files - paths of all generated files (member paths if output is a bundle)
+    config_metadata - content of config_metadata.json. Empty for driver configs
+    unmapped_device_details - details of devices for which configs could not be generated
+    error_file - path of the file unmapped_device_details was written to, if any
+    changes - added, changed and removed files compared to the previous run, if there is an
+              output manifest
+    error - exception that stopped generation. Set only by generate_batch
+    driver_schedule - driver groups, scrape intervals and expected requests per second on each
+                      trunk (see DriverSchedule.to_dict), if driver groups were scheduled
+    """
+
+    def __init__(self, agent, output_dir):
+        self.agent = agent
+        self.output_dir = output_dir
+        self.files = []
+        self.config_metadata = dict()
+        self.unmapped_device_details = dict()
+        self.error_file = None
+        self.changes = None
+        self.error = None
+        self.driver_schedule = None
+        self.start_time = None
+        self.end_time = None
+
+    @property
+    def success(self):
+        return self.error is None and not self.unmapped_device_details
+
+    @property
+    def exit_code(self):
+        return 0 if self.success else 1
+
+    @property
+    def duration(self):
+        if self.start_time is None or self.end_time is None:
+            return None
+        return self.end_time - self.start_time
+
+    def to_dict(self):
+        duration = self.duration
+        return {"agent": self.agent,
+                "output_dir": self.output_dir,
+                "success": self.success,
+                "files": self.files,
+                "config_metadata": self.config_metadata,
+                "unmapped_device_details": self.unmapped_device_details,
+                "error_file": self.error_file,
+                "changes": self.changes,
+                "error": str(self.error) if self.error is not None else None,
+                "driver_schedule": self.driver_schedule,
+                "start_time": self.start_time.isoformat() if self.start_time else None,
+                "end_time": self.end_time.isoformat() if self.end_time else None,
+                "duration_seconds": duration.total_seconds() if duration is not None else None}
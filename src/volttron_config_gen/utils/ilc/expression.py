@@ -0,0 +1,142 @@
+import re
+from functools import lru_cache
+
+# numbers are matched before names so that the exponent of 1e5 is not taken as a name
+_token_re = re.compile(
+    r'(?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)|(?P<name>[A-Za-z_]\w*)|(?P<other>.)',
+    re.DOTALL)
+
+
+class Expression:
+    """
+    Condition or operation from an ILC control or criteria config template, for example
+    "(CoolingOutputPercent>10) & (Eq(OccupancyCommand, 0))", split into names and the text
+    between them. Point names are substituted with substitute(mapping), in one pass, and only
+    where a whole name matches, so that a point name that is part of another one, such as
+    ZoneAirFlow in ZoneAirFlowSetpoint, is never replaced by mistake and a substituted name is
+    never substituted again. Everything else, including whitespace, is kept as is.
+
+    Use parse_expression to get the cached Expression of a template string.
+    """
+
+    def __init__(self, text):
+        self.text = text
+        # text split into parts. names are at the positions in self._name_positions, text
+        # between names is merged into one part
+        self._parts = []
+        self._name_positions = []
+        other = []
+        for match in _token_re.finditer(text):
+            if match.lastgroup == "name":
+                if other:
+                    self._parts.append("".join(other))
+                    other = []
+                self._name_positions.append((len(self._parts), match.group()))
+                self._parts.append(match.group())
+            else:
+                other.append(match.group())
+        if other:
+            self._parts.append("".join(other))
+        self.names = frozenset(name for _, name in self._name_positions)
+
+    def substitute(self, mapping):
+        """
+        Returns text with every name that is a key of mapping replaced by its value
+        """
+        if len(self._parts) == 1 and self._name_positions:
+            # just a point name, for example AVG(DimmingLevelOutput)
+            name = self._parts[0]
+            value = mapping.get(name)
+            return name if value is None else value
+        parts = self._parts.copy()
+        for position, name in self._name_positions:
+            value = mapping.get(name)
+            if value is not None:
+                parts[position] = value
+        return "".join(parts)
+
+
+@lru_cache(maxsize=4096)
+def parse_expression(text):
+    """
+    Returns Expression for text. Expressions are cached, so each condition or operation of a
+    template is parsed once however many devices it is rendered for
+    """
+    return Expression(text)
+
+
+class AggregateExpression:
+    """
+    Condition or operation of a lighting template that aggregates a point of all the lights in
+    a room, SUM(expression) or AVG(expression) optionally followed by more of the condition,
+    for example "AVG(DimmingLevelOutput) > 70". expand() writes the aggregate out for the
+    lights of a room as (expression of light 1 + expression of light 2 ...), divided by the
+    number of lights for AVG.
+
+    Use parse_aggregate to get the cached AggregateExpression of a template string.
+    """
+
+    def __init__(self, function, inner, rest):
+        self.function = function
+        self.inner = inner
+        self.rest = rest
+
+    def expand(self, mapping, device_mappings):
+        """
+        Returns the aggregate expanded for devices. mapping maps volttron point names to the
+        points of the room, and is used for the rest of the condition. device_mappings has one
+        mapping per device, of volttron point names to the point names of that device
+        """
+        # may be not a single point name but an expression. enclose in ()
+        enclose = self.inner.substitute(mapping).find(' ') > 0
+        if enclose:
+            terms = [f"({self.inner.substitute(m)})" for m in device_mappings]
+        else:
+            terms = [self.inner.substitute(m) for m in device_mappings]
+        if self.function == "SUM":
+            expanded = "(" + " + ".join(terms) + ")"
+        else:
+            expanded = "((" + " + ".join(terms) + f")/{len(terms)})"
+        return expanded + self.rest.substitute(mapping)
+
+
+def find_closing_parenthesis(s, open_pos):
+    """
+    Returns index of the parenthesis in s that closes the one at open_pos
+    """
+    # Ensure the given position is an opening parenthesis
+    if s[open_pos] != '(':
+        raise ValueError(
+            "The character at the given position is not an opening parenthesis.")
+
+    # Initialize a counter for open parentheses
+    open_count = 1
+
+    # Iterate through the string starting from the next character
+    for i in range(open_pos + 1, len(s)):
+        if s[i] == '(':
+            open_count += 1
+        elif s[i] == ')':
+            open_count -= 1
+
+        # When open_count reaches zero, we found the matching closing parenthesis
+        if open_count == 0:
+            return i
+
+    # If no matching closing parenthesis is found
+    raise ValueError("No matching closing parenthesis found.")
+
+
+@lru_cache(maxsize=4096)
+def parse_aggregate(text):
+    """
+    Returns AggregateExpression for text if it starts with SUM( or AVG(, None otherwise.
+    Cached, so the aggregate is parsed once however many rooms it is expanded for
+    """
+    if not (text.startswith("AVG(") or text.startswith("SUM(")):
+        return None
+    index_open = 3  # index of open paranthesis
+    index_close = find_closing_parenthesis(text, index_open)
+    return AggregateExpression(text[:3],
+                               parse_expression(text[index_open + 1:index_close].strip()),
+                               parse_expression(text[index_close + 1:]))
@@ -62,14 +62,23 @@ BATTELLE for the UNITED STATES DEPARTMENT OF ENERGY
 under Contract DE-AC05-76RL01830
 }}}
 """
-import operator
-from functools import reduce
-import math
 import re
 import os
 from collections import defaultdict
 from json import loads
 
+import numpy as np
+
+# random consistency index by number of criteria n (index). Values for n > 15 use the last one.
+# Consistency index of n <= 2 criteria is always 0, these use 0.3 to avoid dividing by 0
+RANDOM_INDEX = [0, 0, 0, 0.58, 0.9, 1.12, 1.24, 1.32, 1.41, 1.45, 1.49, 1.51, 1.48, 1.56, 1.57,
+                1.59]
+MIN_RANDOM_INDEX = 0.3
+
+def random_index(n):
+    return max(RANDOM_INDEX[min(n, len(RANDOM_INDEX) - 1)], MIN_RANDOM_INDEX)
+
+
 ## these are all volttron functions only for parsing in json file
 _comment_re = re.compile(
     r'((["\'])(?:\\?.)*?\2)|(/\*.*?\*/)|((?:#|//).*?(?=\n|$))',
@@ -150,13 +159,7 @@ def calc_column_sums(criteria_matrix):
     :param criteria_matrix:
     :return:
     """
-    j = 0
-    cumsum = []
-    while j < len(criteria_matrix[0]):
-        col = [float(row[j]) for row in criteria_matrix]
-        cumsum.append(sum(col))
-        j += 1
-    return cumsum
+    return np.asarray(criteria_matrix, dtype=float).sum(axis=0).tolist()
 
 
 def normalize_matrix(criteria_matrix, col_sums):
@@ -167,21 +170,40 @@ def normalize_matrix(criteria_matrix, col_sums):
     :param col_sums:
     :return:
     """
-    normalized_matrix = []
-    row_sums = []
-    i = 0
-    while i < len(criteria_matrix):
-        j = 0
-        norm_row = []
-        while j < len(criteria_matrix[0]):
-            norm_row.append(criteria_matrix[i][j] / (col_sums[j] if col_sums[j] != 0 else 1))
-            j += 1
-        row_sum = sum(norm_row)
-        norm_row.append(row_sum / j)
-        row_sums.append(row_sum / j)
-        normalized_matrix.append(norm_row)
-        i += 1
-    return row_sums
+    col_sums = np.asarray(col_sums, dtype=float)
+    normalized_matrix = (np.asarray(criteria_matrix, dtype=float) /
+                         np.where(col_sums != 0, col_sums, 1))
+    return normalized_matrix.mean(axis=1).tolist()
+
+
+def priority_vector(pairwise_matrix):
+    """
+    Returns priority (weight) of each criteria, the geometric mean of each row of the matrix
+    normalized to add up to 1
+    :param pairwise_matrix:
+    :return:
+    """
+    matrix = np.asarray(pairwise_matrix, dtype=float)
+    # mean of logs instead of n-th root of the product, which overflows for large n
+    with np.errstate(divide="ignore"):
+        roots = np.exp(np.log(matrix).mean(axis=1))
+    return (roots / roots.sum()).tolist()
+
+
+def consistency_ratio(pairwise_matrix, col_sums):
+    """
+    Returns consistency ratio of the matrix, consistency index (lambda_max - n)/(n - 1) divided
+    by the random index of n criteria. lambda_max, the principal eigenvalue of the matrix, is
+    estimated as the sum of column sums weighted by the priority vector
+    :param pairwise_matrix:
+    :param col_sums:
+    :return:
+    """
+    n = len(col_sums)
+    priority_vec = priority_vector(pairwise_matrix)
+    lambda_max = float(np.dot(np.asarray(col_sums, dtype=float), priority_vec))
+    consistency_index = (lambda_max - n) / max(n - 1, 1)
+    return consistency_index / random_index(n)
 
 
 def validate_input(pairwise_matrix, col_sums):
@@ -194,37 +216,10 @@ def validate_input(pairwise_matrix, col_sums):
     :param col_sums:
     :return:
     """
-    # Calculate row products and take the 5th root
     print("Validating matrix")
-    random_index = [0, 0, 0, 0.58, 0.9, 1.12, 1.24, 1.32, 1.41, 1.45, 1.49]
-    roots = []
-    for row in pairwise_matrix:
-        roots.append(math.pow(reduce(operator.mul, row, 1), 1.0 / 5))
-    # Sum the vector of products
-    root_sum = sum(roots)
-    # Calculate the priority vector
-    priority_vec = []
-    for item in roots:
-        priority_vec.append(item / root_sum)
-
-    # Calculate the priority row
-    priority_row = []
-    for i in range(0, len(col_sums)):
-        priority_row.append(col_sums[i] * priority_vec[i])
-
-    # Sum the priority row
-    priority_row_sum = sum(priority_row)
-
-    # Calculate the consistency index
-    ncols = max(len(col_sums) - 1, 1)
-    consistency_index = \
-        (priority_row_sum - len(col_sums)) / ncols
-
-    # Calculate the consistency ratio
-    rindex = max(random_index[len(col_sums)], 0.3)
-    consistency_ratio = consistency_index / rindex
-    print("Inconsistency ratio is: {}".format(consistency_ratio))
-    return (consistency_ratio < 0.2), consistency_ratio
+    ratio = consistency_ratio(pairwise_matrix, col_sums)
+    print("Inconsistency ratio is: {}".format(ratio))
+    return (ratio < 0.2), ratio
 
 
 def build_score(_matrix, weight, priority):
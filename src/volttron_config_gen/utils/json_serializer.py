@@ -0,0 +1,92 @@
+import json
+import re
+
+JSON_BACKENDS = ("auto", "orjson", "json")
+
+# orjson only indents by 2 spaces. Leading spaces of each line are doubled to get the same
+# layout as json.dump(indent=4). Safe because newlines within strings are always escaped
+_indent_re = re.compile(rb'^( +)', re.MULTILINE)
+
+
+def _double_indent(match):
+    return match.group(1) * 2
+
+
+class JsonSerializer:
+    """
+    Serializes generated configurations. Uses orjson when it is installed (backend "auto") or
+    when explicitly requested (backend "orjson"), and the standard library json module
+    otherwise (backend "json"). Objects that orjson can't serialize, such as integers larger
+    than 64 bits, fall back to the json module.
+
+    By default output is indented by 4 spaces, laid out like json.dump(obj, f, indent=4). If
+    compact is True, output has no indentation or whitespace between items, which reduces the
+    size of the configurations loaded into the VOLTTRON config store.
+
+    orjson output is not always byte for byte the same as the json module's.
+    orjson writes NaN and Infinity as null and formats some floats differently, for example
+    0.00001 and 1e16 where the json module writes 1e-05 and 1e+16.
+    """
+
+    def __init__(self, compact=False, backend="auto"):
+        if backend not in JSON_BACKENDS:
+            raise ValueError(f"Invalid json_serializer {backend}. Valid values are "
+                             f"{', '.join(JSON_BACKENDS)}")
+        self.compact = compact
+        # function and option flags rather than the module so that the serializer can be
+        # pickled along with the generator (see process_pool)
+        self._orjson_dumps = None
+        if backend in ("auto", "orjson"):
+            try:
+                import orjson
+                self._orjson_dumps = orjson.dumps
+                self._orjson_option = orjson.OPT_NON_STR_KEYS
+                if not compact:
+                    self._orjson_option |= orjson.OPT_INDENT_2
+            except ImportError:
+                if backend == "orjson":
+                    raise ValueError("json_serializer orjson requires orjson package. "
+                                     "Install it using pip install orjson")
+        self.backend = "orjson" if self._orjson_dumps else "json"
+
+    def dumps_bytes(self, obj):
+        """
+        Returns obj serialized as utf-8 encoded bytes
+        """
+        if self._orjson_dumps:
+            try:
+                data = self._orjson_dumps(obj, option=self._orjson_option)
+                if not self.compact:
+                    data = _indent_re.sub(_double_indent, data)
+                return data
+            except TypeError:
+                pass
+        return self._dumps_json(obj).encode("utf-8")
+
+    def dumps(self, obj):
+        """
+        Returns obj serialized as str
+        """
+        return self.dumps_bytes(obj).decode("utf-8")
+
+    def dump(self, obj, file_path):
+        """
+        Serialize obj into file_path, overwriting existing file
+        """
+        data = self.dumps_bytes(obj)
+        with open(file_path, "wb") as f:
+            f.write(data)
+
+    def _dumps_json(self, obj):
+        if self.compact:
+            return json.dumps(obj, separators=(",", ":"))
+        return json.dumps(obj, indent=4)
+
+
+def get_json_serializer(config_dict):
+    """
+    Returns JsonSerializer for the optional compact_output and json_serializer configuration
+    of a config generator
+    """
+    return JsonSerializer(compact=config_dict.get("compact_output", False),
+                          backend=config_dict.get("json_serializer", "auto"))
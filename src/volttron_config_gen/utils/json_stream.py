@@ -0,0 +1,116 @@
+import hashlib
+import os
+
+
+class JsonStream:
+    """
+    Writes a json document incrementally, so that large configurations, such as ILC control
+    and criteria configs of all devices of a site, don't have to be held in memory until they
+    are complete. Each item is serialized with the output writer's json serializer and
+    appended to a temporary file (<file_path>.part) as soon as it is added. close() hands the
+    temporary file over to the output writer, which moves it to file_path, skips it if it is
+    unchanged or adds it to the bundle. Content is the same as writing the complete object with
+    OutputWriter.write_json.
+
+    Use OutputWriter.open_json_object or OutputWriter.open_json_array to create streams.
+    Streams are not thread safe and are written in the caller's thread.
+    """
+
+    def __init__(self, output_writer, file_path, start, end):
+        self.output_writer = output_writer
+        self.file_path = file_path
+        self.count = 0
+        self._serializer = output_writer.json_serializer
+        self._compact = self._serializer.compact
+        self._end = end
+        self._temp_path = f"{file_path}.part"
+        self._file = open(self._temp_path, "wb")
+        self._digest = hashlib.sha256()
+        self._size = 0
+        self._write(start)
+
+    def _write(self, data):
+        self._file.write(data)
+        self._digest.update(data)
+        self._size += len(data)
+
+    def _write_item(self, data, level):
+        if self._compact:
+            self._write(b"," + data if self.count else data)
+        else:
+            indent = b"\n" + b" " * (4 * level)
+            # indent every line of the serialized item to its level in the document. newlines
+            # within strings are always escaped
+            self._write((b"," if self.count else b"") + indent + data.replace(b"\n", indent))
+        self.count += 1
+
+    def close(self):
+        """
+        Finish the document and write it to file_path. Returns the name it is stored under (see
+        OutputWriter)
+        """
+        if self.count and not self._compact:
+            self._write(self._end[0])
+        self._write(self._end[1])
+        self._file.close()
+        return self.output_writer.write_stream(self._temp_path, self.file_path,
+                                               self._digest.hexdigest(), self._size)
+
+    def discard(self):
+        """
+        Stop writing and delete the temporary file. Nothing is written to file_path
+        """
+        self._file.close()
+        try:
+            os.remove(self._temp_path)
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is not None and not self._file.closed:
+            self.discard()
+
+
+class JsonObjectStream(JsonStream):
+    """
+    Streams a json object, one key and value at a time. Keys should be unique
+    """
+
+    def __init__(self, output_writer, file_path):
+        super().__init__(output_writer, file_path, b"{", (b"\n", b"}"))
+        self._keys = set()
+
+    def add(self, key, value):
+        if key in self._keys:
+            raise ValueError(f"Duplicate key {key} in {self.file_path}")
+        self._keys.add(key)
+        separator = b":" if self._compact else b": "
+        self._write_item(self._serializer.dumps_bytes(key) + separator +
+                         self._serializer.dumps_bytes(value), 1)
+
+
+class JsonArrayStream(JsonStream):
+    """
+    Streams a json array, one item at a time. If key is given, the array is the value of key
+    in an object with just that key, for example the list of configs of a VOLTTRON agent
+    {"platform.driver": [...]}
+    """
+
+    def __init__(self, output_writer, file_path, key=None):
+        serializer = output_writer.json_serializer
+        self._level = 1
+        start, end = b"[", (b"\n", b"]")
+        if key is not None:
+            self._level = 2
+            if serializer.compact:
+                start, end = b"{" + serializer.dumps_bytes(key) + b":[", (b"", b"]}")
+            else:
+                start = b"{\n    " + serializer.dumps_bytes(key) + b": ["
+                end = (b"\n    ", b"]\n}")
+        super().__init__(output_writer, file_path, start, end)
+
+    def append(self, value):
+        self._write_item(self._serializer.dumps_bytes(value), self._level)
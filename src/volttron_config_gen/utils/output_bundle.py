@@ -0,0 +1,157 @@
+import hashlib
+import json
+import os
+import sqlite3
+import warnings
+import zipfile
+from abc import ABC, abstractmethod
+
+INDEX_MEMBER = "bundle_index.json"
+
+
+class OutputBundle(ABC):
+    """
+    Single file that holds all generated configuration files of a config generator run, so
+    that they can be loaded with one sequential read instead of one file open per config.
+    Members are named by their path relative to the output directory, for example
+    configs/AHU1.json or config_metadata.json. close() adds an index member, bundle_index.json,
+    that lists name, size and sha256 of each member in the order they were added.
+
+    A member added again replaces the earlier one, same as a file written again, and is listed
+    in the index at the position it was last added.
+
+    Not thread safe. Callers should add members from one thread at a time.
+    """
+    extension = None
+
+    def __init__(self, output_dir, file_name=None):
+        self.output_dir = output_dir
+        self.path = os.path.join(output_dir, file_name or f"configs.{self.extension}")
+        # member name -> index entry, in the order members were added
+        self.index = dict()
+        self._replaced = False
+
+    def member_name(self, file_path):
+        return member_name(file_path, self.output_dir)
+
+    def add(self, data, file_path):
+        name = self.member_name(file_path)
+        if self.index.pop(name, None) is not None:
+            print(f"Replacing {name} added to {self.path} earlier")
+            self._replaced = True
+        self.write_member(name, data)
+        self.index[name] = {"name": name, "size": len(data),
+                            "sha256": hashlib.sha256(data).hexdigest()}
+
+    def close(self):
+        index = json.dumps({"algorithm": "sha256", "files": list(self.index.values())}, indent=4)
+        self.write_member(INDEX_MEMBER, index.encode("utf-8"))
+        self.close_bundle()
+        print(f"Wrote {len(self.index)} files to {os.path.abspath(self.path)}")
+
+    def discard(self):
+        """
+        Close and delete the bundle without adding the index, for example when generation failed
+        """
+        self.discard_bundle()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    @abstractmethod
+    def write_member(self, name, data):
+        pass
+
+    @abstractmethod
+    def close_bundle(self):
+        pass
+
+    @abstractmethod
+    def discard_bundle(self):
+        pass
+
+
+class ZipBundle(OutputBundle):
+    """
+    Bundle as a deflate compressed zip archive
+    """
+    extension = "zip"
+
+    def __init__(self, output_dir, file_name=None):
+        super().__init__(output_dir, file_name)
+        self._zip = zipfile.ZipFile(self.path, "w", compression=zipfile.ZIP_DEFLATED)
+
+    def write_member(self, name, data):
+        with warnings.catch_warnings():
+            # replaced members are removed on close
+            warnings.filterwarnings("ignore", "Duplicate name", UserWarning)
+            self._zip.writestr(name, data)
+
+    def close_bundle(self):
+        self._zip.close()
+        if self._replaced:
+            self._remove_replaced_members()
+
+    def discard_bundle(self):
+        self._zip.close()
+
+    def _remove_replaced_members(self):
+        # zip members can't be overwritten. copy the archive keeping only the last member of
+        # each name
+        tmp_path = f"{self.path}.tmp"
+        with zipfile.ZipFile(self.path, "r") as source:
+            last = {info.filename: info for info in source.infolist()}
+            with zipfile.ZipFile(tmp_path, "w", compression=zipfile.ZIP_DEFLATED) as target:
+                for info in source.infolist():
+                    if last[info.filename] is info:
+                        target.writestr(info, source.read(info))
+        os.replace(tmp_path, self.path)
+
+
+class SqliteBundle(OutputBundle):
+    """
+    Bundle as a SQLite database with one table, files(name, data). Existing database is replaced
+    """
+    extension = "sqlite"
+
+    def __init__(self, output_dir, file_name=None):
+        super().__init__(output_dir, file_name)
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        # generator threads only hand data over to the thread that writes the bundle
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("CREATE TABLE files (name TEXT PRIMARY KEY, data BLOB NOT NULL)")
+
+    def write_member(self, name, data):
+        self._db.execute("INSERT OR REPLACE INTO files (name, data) VALUES (?, ?)",
+                         (name, sqlite3.Binary(data)))
+
+    def close_bundle(self):
+        self._db.commit()
+        self._db.close()
+
+    def discard_bundle(self):
+        self._db.close()
+
+
+BUNDLE_FORMATS = {
+    "zip": ZipBundle,
+    "sqlite": SqliteBundle
+}
+
+
+def member_name(file_path, output_dir):
+    """
+    Returns name of the bundle member for file_path - path relative to output_dir with / as
+    separator
+    """
+    name = os.path.relpath(os.path.abspath(file_path), os.path.abspath(output_dir))
+    return name.replace(os.sep, "/")
+
+
+def open_bundle(bundle_format, output_dir):
+    if bundle_format not in BUNDLE_FORMATS:
+        raise ValueError(f"Invalid output_bundle {bundle_format}. Valid values are "
+                         f"{', '.join(BUNDLE_FORMATS)}")
+    return BUNDLE_FORMATS[bundle_format](output_dir)
@@ -0,0 +1,331 @@
+import csv
+import hashlib
+import io
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from volttron_config_gen.utils.json_stream import JsonArrayStream, JsonObjectStream
+from volttron_config_gen.utils.output_bundle import member_name, open_bundle
+
+DEFAULT_OUTPUT_WORKERS = 4
+MANIFEST_FILE = "output_manifest.json"
+CHANGES_FILE = "output_changes.json"
+
+
+class OutputManifest:
+    """
+    sha256 of every file written to an output directory, saved in output_manifest.json in the
+    output directory. Used to skip rewriting files whose content has not changed since the
+    previous run and to report which files were added, changed or removed by this run.
+    Paths are relative to the output directory.
+
+    Files generated by the previous run but not by this one are only reported as removed. They
+    are deleted from the output directory only if delete_removed is True.
+    """
+
+    def __init__(self, output_dir, delete_removed=False):
+        self.output_dir = output_dir
+        self.delete_removed = delete_removed
+        self.manifest_path = os.path.join(output_dir, MANIFEST_FILE)
+        self.changes_path = os.path.join(output_dir, CHANGES_FILE)
+        self.previous = dict()
+        if os.path.isfile(self.manifest_path):
+            try:
+                with open(self.manifest_path, "r") as f:
+                    self.previous = json.load(f).get("files", dict())
+            except (OSError, ValueError, AttributeError):
+                print(f"Ignoring unreadable manifest {self.manifest_path}. All files will be "
+                      f"written")
+        self.current = dict()
+        self._lock = threading.Lock()
+
+    def update(self, data, file_path):
+        """
+        Record sha256 of data that is to be written to file_path. Returns False if file_path
+        already has this content, True if the file needs to be written
+        """
+        return self.update_digest(hashlib.sha256(data).hexdigest(), len(data), file_path)
+
+    def update_digest(self, digest, size, file_path):
+        """
+        Same as update, for content with the given sha256 digest and size
+        """
+        key = os.path.relpath(os.path.abspath(file_path), os.path.abspath(self.output_dir))
+        with self._lock:
+            last = self.current.get(key, self.previous.get(key))
+            self.current[key] = digest
+        if last != digest:
+            return True
+        # also check size in case file was deleted or edited since the last run
+        try:
+            return os.path.getsize(file_path) != size
+        except OSError:
+            return True
+
+    def changes(self):
+        """
+        Returns dict of added, changed and removed files compared to the previous run
+        """
+        added = sorted(k for k in self.current if k not in self.previous)
+        changed = sorted(k for k, v in self.current.items()
+                         if k in self.previous and self.previous[k] != v)
+        removed = sorted(k for k in self.previous if k not in self.current)
+        return {"added": added, "changed": changed, "removed": removed,
+                "unchanged": len(self.current) - len(added) - len(changed)}
+
+    def save(self):
+        """
+        Write the manifest and the summary of changes and, if delete_removed is True, delete
+        files generated by the previous run but not by this one. Returns the changes
+        """
+        changes = self.changes()
+        if self.delete_removed:
+            for key in changes["removed"]:
+                try:
+                    os.remove(os.path.join(self.output_dir, key))
+                except FileNotFoundError:
+                    pass
+        with open(self.manifest_path, "w") as f:
+            json.dump({"algorithm": "sha256", "files": dict(sorted(self.current.items()))}, f,
+                      indent=4)
+        with open(self.changes_path, "w") as f:
+            json.dump(changes, f, indent=4)
+        print(f"Output files added: {len(changes['added'])} changed: {len(changes['changed'])} "
+              f"removed: {len(changes['removed'])} unchanged: {changes['unchanged']}. "
+              f"Details in {self.changes_path}")
+        return changes
+
+
+class OutputWriter:
+    """
+    Writes generated configuration files in a bounded pool of threads so that generation of the
+    next device's configuration overlaps with file I/O of the previous ones. Content is
+    serialized in the caller's thread, so objects passed to write_json and write_csv can be
+    changed or reused once the call returns. Only the open/write/close of files happen in the
+    pool.
+
+    At most max_pending writes are queued at a time. Once the limit is reached write calls
+    block until a queued write completes. flush() waits for all queued writes and raises the
+    first error, if any, that occurred while writing. Generators should call close() once all
+    files are written, or discard() if generation fails. Generators should flush before writing
+    files that refer to other generated files, such as config_metadata.json.
+
+    With workers=0 files are written synchronously in the caller's thread.
+
+    open_json_object and open_json_array return streams (see json_stream) that write large
+    json documents item by item instead of serializing a complete object at once.
+
+    If a manifest is given, files whose content is unchanged since the previous run are not
+    rewritten and close() saves the manifest.
+
+    If a bundle (see output_bundle) is given, files are added to the bundle instead of being
+    written to the file system, by at most one thread so that members are added in order.
+    close() closes the bundle.
+
+    Write methods return the name the content is stored under - file_path, or the bundle
+    member name if there is a bundle. Generators should record that name in files, such as
+    config_metadata.json, that refer to other generated files.
+    """
+
+    def __init__(self, json_serializer, workers=DEFAULT_OUTPUT_WORKERS, max_pending=None,
+                 manifest=None, bundle=None):
+        self.json_serializer = json_serializer
+        self.manifest = manifest
+        self.bundle = bundle
+        # output_dir of the bundle. file paths are reported as member names relative to it
+        self.member_root = bundle.output_dir if bundle is not None else None
+        self._write = _write_file
+        if bundle is not None:
+            self._write = bundle.add
+            workers = min(workers, 1)
+        self.workers = workers
+        self._executor = None
+        if workers > 0:
+            self._executor = ThreadPoolExecutor(max_workers=workers,
+                                                thread_name_prefix="output_writer")
+            self._slots = threading.BoundedSemaphore(max_pending or workers * 4)
+        self._lock = threading.Lock()
+        self._pending = set()
+        self._errors = []
+        # name of every file written, including unchanged files that were skipped
+        self.files = []
+
+    def output_name(self, file_path):
+        """
+        Returns the name content written to file_path is stored under
+        """
+        if self.member_root is None:
+            return file_path
+        return member_name(file_path, self.member_root)
+
+    def write_json(self, obj, file_path):
+        return self.write_bytes(self.json_serializer.dumps_bytes(obj), file_path)
+
+    def write_csv(self, rows, file_path, header=None):
+        return self.write_bytes(csv_bytes(rows, header), file_path)
+
+    def write_text(self, text, file_path):
+        return self.write_bytes(text.encode("utf-8"), file_path)
+
+    def open_json_object(self, file_path):
+        return JsonObjectStream(self, file_path)
+
+    def open_json_array(self, file_path, key=None):
+        return JsonArrayStream(self, file_path, key)
+
+    def write_stream(self, temp_path, file_path, digest, size):
+        """
+        Called by a closed json stream to write the content of its temporary file to file_path
+        """
+        if self.bundle is not None:
+            with open(temp_path, "rb") as f:
+                data = f.read()
+            os.remove(temp_path)
+            return self.write_bytes(data, file_path)
+        self.files.append(file_path)
+        if self.manifest is not None and not self.manifest.update_digest(digest, size,
+                                                                         file_path):
+            os.remove(temp_path)
+            return file_path
+        os.replace(temp_path, file_path)
+        return file_path
+
+    def write_bytes(self, data, file_path):
+        name = self.output_name(file_path)
+        self.files.append(name)
+        if self.manifest is not None and not self.manifest.update(data, file_path):
+            return name
+        if self._executor is None:
+            self._write(data, file_path)
+            return name
+        self._slots.acquire()
+        try:
+            future = self._executor.submit(self._write, data, file_path)
+        except BaseException:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._pending.add(future)
+        future.add_done_callback(self._done)
+        return name
+
+    def _done(self, future):
+        with self._lock:
+            self._pending.discard(future)
+            # writes are cancelled only by discard()
+            if not future.cancelled() and future.exception() is not None:
+                self._errors.append(future.exception())
+        self._slots.release()
+
+    def flush(self):
+        """
+        Wait for all queued writes to complete. Raises the first error that occurred while
+        writing files queued since the last flush
+        """
+        with self._lock:
+            pending = list(self._pending)
+        # errors are taken from the futures directly. future.exception() can return before the
+        # done callback has recorded the error in self._errors
+        errors = [future.exception() for future in pending]
+        self._raise_errors([e for e in errors if e is not None])
+
+    def _raise_errors(self, errors=()):
+        with self._lock:
+            recorded, self._errors = self._errors, []
+        # done callbacks may have recorded some of the errors too
+        errors = recorded + [e for e in errors if not any(e is r for r in recorded)]
+        if errors:
+            raise errors[0]
+
+    def close(self):
+        """
+        Flush, release the threads of the pool and save the manifest. Returns the changes
+        compared to the previous run if there is a manifest
+        """
+        try:
+            self.flush()
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+        # done callbacks have all run once the pool is shut down
+        self._raise_errors()
+        if self.bundle is not None:
+            self.bundle.close()
+            self.bundle = None
+        if self.manifest is not None:
+            return self.manifest.save()
+        return None
+
+    def discard(self):
+        """
+        Release the threads of the pool without writing queued files that have not been started
+        and delete the bundle. Used when generation fails. Does nothing once the writer is closed
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+        if self.bundle is not None:
+            self.bundle.discard()
+            self.bundle = None
+
+
+class RecordingWriter(OutputWriter):
+    """
+    Output writer of worker processes (see process_pool). Files are not written but recorded
+    as (data, file_path) in records, so that the parent process can write them through its own
+    OutputWriter. member_root should be the parent writer's member_root, so that write methods
+    return the same names as the parent's
+    """
+
+    def __init__(self, json_serializer, member_root=None):
+        super().__init__(json_serializer, workers=0)
+        self.member_root = member_root
+        self.records = []
+
+    def write_stream(self, temp_path, file_path, digest, size):
+        with open(temp_path, "rb") as f:
+            data = f.read()
+        os.remove(temp_path)
+        return self.write_bytes(data, file_path)
+
+    def write_bytes(self, data, file_path):
+        self.records.append((data, file_path))
+        return self.output_name(file_path)
+
+
+def csv_bytes(rows, header=None):
+    """
+    Returns rows, and header if given, as utf-8 encoded csv
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    if header:
+        writer.writerow(header)
+    writer.writerows(rows)
+    return buffer.getvalue().encode("utf-8")
+
+
+def _write_file(data, file_path):
+    with open(file_path, "wb") as f:
+        f.write(data)
+
+
+def get_output_writer(config_dict, json_serializer, output_dir):
+    """
+    Returns OutputWriter for the optional output_workers, output_manifest,
+    output_manifest_delete_removed and output_bundle configuration of a config generator
+    """
+    manifest = None
+    bundle = None
+    if config_dict.get("output_bundle"):
+        # bundle is rewritten as a whole on every run, so there is no manifest
+        bundle = open_bundle(config_dict["output_bundle"], output_dir)
+    elif config_dict.get("output_manifest", False):
+        manifest = OutputManifest(output_dir,
+                                  config_dict.get("output_manifest_delete_removed", False))
+    return OutputWriter(json_serializer,
+                        workers=config_dict.get("output_workers", DEFAULT_OUTPUT_WORKERS),
+                        manifest=manifest, bundle=bundle)
@@ -0,0 +1,71 @@
+import copy
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
+from volttron_config_gen.utils.output_writer import RecordingWriter
+
+# state of each worker process, set once by _init_worker
+_worker_generator = None
+_worker_unmapped_device_details = None
+_worker_member_root = None
+
+
+def _init_worker(pickled_generator, member_root):
+    global _worker_generator, _worker_unmapped_device_details, _worker_member_root
+    _worker_generator = pickle.loads(pickled_generator)
+    _worker_unmapped_device_details = _worker_generator.unmapped_device_details
+    _worker_member_root = member_root
+
+
+def _run_item(args):
+    method_name, item = args
+    generator = _worker_generator
+    # start every item from the parent's snapshot so that results don't depend on which
+    # worker ran which items
+    generator.unmapped_device_details = copy.deepcopy(_worker_unmapped_device_details)
+    generator.output_writer = RecordingWriter(generator.json_serializer, _worker_member_root)
+    result = getattr(generator, method_name)(*item)
+    unmapped = {k: v for k, v in generator.unmapped_device_details.items()
+                if k not in _worker_unmapped_device_details
+                or _worker_unmapped_device_details[k] != v}
+    return result, unmapped, generator.output_writer.records
+
+
+def merge_unmapped_device_details(target, source):
+    for key, value in source.items():
+        if isinstance(target.get(key), dict) and isinstance(value, dict):
+            target[key].update(value)
+        else:
+            target[key] = value
+
+
+def map_in_workers(generator, method_name, items, workers):
+    """
+    Returns list of getattr(generator, method_name)(*item) for each item in items.
+
+    If workers > 1, items are distributed across a pool of worker processes. Each worker gets
+    a pickled copy of generator, taken when this is called, so data loaded or resolved
+    before the call (topology, point maps) is not loaded again. Generators with connections
+    that can't be pickled reconnect when they are unpickled. Files written by the workers
+    through generator.output_writer are written by the generator's output_writer and
+    unmapped_device_details of the workers are merged into generator.unmapped_device_details,
+    both in order of items, so output is the same as when items are processed in this process.
+    Any other change the method makes to the generator's state is local to the worker.
+    """
+    items = list(items)
+    if workers <= 1 or len(items) <= 1:
+        return [getattr(generator, method_name)(*item) for item in items]
+
+    results = []
+    workers = min(workers, len(items))
+    chunksize = max(1, len(items) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(pickle.dumps(generator),
+                                       generator.output_writer.member_root)) as executor:
+        for result, unmapped, records in executor.map(
+                _run_item, [(method_name, item) for item in items], chunksize=chunksize):
+            for data, file_path in records:
+                generator.output_writer.write_bytes(data, file_path)
+            merge_unmapped_device_details(generator.unmapped_device_details, unmapped)
+            results.append(result)
+    return results
@@ -0,0 +1,59 @@
+import json
+import os
+import sys
+
+import pytest
+
+# run tests against the source tree without installing the package
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                "src"))
+
+
+def write_ucsd_snapshot(file_path):
+    """
+    Writes a snapshot of a BRICK graph with one ahu that feeds two vavs with the same points, and
+    one room with a light
+    """
+    nodes = []
+    relationships = []
+
+    def add(labels, **properties):
+        nodes.append({"id": len(nodes), "labels": labels, "properties": properties})
+        return len(nodes) - 1
+
+    def add_device(labels, name, points, **properties):
+        device = add(labels, name=name, **properties)
+        controller = add(["Bacnet Controller"], **{"IP Address": f"10.0.0.{device}",
+                                                   "Device Object Identifier": str(device)})
+        relationships.append([controller, "controls", device])
+        for i, point in enumerate(points):
+            p = add(["Point", point], **{"name": point, "BACnet Object Name": point,
+                                         "units": "percent", "type": "AnalogValue",
+                                         "BACnet Object Identifier": f"analog-value:{i}"})
+            relationships.append([p, "isPointOf", device])
+        return device
+
+    ahu = add_device(["AHU"], "AHU-1", ["DischargeAirTemperatureSensor"])
+    for vav in ["VAV-1", "VAV-2"]:
+        relationships.append([ahu, "feeds", add_device(["VAV"], vav, ["ZoneTemperature"])])
+    room = add(["Room"], name="Room-1")
+    light = add(["Luminaire"], name="L1", controller="10.5.0.1", controllerId="ctl1")
+    relationships.append([light, "hasLocation", room])
+    p = add(["Point", "LuminanceCommand"], **{"name": "LuminanceCommand",
+                                              "BACnet Object Name": "L1_LuminanceCommand",
+                                              "units": "percent", "type": "AnalogValue",
+                                              "BACnet Object Identifier": "analog-value:0"})
+    relationships.append([p, "isPointOf", light])
+    with open(file_path, "w") as f:
+        json.dump({"format": "ucsd_brick_snapshot", "version": 1, "nodes": nodes,
+                   "relationships": relationships}, f)
+
+
+@pytest.fixture
+def ucsd_snapshot(tmp_path):
+    """
+    Path of a ucsd_brick snapshot file, see write_ucsd_snapshot
+    """
+    file_path = str(tmp_path / "snapshot.json")
+    write_ucsd_snapshot(file_path)
+    return file_path
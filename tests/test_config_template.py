@@ -0,0 +1,71 @@
+import copy
+
+from volttron_config_gen.utils.config_template import ANY, CompiledTemplate
+
+TEMPLATE = {
+    "config": {
+        "device_topic": "{device_id}",
+        "campus": "campus",
+        "settings": {"interval": 60, "units": ["F", "C"]}
+    },
+    "query": {"field": {"property": "device_id", "value": ""},
+              "other": {"field": {"property": "type", "value": "vav"}}},
+    "point_mapping": {"ZoneTemperature": ""},
+    "rules": [{"name": "rule1", "points": []}, {"name": "rule2", "points": []}],
+}
+
+
+def test_render_copies_mutable_parts():
+    template = copy.deepcopy(TEMPLATE)
+    compiled = CompiledTemplate(template)
+    first = compiled.render()
+    second = compiled.render()
+
+    # root, placeholder containers, device_id field and point_mapping are copied per render
+    for path in [(), ("config",), ("query",), ("query", "field"), ("point_mapping",)]:
+        node_first, node_second, node_template = first, second, template
+        for key in path:
+            node_first, node_second = node_first[key], node_second[key]
+            node_template = node_template[key]
+        assert node_first is not node_template
+        assert node_first is not node_second
+
+    first["config"]["device_topic"] = "vav1"
+    first["query"]["field"]["value"] = "vav1"
+    first["point_mapping"]["ZoneTemperature"] = "ZN-T"
+    second["config"]["device_topic"] = "vav2"
+    assert template == TEMPLATE
+    assert first["config"]["device_topic"] == "vav1"
+    assert second["query"]["field"]["value"] == ""
+    assert second["point_mapping"]["ZoneTemperature"] == ""
+
+
+def test_render_shares_the_rest():
+    template = copy.deepcopy(TEMPLATE)
+    rendered = CompiledTemplate(template).render()
+    assert rendered == template
+    assert rendered["config"]["settings"] is template["config"]["settings"]
+    assert rendered["query"]["other"] is template["query"]["other"]
+    assert rendered["rules"] is template["rules"]
+
+
+def test_mutable_paths_with_any():
+    template = copy.deepcopy(TEMPLATE)
+    compiled = CompiledTemplate(template, mutable_paths=[("rules", ANY)])
+    first = compiled.render()
+    second = compiled.render()
+    first["rules"][0]["points"] = ["a"]
+    first["rules"][1]["name"] = "renamed"
+    assert template == TEMPLATE
+    assert second["rules"] == TEMPLATE["rules"]
+    assert first["rules"] is not second["rules"]
+    # only containers along the path are copied
+    assert second["rules"][0] is not template["rules"][0]
+    assert second["rules"][1]["points"] is template["rules"][1]["points"]
+
+
+def test_missing_mutable_path_is_ignored():
+    template = {"a": {"b": 1}}
+    rendered = CompiledTemplate(template, mutable_paths=[("missing", "key")]).render()
+    assert rendered == template
+    assert rendered["a"] is template["a"]
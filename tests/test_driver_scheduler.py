@@ -0,0 +1,143 @@
+import json
+
+import pytest
+
+from volttron_config_gen.base.config_generator import generate
+from volttron_config_gen.utils.driver_scheduler import (DriverGroupScheduler,
+                                                        get_driver_group_scheduler)
+
+
+def test_largest_devices_go_to_group_with_fewest_points():
+    scheduler = DriverGroupScheduler(2)
+    scheduler.add_device("vav", "v1", 10)
+    scheduler.add_device("vav", "v2", 40)
+    scheduler.add_device("vav", "v3", 30)
+    scheduler.add_device("ahu", "a1", 25)
+    schedule = scheduler.schedule()
+    # 40 -> 0, 30 -> 1, 25 -> 1, 10 -> 0
+    assert schedule.device_groups == {("vav", "v1"): 0, ("vav", "v2"): 0, ("vav", "v3"): 1,
+                                      ("ahu", "a1"): 1}
+    assert schedule.group_points == [50, 55]
+    assert schedule.group_devices == [2, 2]
+
+
+def test_ties_go_to_group_with_fewest_devices_then_lowest_group():
+    scheduler = DriverGroupScheduler(3)
+    scheduler.add_device("vav", "v1", 0)
+    scheduler.add_device("vav", "v2", 0)
+    scheduler.add_device("vav", "v3", 0)
+    scheduler.add_device("vav", "v4", 0)
+    schedule = scheduler.schedule()
+    assert schedule.group_devices == [2, 1, 1]
+    assert schedule.get_group(("vav", "v1")) == 0
+    assert schedule.get_group(("vav", "v4")) == 0
+    assert schedule.get_group(("vav", "missing"), -1) == -1
+
+
+def test_plan_does_not_depend_on_order_devices_are_added_in():
+    devices = [("vav", "v1", 5), ("vav", "v2", 5), ("vav", "v3", 8), ("ahu", "a1", 3)]
+    first = DriverGroupScheduler(2)
+    second = DriverGroupScheduler(2)
+    for device in devices:
+        first.add_device(*device)
+    for device in reversed(devices):
+        second.add_device(*device)
+    assert first.schedule().device_groups == second.schedule().device_groups
+
+
+def test_intervals():
+    scheduler = DriverGroupScheduler(3, scrape_window=60)
+    for i in range(7):
+        scheduler.add_device("vav", f"v{i}", 10)
+    schedule = scheduler.schedule()
+    assert schedule.group_devices == [3, 2, 2]
+    # devices of the largest group are spread across the scrape window
+    assert schedule.driver_scrape_interval == 15.0
+    # groups start evenly within one driver_scrape_interval
+    assert schedule.group_offset_interval == 5.0
+    assert schedule.agent_config() == {"driver_scrape_interval": 15.0,
+                                       "group_offset_interval": 5.0}
+
+
+def test_intervals_are_rounded_and_offset_can_be_configured():
+    scheduler = DriverGroupScheduler(2, scrape_window=10, group_offset_interval=0.5)
+    scheduler.add_device("vav", "v1", 1)
+    schedule = scheduler.schedule()
+    assert schedule.driver_scrape_interval == 5.0
+    assert schedule.group_offset_interval == 0.5
+
+    scheduler = DriverGroupScheduler(3, scrape_window=10)
+    scheduler.add_device("vav", "v1", 1)
+    scheduler.add_device("vav", "v2", 1)
+    scheduler.add_device("vav", "v3", 1)
+    schedule = scheduler.schedule()
+    assert schedule.driver_scrape_interval == 5.0
+    assert schedule.group_offset_interval == 1.667
+
+
+def test_empty_schedule():
+    schedule = DriverGroupScheduler(2).schedule()
+    assert schedule.device_groups == {}
+    assert schedule.driver_scrape_interval == 60.0
+    assert schedule.group_offset_interval == 30.0
+
+
+def test_trunk_load():
+    scheduler = DriverGroupScheduler(2, scrape_window=60, max_per_request=20)
+    scheduler.add_device("vav", "v1", 30, trunk="T1")
+    scheduler.add_device("vav", "v2", 10, trunk="T1")
+    scheduler.add_device("vav", "v3", 45, trunk="T2")
+    scheduler.add_device("meter", "m1", 4)
+    schedule = scheduler.schedule()
+    assert schedule.trunk_points == {None: 4, "T1": 40, "T2": 45}
+    # ceil(points/max_per_request) per device
+    assert schedule.trunk_requests == {None: 1, "T1": 3, "T2": 3}
+    assert schedule.requests_per_second_by_trunk() == {None: 0.017, "T1": 0.05, "T2": 0.05}
+    report = schedule.to_dict()
+    assert report["trunks"]["T2"] == {"points": 45, "requests": 3, "requests_per_second": 0.05}
+    assert report["device_groups"]["vav/v3"] == 0
+
+
+@pytest.mark.parametrize("kwargs", [{"groups": 0}, {"groups": 1.5}, {"groups": 2,
+                                                                      "scrape_window": 0},
+                                    {"groups": 2, "group_offset_interval": -1}])
+def test_invalid_settings(kwargs):
+    with pytest.raises(ValueError):
+        DriverGroupScheduler(**kwargs)
+
+
+def test_get_driver_group_scheduler():
+    assert get_driver_group_scheduler({}, 4) is None
+    assert get_driver_group_scheduler({"driver_group_schedule": False}, 4) is None
+
+    scheduler = get_driver_group_scheduler({"driver_group_schedule": True}, 4)
+    assert scheduler.groups == 4
+    assert scheduler.scrape_window == 60
+
+    scheduler = get_driver_group_scheduler(
+        {"driver_group_schedule": {"groups": 2, "scrape_window": 30,
+                                   "group_offset_interval": 1}}, 4)
+    assert (scheduler.groups, scheduler.scrape_window, scheduler.group_offset_interval) == \
+           (2, 30, 1)
+
+    with pytest.raises(ValueError):
+        get_driver_group_scheduler({"driver_group_schedule": "yes"}, 4)
+
+
+def test_schedule_is_returned_in_generation_result(tmp_path, ucsd_snapshot, capsys):
+    result = generate("ucsd_brick", "file", "driver", {
+        "metadata": {"snapshot_json": ucsd_snapshot},
+        "output_dir": str(tmp_path),
+        "driver_group_schedule": {"groups": 2, "scrape_window": 60},
+        "config_template": {"driver_config": {}, "driver_type": "bacnet",
+                            "registry_config": "config://registry_configs/vav.csv",
+                            "interval": 60}})
+    schedule = result.driver_schedule
+    assert schedule["driver_scrape_interval"] == 20.0
+    assert sum(group["devices"] for group in schedule["groups"].values()) == 4
+    assert schedule["trunks"]["None"]["requests"] == 4
+    assert result.to_dict()["driver_schedule"] == schedule
+    with open(tmp_path / "driver_schedule.json") as f:
+        assert json.load(f) == schedule
+    # generate() is used as an api and doesn't print the rates of each trunk
+    assert "requests per second" not in capsys.readouterr().out
@@ -0,0 +1,79 @@
+import pytest
+
+from volttron_config_gen.utils.ilc.expression import (find_closing_parenthesis, parse_aggregate,
+                                                      parse_expression)
+
+
+def test_substitute_whole_names_only():
+    mapping = {"ZoneAirFlow": "AIRFLOW", "ZoneAirFlowSetpoint": "AIRFLOW_SP"}
+    expression = parse_expression("(ZoneAirFlowSetpoint - ZoneAirFlow) > ZoneAirFlow2")
+    assert expression.substitute(mapping) == "(AIRFLOW_SP - AIRFLOW) > ZoneAirFlow2"
+
+
+def test_substituted_names_are_not_substituted_again():
+    mapping = {"A": "B", "B": "C"}
+    assert parse_expression("A + B").substitute(mapping) == "B + C"
+
+
+def test_functions_numbers_and_whitespace_are_kept():
+    mapping = {"OccupancyCommand": "occ", "CoolingOutputPercent": "clg", "e5": "wrong"}
+    text = "(CoolingOutputPercent>1e5) &  (Eq(OccupancyCommand, 0.5))"
+    assert parse_expression(text).substitute(mapping) == "(clg>1e5) &  (Eq(occ, 0.5))"
+
+
+def test_single_name():
+    assert parse_expression("DimmingLevelOutput").substitute(
+        {"DimmingLevelOutput": "DIM"}) == "DIM"
+    assert parse_expression("DimmingLevelOutput").substitute({}) == "DimmingLevelOutput"
+
+
+def test_parse_expression_is_cached():
+    assert parse_expression("a > 1") is parse_expression("a > 1")
+
+
+def test_parse_aggregate_only_for_sum_and_avg():
+    assert parse_aggregate("DimmingLevelOutput > 70") is None
+    assert parse_aggregate("MAX(DimmingLevelOutput)") is None
+    assert parse_aggregate("AVG(DimmingLevelOutput)").function == "AVG"
+
+
+def test_find_closing_parenthesis():
+    assert find_closing_parenthesis("SUM((a + b) * c) > 1", 3) == 15
+    with pytest.raises(ValueError):
+        find_closing_parenthesis("SUM(a", 3)
+    with pytest.raises(ValueError):
+        find_closing_parenthesis("SUM(a)", 2)
+
+
+# Expected values are the output of the replace based expansion in BaseConfigGenerator
+# substitute_point_names before conditions were tokenized
+ROOM_MAPPING = {"DimmingLevelOutput": "DIM", "OccupancySensor": "OCC"}
+LIGHTS = ["light1", "light2", "light3"]
+DEVICE_MAPPINGS = [{v_point: f"{light}_{point}" for v_point, point in ROOM_MAPPING.items()}
+                   for light in LIGHTS]
+
+
+@pytest.mark.parametrize("condition, expected", [
+    ("AVG(DimmingLevelOutput)",
+     "((light1_DIM + light2_DIM + light3_DIM)/3)"),
+    ("SUM(DimmingLevelOutput)",
+     "(light1_DIM + light2_DIM + light3_DIM)"),
+    ("AVG(DimmingLevelOutput) > 70",
+     "((light1_DIM + light2_DIM + light3_DIM)/3) > 70"),
+    ("SUM( DimmingLevelOutput ) > OccupancySensor",
+     "(light1_DIM + light2_DIM + light3_DIM) > OCC"),
+    ("SUM(DimmingLevelOutput * 2)",
+     "((light1_DIM * 2) + (light2_DIM * 2) + (light3_DIM * 2))"),
+    ("AVG(DimmingLevelOutput*OccupancySensor)",
+     "((light1_DIM*light1_OCC + light2_DIM*light2_OCC + light3_DIM*light3_OCC)/3)"),
+    ("AVG((DimmingLevelOutput + 1) / 2) < 10",
+     "((((light1_DIM + 1) / 2) + ((light2_DIM + 1) / 2) + ((light3_DIM + 1) / 2))/3) < 10"),
+])
+def test_aggregate_expansion_matches_previous_output(condition, expected):
+    assert parse_aggregate(condition).expand(ROOM_MAPPING, DEVICE_MAPPINGS) == expected
+
+
+def test_aggregate_of_one_device():
+    expanded = parse_aggregate("AVG(DimmingLevelOutput)").expand(ROOM_MAPPING,
+                                                                DEVICE_MAPPINGS[:1])
+    assert expanded == "((light1_DIM)/1)"
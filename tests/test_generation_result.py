@@ -0,0 +1,64 @@
+import datetime
+import json
+import os
+
+from volttron_config_gen.base.config_generator import generate, generate_batch
+from volttron_config_gen.utils.generation_result import GenerationResult
+
+CONFIG_TEMPLATE = {
+    "driver_config": {"device_address": "10.1.1.3", "device_id": 500},
+    "driver_type": "bacnet",
+    "registry_config": "config://registry_configs/vav.csv",
+    "interval": 60,
+    "timezone": "UTC"
+}
+
+
+def driver_config(snapshot, output_dir):
+    return {"metadata": {"snapshot_json": snapshot},
+            "building": "b1",
+            "output_dir": str(output_dir),
+            "config_template": CONFIG_TEMPLATE}
+
+
+def test_generation_result():
+    result = GenerationResult("driver", "/out")
+    assert result.success and result.exit_code == 0
+    assert result.duration is None
+    result.start_time = datetime.datetime(2024, 1, 1, 0, 0, 0)
+    result.end_time = datetime.datetime(2024, 1, 1, 0, 0, 2)
+    result.unmapped_device_details = {"vav1": {"error": "missing points"}}
+    assert not result.success and result.exit_code == 1
+    report = result.to_dict()
+    assert report["duration_seconds"] == 2.0
+    assert report["start_time"] == "2024-01-01T00:00:00"
+    assert report["error"] is None
+    json.dumps(report)
+
+
+def test_generate_returns_result(tmp_path, ucsd_snapshot):
+    config = driver_config(ucsd_snapshot, tmp_path / "out")
+    result = generate("ucsd_brick", "file", "driver", config)
+    # config dict is not changed, so it can be reused
+    assert config == driver_config(ucsd_snapshot, tmp_path / "out")
+    assert result.agent == "driver"
+    assert os.path.join(str(tmp_path / "out"), "configs", "AHU-1.json") in result.files
+    for file_path in result.files:
+        assert os.path.isfile(file_path)
+    # snapshot has no building power meter
+    assert "building_power_meter" in result.unmapped_device_details
+    assert os.path.isfile(result.error_file)
+    assert result.exit_code == 1
+    assert result.duration is not None
+
+
+def test_generate_batch_runs_remaining_jobs_after_an_error(tmp_path, ucsd_snapshot):
+    jobs = [("no_such_model", "file", "driver", {"output_dir": str(tmp_path / "bad")}),
+            ("ucsd_brick", "file", "driver", driver_config(ucsd_snapshot, tmp_path / "out"))]
+    bad, good = generate_batch(jobs)
+    assert isinstance(bad.error, ValueError)
+    assert bad.output_dir == str(tmp_path / "bad")
+    assert not bad.success and bad.files == []
+    assert bad.to_dict()["error"] == str(bad.error)
+    assert good.error is None
+    assert os.path.join(str(tmp_path / "out"), "configs", "AHU-1.json") in good.files
@@ -0,0 +1,86 @@
+import os
+
+import pytest
+
+from volttron_config_gen.utils.json_serializer import JsonSerializer
+from volttron_config_gen.utils.output_writer import OutputWriter
+
+BACKENDS = ["json"]
+try:
+    import orjson  # noqa: F401
+    BACKENDS.append("orjson")
+except ImportError:
+    pass
+
+ITEMS = {
+    "campus/building/vav1": {"device_topic": "devices/campus/building/vav1",
+                             "points": ["ZoneTemperature", "ZoneAirFlow"],
+                             "nested": {"empty_list": [], "empty_dict": {}, "value": 1.5}},
+    "campus/building/vav2": [1, "two", None, True, {"text": "line\nbreak é"}],
+    "campus/building/vav3": "simple value",
+    "campus/building/vav4": {},
+}
+
+
+@pytest.fixture(params=[(compact, backend) for compact in (False, True) for backend in BACKENDS],
+                ids=lambda p: f"{'compact' if p[0] else 'indented'}-{p[1]}")
+def writer(request):
+    compact, backend = request.param
+    writer = OutputWriter(JsonSerializer(compact=compact, backend=backend), workers=0)
+    yield writer
+    writer.close()
+
+
+def read(file_path):
+    with open(file_path, "rb") as f:
+        return f.read()
+
+
+def test_object_stream_matches_dumps_bytes(writer, tmp_path):
+    file_path = str(tmp_path / "ilc_control.config")
+    stream = writer.open_json_object(file_path)
+    for key, value in ITEMS.items():
+        stream.add(key, value)
+    assert stream.close() == file_path
+    assert read(file_path) == writer.json_serializer.dumps_bytes(ITEMS)
+    assert not os.path.exists(file_path + ".part")
+
+
+def test_array_stream_matches_dumps_bytes(writer, tmp_path):
+    file_path = str(tmp_path / "devices.json")
+    stream = writer.open_json_array(file_path)
+    for value in ITEMS.values():
+        stream.append(value)
+    stream.close()
+    assert read(file_path) == writer.json_serializer.dumps_bytes(list(ITEMS.values()))
+
+
+def test_keyed_array_stream_matches_dumps_bytes(writer, tmp_path):
+    file_path = str(tmp_path / "config_metadata.json")
+    stream = writer.open_json_array(file_path, key="platform.driver")
+    for value in ITEMS.values():
+        stream.append(value)
+    stream.close()
+    assert read(file_path) == writer.json_serializer.dumps_bytes(
+        {"platform.driver": list(ITEMS.values())})
+
+
+@pytest.mark.parametrize("key", [None, "platform.driver"])
+def test_empty_streams_match_dumps_bytes(writer, tmp_path, key):
+    file_path = str(tmp_path / "empty.json")
+    writer.open_json_array(file_path, key=key).close()
+    expected = [] if key is None else {key: []}
+    assert read(file_path) == writer.json_serializer.dumps_bytes(expected)
+
+    writer.open_json_object(file_path).close()
+    assert read(file_path) == writer.json_serializer.dumps_bytes({})
+
+
+def test_stream_is_discarded_on_error(writer, tmp_path):
+    file_path = str(tmp_path / "ilc_control.config")
+    with pytest.raises(RuntimeError):
+        with writer.open_json_object(file_path) as stream:
+            stream.add("a", 1)
+            raise RuntimeError("generation failed")
+    assert not os.path.exists(file_path)
+    assert not os.path.exists(file_path + ".part")
@@ -0,0 +1,140 @@
+import json
+import os
+import sqlite3
+import zipfile
+
+import pytest
+
+from volttron_config_gen.ucsd_brick.file.config_driver import ConfigGenerator
+from volttron_config_gen.utils.json_serializer import JsonSerializer
+from volttron_config_gen.utils.output_bundle import INDEX_MEMBER, OutputBundle, open_bundle
+from volttron_config_gen.utils.output_writer import OutputWriter
+
+CONFIG_TEMPLATE = {
+    "driver_config": {"device_address": "10.1.1.3", "device_id": 500},
+    "driver_type": "bacnet",
+    "registry_config": "config://registry_configs/vav.csv",
+    "interval": 60,
+    "timezone": "UTC"
+}
+
+
+def read_bundle(path, bundle_format):
+    """
+    Returns dict of member name -> content of a bundle
+    """
+    if bundle_format == "zip":
+        with zipfile.ZipFile(path) as z:
+            return {name: z.read(name) for name in z.namelist()}
+    db = sqlite3.connect(path)
+    try:
+        return {name: bytes(data) for name, data in db.execute("SELECT name, data FROM files")}
+    finally:
+        db.close()
+
+
+@pytest.mark.parametrize("bundle_format", ["zip", "sqlite"])
+@pytest.mark.parametrize("workers", [0, 2])
+def test_bundle_round_trip(tmp_path, bundle_format, workers):
+    serializer = JsonSerializer()
+    writer = OutputWriter(serializer, workers=workers,
+                          bundle=open_bundle(bundle_format, str(tmp_path)))
+    configs = str(tmp_path / "configs")
+    # streams write a temporary file next to file_path, like generators do
+    os.makedirs(configs)
+    assert writer.write_json({"a": 1}, f"{configs}/a.json") == "configs/a.json"
+    assert writer.write_csv([["p1", 1]], f"{configs}/registry_a.csv",
+                            header=["name", "index"]) == "configs/registry_a.csv"
+    stream = writer.open_json_array(f"{configs}/all_lights.json", key="platform.driver")
+    stream.append({"config-name": "light"})
+    assert stream.close() == "configs/all_lights.json"
+    # written again, replaces the earlier member
+    writer.write_text("second", f"{tmp_path}/notes.txt")
+    writer.write_text("third", f"{tmp_path}/notes.txt")
+    writer.close()
+
+    members = read_bundle(tmp_path / f"configs.{bundle_format}", bundle_format)
+    assert members["configs/a.json"] == serializer.dumps_bytes({"a": 1})
+    assert members["configs/registry_a.csv"].splitlines() == [b"name,index", b"p1,1"]
+    assert json.loads(members["configs/all_lights.json"]) == {
+        "platform.driver": [{"config-name": "light"}]}
+    assert members["notes.txt"] == b"third"
+    index = json.loads(members[INDEX_MEMBER])
+    assert [entry["name"] for entry in index["files"]] == [
+        "configs/a.json", "configs/registry_a.csv", "configs/all_lights.json", "notes.txt"]
+    assert index["files"][3]["size"] == 5
+    assert set(members) == {entry["name"] for entry in index["files"]} | {INDEX_MEMBER}
+    assert os.listdir(configs) == []
+
+
+@pytest.mark.parametrize("bundle_format", ["zip", "sqlite"])
+def test_discarded_bundle_is_deleted(tmp_path, bundle_format):
+    writer = OutputWriter(JsonSerializer(), workers=1,
+                          bundle=open_bundle(bundle_format, str(tmp_path)))
+    writer.write_json({"a": 1}, f"{tmp_path}/a.json")
+    writer.discard()
+    assert not (tmp_path / f"configs.{bundle_format}").exists()
+
+
+def test_invalid_bundle_format(tmp_path):
+    with pytest.raises(ValueError):
+        open_bundle("tar", str(tmp_path))
+
+
+def test_incomplete_bundle_class_can_not_be_created(tmp_path):
+    class IncompleteBundle(OutputBundle):
+        extension = "bin"
+
+        def write_member(self, name, data):
+            pass
+
+    with pytest.raises(TypeError):
+        IncompleteBundle(str(tmp_path))
+
+
+def config_references(member):
+    """
+    Yields the "config" values of the config store entries in a generated json file that refer
+    to other generated files
+    """
+    if isinstance(member, dict):
+        for key, value in member.items():
+            if key == "config" and isinstance(value, str):
+                yield value
+            else:
+                yield from config_references(value)
+    elif isinstance(member, list):
+        for value in member:
+            yield from config_references(value)
+
+
+@pytest.mark.parametrize("bundle_format", ["zip", "sqlite"])
+@pytest.mark.parametrize("dedup", [False, True])
+@pytest.mark.parametrize("workers", [0, 2])
+def test_driver_config_references_resolve_to_bundle_members(tmp_path, ucsd_snapshot,
+                                                            bundle_format, dedup, workers):
+    output_dir = tmp_path / "out"
+    result = ConfigGenerator({"metadata": {"snapshot_json": ucsd_snapshot},
+                              "building": "b1",
+                              "output_dir": str(output_dir),
+                              "output_bundle": bundle_format,
+                              "dedup_registry_configs": dedup,
+                              "workers": workers,
+                              "config_template": CONFIG_TEMPLATE}).generate()
+
+    members = read_bundle(output_dir / f"configs.{bundle_format}", bundle_format)
+    # nothing but the bundle is written to the output directory
+    assert not (output_dir / "configs").exists() or not any((output_dir / "configs").iterdir())
+    references = []
+    for name, data in members.items():
+        if name.endswith(".json"):
+            references.extend(config_references(json.loads(data)))
+    assert references
+    for reference in references:
+        assert reference in members, reference
+    assert set(result.files) <= set(members)
+    assert any(name.endswith(".csv") for name in members)
+    if dedup:
+        # both vavs share one registry config
+        shared = json.loads(members["configs/shared_registry_configs.json"])
+        assert len(shared["platform.driver"]) == 3
@@ -0,0 +1,137 @@
+import os
+import threading
+
+import pytest
+
+from volttron_config_gen.utils.json_serializer import JsonSerializer
+from volttron_config_gen.utils.output_writer import (OutputWriter, csv_bytes,
+                                                     get_output_writer)
+
+
+def read(file_path):
+    with open(file_path, "rb") as f:
+        return f.read()
+
+
+@pytest.mark.parametrize("workers", [0, 1, 4])
+def test_files_are_written(tmp_path, workers):
+    serializer = JsonSerializer()
+    writer = OutputWriter(serializer, workers=workers, max_pending=2)
+    paths = []
+    for i in range(20):
+        path = str(tmp_path / f"device{i}.json")
+        assert writer.write_json({"device": i}, path) == path
+        paths.append(path)
+    writer.write_csv([["p1", 1], ["p2", 2]], str(tmp_path / "registry.csv"), header=["n", "i"])
+    writer.write_text("text", str(tmp_path / "notes.txt"))
+    assert writer.close() is None
+
+    for i, path in enumerate(paths):
+        assert read(path) == serializer.dumps_bytes({"device": i})
+    assert read(str(tmp_path / "registry.csv")) == csv_bytes([["p1", 1], ["p2", 2]],
+                                                           header=["n", "i"])
+    assert read(str(tmp_path / "notes.txt")) == b"text"
+    assert writer.files == paths + [str(tmp_path / "registry.csv"), str(tmp_path / "notes.txt")]
+    assert not [t for t in threading.enumerate() if t.name.startswith("output_writer")]
+
+
+def test_content_is_serialized_in_callers_thread(tmp_path):
+    writer = OutputWriter(JsonSerializer(), workers=2)
+    config = {"point": 1}
+    writer.write_json(config, str(tmp_path / "a.json"))
+    # objects can be reused once write_json returns
+    config["point"] = 2
+    writer.write_json(config, str(tmp_path / "b.json"))
+    writer.close()
+    assert b'"point": 1' in read(str(tmp_path / "a.json"))
+    assert b'"point": 2' in read(str(tmp_path / "b.json"))
+
+
+def test_csv_bytes():
+    assert csv_bytes([["a", 1], ["b,c", None]], header=["name", "value"]) == \
+           b'name,value\na,1\n"b,c",\n'
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_write_errors_are_raised(tmp_path, workers):
+    writer = OutputWriter(JsonSerializer(), workers=workers)
+    missing = str(tmp_path / "missing" / "a.json")
+    with pytest.raises(FileNotFoundError):
+        writer.write_json({}, missing)
+        writer.flush()
+    writer.discard()
+
+
+def test_write_errors_are_raised_on_close(tmp_path):
+    writer = OutputWriter(JsonSerializer(), workers=2)
+    writer.write_json({}, str(tmp_path / "missing" / "a.json"))
+    with pytest.raises(FileNotFoundError):
+        writer.close()
+    writer.discard()
+    assert not [t for t in threading.enumerate() if t.name.startswith("output_writer")]
+
+
+def test_get_output_writer(tmp_path):
+    writer = get_output_writer({"output_workers": 0}, JsonSerializer(), str(tmp_path))
+    assert writer.workers == 0
+    assert writer.manifest is None and writer.bundle is None
+    writer.close()
+    assert not os.listdir(tmp_path)
+
+
+def write_run(output_dir, files, delete_removed=False):
+    """
+    Writes files (name -> content) with a manifest like a generator run. Returns the writer and
+    the changes
+    """
+    config = {"output_manifest": True, "output_manifest_delete_removed": delete_removed}
+    writer = get_output_writer(config, JsonSerializer(), str(output_dir))
+    for name, content in files.items():
+        writer.write_text(content, str(output_dir / name))
+    return writer, writer.close()
+
+
+def test_manifest_skips_unchanged_files(tmp_path):
+    _, changes = write_run(tmp_path, {"a.json": "a", "b.json": "b"})
+    assert changes == {"added": ["a.json", "b.json"], "changed": [], "removed": [],
+                       "unchanged": 0}
+    mtime = os.stat(tmp_path / "a.json").st_mtime_ns
+    os.utime(tmp_path / "a.json", ns=(mtime - 10**9, mtime - 10**9))
+
+    writer, changes = write_run(tmp_path, {"a.json": "a", "b.json": "b2", "c.json": "c"})
+    assert changes == {"added": ["c.json"], "changed": ["b.json"], "removed": [],
+                       "unchanged": 1}
+    # unchanged file is not rewritten but is still reported as written
+    assert os.stat(tmp_path / "a.json").st_mtime_ns == mtime - 10**9
+    assert read(str(tmp_path / "b.json")) == b"b2"
+    assert writer.files == [str(tmp_path / name) for name in ["a.json", "b.json", "c.json"]]
+
+
+def test_manifest_rewrites_files_edited_since_last_run(tmp_path):
+    write_run(tmp_path, {"a.json": "a"})
+    (tmp_path / "a.json").write_text("edited")
+    write_run(tmp_path, {"a.json": "a"})
+    assert read(str(tmp_path / "a.json")) == b"a"
+
+    (tmp_path / "a.json").unlink()
+    write_run(tmp_path, {"a.json": "a"})
+    assert read(str(tmp_path / "a.json")) == b"a"
+
+
+def test_manifest_deletes_removed_files_only_if_configured(tmp_path):
+    write_run(tmp_path, {"a.json": "a", "b.json": "b"})
+    _, changes = write_run(tmp_path, {"a.json": "a"})
+    assert changes["removed"] == ["b.json"]
+    assert (tmp_path / "b.json").exists()
+
+    write_run(tmp_path, {"a.json": "a", "b.json": "b"})
+    write_run(tmp_path, {"a.json": "a"}, delete_removed=True)
+    assert not (tmp_path / "b.json").exists()
+    assert (tmp_path / "a.json").exists()
+
+
+def test_unreadable_manifest_is_ignored(tmp_path):
+    write_run(tmp_path, {"a.json": "a"})
+    (tmp_path / "output_manifest.json").write_text("not json")
+    _, changes = write_run(tmp_path, {"a.json": "a"})
+    assert changes["added"] == ["a.json"]
@@ -0,0 +1,73 @@
+import os
+
+import pytest
+
+from volttron_config_gen.utils.json_serializer import JsonSerializer
+from volttron_config_gen.utils.output_writer import OutputWriter
+from volttron_config_gen.utils.process_pool import (map_in_workers,
+                                                    merge_unmapped_device_details)
+
+
+class Generator:
+    """
+    Minimal config generator - writes one config per ahu and reports ahus without vavs
+    """
+
+    def __init__(self, output_dir, workers=0):
+        self.output_dir = output_dir
+        self.json_serializer = JsonSerializer()
+        self.output_writer = OutputWriter(self.json_serializer, workers=workers)
+        self.unmapped_device_details = {"meter": {"error": "loaded before the pool started"}}
+        self.processed = []
+
+    def __getstate__(self):
+        # output writer's threads can't be pickled. workers get a recording writer
+        state = self.__dict__.copy()
+        state["output_writer"] = None
+        return state
+
+    def write_ahu_configs(self, ahu, vavs):
+        self.processed.append(ahu)
+        if not vavs:
+            self.unmapped_device_details[ahu] = {"error": "no vavs"}
+            return None
+        file_path = os.path.join(self.output_dir, f"{ahu}.json")
+        name = self.output_writer.write_json({ahu: vavs}, file_path)
+        return ahu, name
+
+
+ITEMS = [(f"AHU-{i}", [f"VAV-{i}-{j}" for j in range(i % 3)]) for i in range(10)]
+
+
+def run(tmp_path, workers):
+    output_dir = tmp_path / f"workers{workers}"
+    output_dir.mkdir()
+    generator = Generator(str(output_dir))
+    results = map_in_workers(generator, "write_ahu_configs", ITEMS, workers)
+    generator.output_writer.close()
+    return generator, results
+
+
+@pytest.mark.parametrize("workers", [2, 3])
+def test_workers_give_same_output_as_one_process(tmp_path, workers):
+    expected, expected_results = run(tmp_path, 0)
+    generator, results = run(tmp_path, workers)
+
+    assert [r and r[0] for r in results] == [r and r[0] for r in expected_results]
+    assert generator.unmapped_device_details == expected.unmapped_device_details
+    assert list(generator.unmapped_device_details) == list(expected.unmapped_device_details)
+    # files are written by the parent's writer in order of items
+    assert [os.path.basename(f) for f in generator.output_writer.files] == \
+           [os.path.basename(f) for f in expected.output_writer.files]
+    for file_name in os.listdir(tmp_path / "workers0"):
+        assert (tmp_path / f"workers{workers}" / file_name).read_bytes() == \
+               (tmp_path / "workers0" / file_name).read_bytes()
+    # other changes to the generator are local to the workers
+    assert generator.processed == []
+    assert expected.processed == [ahu for ahu, _ in ITEMS]
+
+
+def test_merge_unmapped_device_details():
+    target = {"a": {"error": "x"}, "b": "text"}
+    merge_unmapped_device_details(target, {"a": {"type": "vav"}, "b": "new", "c": {}})
+    assert target == {"a": {"error": "x", "type": "vav"}, "b": "new", "c": {}}
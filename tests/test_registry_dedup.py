@@ -0,0 +1,79 @@
+import json
+import os
+
+import pytest
+
+from volttron_config_gen.ucsd_brick.file.config_driver import ConfigGenerator
+
+CONFIG_TEMPLATE = {
+    "driver_config": {"device_address": "10.1.1.3", "device_id": 500},
+    "driver_type": "bacnet",
+    "registry_config": "config://registry_configs/vav.csv",
+    "interval": 60,
+    "timezone": "UTC"
+}
+
+
+def generate(snapshot, output_dir, dedup, workers=0):
+    return ConfigGenerator({"metadata": {"snapshot_json": snapshot},
+                            "building": "b1",
+                            "output_dir": str(output_dir),
+                            "dedup_registry_configs": dedup,
+                            "workers": workers,
+                            "config_template": CONFIG_TEMPLATE}).generate()
+
+
+def load(file_path):
+    with open(file_path) as f:
+        return json.load(f)
+
+
+def registry_configs(output_dir):
+    """
+    Returns dict of device topic -> config store name of its registry config
+    """
+    configs = load(os.path.join(output_dir, "configs", "AHU-1.json"))["platform.driver"]
+    configs.extend(load(os.path.join(output_dir, "configs", "all_lights.json"))["platform.driver"])
+    return {c["config-name"]: c["config"]["registry_config"] for c in configs
+            if isinstance(c["config"], dict)}
+
+
+def registry_csvs(output_dir):
+    return sorted(f for f in os.listdir(os.path.join(output_dir, "configs"))
+                  if f.endswith(".csv"))
+
+
+def test_registry_config_per_device_by_default(tmp_path, ucsd_snapshot):
+    generate(ucsd_snapshot, tmp_path, dedup=False)
+    assert registry_csvs(tmp_path) == ["registry_AHU-1.csv", "registry_Room-1_lights.csv",
+                                       "registry_VAV-1.csv", "registry_VAV-2.csv"]
+    assert registry_configs(tmp_path)["devices/b1/AHU-1/VAV-2"] == \
+           "config://registry_config/VAV-2.csv"
+    assert not os.path.exists(tmp_path / "configs" / "shared_registry_configs.json")
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_devices_with_identical_registry_configs_share_one(tmp_path, ucsd_snapshot, workers):
+    generate(ucsd_snapshot, tmp_path / "separate", dedup=False)
+    generate(ucsd_snapshot, tmp_path / "shared", dedup=True, workers=workers)
+
+    references = registry_configs(tmp_path / "shared")
+    # both vavs have the same points
+    assert references["devices/b1/AHU-1/VAV-1"] == references["devices/b1/AHU-1/VAV-2"]
+    assert len(set(references.values())) == 3
+    assert len(registry_csvs(tmp_path / "shared")) == 3
+
+    shared = load(tmp_path / "shared" / "configs" / "shared_registry_configs.json")
+    entries = {f"config://{e['config-name']}": e for e in shared["platform.driver"]}
+    assert set(entries) == set(references.values())
+    # device config files don't list the shared registry configs
+    for entry in load(tmp_path / "shared" / "configs" / "AHU-1.json")["platform.driver"]:
+        assert not entry["config-name"].startswith("registry_config/")
+
+    # content is the same as the registry config of each device without dedup
+    for topic, reference in references.items():
+        device = topic.split("/")[-1]
+        with open(entries[reference]["config"], "rb") as f:
+            shared_content = f.read()
+        with open(tmp_path / "separate" / "configs" / f"registry_{device}.csv", "rb") as f:
+            assert shared_content == f.read()
@@ -0,0 +1,83 @@
+import json
+import os
+
+import pytest
+
+from volttron_config_gen.utils import strip_comments
+from volttron_config_gen.utils.ilc.validate_pairwise import (calc_column_sums,
+                                                             consistency_ratio,
+                                                             extract_criteria, priority_vector,
+                                                             validate_input)
+
+PAIRWISE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src",
+                            "volttron_config_gen", "utils", "ilc")
+
+
+def consistent_matrix(weights):
+    """
+    Pairwise matrix of criteria with the given weights. Perfectly consistent, a[i][j] = w[i]/w[j]
+    """
+    return [[a / b for b in weights] for a in weights]
+
+
+def ratio(matrix):
+    return consistency_ratio(matrix, calc_column_sums(matrix))
+
+
+@pytest.mark.parametrize("weights", [[1, 2, 4], [1, 2, 3, 4, 5], list(range(1, 21))],
+                         ids=["n=3", "n=5", "n=20"])
+def test_consistent_matrix(weights):
+    matrix = consistent_matrix(weights)
+    assert ratio(matrix) == pytest.approx(0, abs=1e-12)
+    # priority vector is the weights normalized to add up to 1, also when the product of a row
+    # overflows
+    assert priority_vector(matrix) == pytest.approx([w / sum(weights) for w in weights])
+
+
+def test_consistency_ratio_n3():
+    matrix = [[1, 2, 4], [1 / 2, 1, 3], [1 / 4, 1 / 3, 1]]
+    assert ratio(matrix) == pytest.approx(0.0157713, rel=1e-5)
+    # cyclic preferences
+    matrix = [[1, 9, 1 / 9], [1 / 9, 1, 9], [9, 1 / 9, 1]]
+    assert ratio(matrix) == pytest.approx(6.1302682, rel=1e-5)
+
+
+def test_consistency_ratio_n5():
+    matrix = [[1, 3, 5, 7, 9], [1 / 3, 1, 3, 5, 7], [1 / 5, 1 / 3, 1, 3, 5],
+              [1 / 7, 1 / 5, 1 / 3, 1, 3], [1 / 9, 1 / 7, 1 / 5, 1 / 3, 1]]
+    assert ratio(matrix) == pytest.approx(0.0542259, rel=1e-5)
+
+
+def test_consistency_ratio_more_than_15_criteria():
+    # random index of n > 15 is the one of 15 criteria
+    matrix = consistent_matrix(list(range(1, 21)))
+    matrix[0][19], matrix[19][0] = 20, 1 / 20
+    assert ratio(matrix) == pytest.approx(0.0620083, rel=1e-5)
+
+
+def test_validate_input():
+    matrix = [[1, 2, 4], [1 / 2, 1, 3], [1 / 4, 1 / 3, 1]]
+    valid, value = validate_input(matrix, calc_column_sums(matrix))
+    assert valid and value == pytest.approx(0.0157713, rel=1e-5)
+
+    matrix = [[1, 9, 1 / 9, 1, 1], [1 / 9, 1, 9, 1, 1], [9, 1 / 9, 1, 1, 1],
+              [1, 1, 1, 1, 9], [1, 1, 1, 1 / 9, 1]]
+    valid, value = validate_input(matrix, calc_column_sums(matrix))
+    assert not valid and value == pytest.approx(1.0786074, rel=1e-5)
+
+
+@pytest.mark.parametrize("device_type, expected", [("lighting", 0.0462255), ("vav", 0.0004777)])
+def test_bundled_pairwise_criteria_are_valid(device_type, expected):
+    # consistency ratio used to take the 5th root of row products whatever the number of
+    # criteria, which failed the 3 criteria lighting matrix (0.296)
+    with open(os.path.join(PAIRWISE_DIR, f"pairwise_criteria_{device_type}.json")) as f:
+        criteria = json.loads(strip_comments(f.read()))["curtail"]
+    labels, matrix = extract_criteria(criteria)
+    valid, value = validate_input(matrix, calc_column_sums(matrix))
+    assert valid and value == pytest.approx(expected, rel=1e-3)
+
+
+def test_extract_criteria():
+    labels, matrix = extract_criteria({"a": {"b": 2.0, "c": 4.0}, "b": {"c": 2.0}, "c": {}})
+    assert labels == ["a", "b", "c"]
+    assert matrix == [[1.0, 2.0, 4.0], [0.5, 1.0, 2.0], [0.25, 0.5, 1.0]]